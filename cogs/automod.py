@@ -0,0 +1,201 @@
+import asyncio
+import discord
+from datetime import timedelta
+from discord.ext import commands
+from utils.metrics import instrumented, REGISTRY
+from utils.antiflood import FloodDetector, count_links
+from utils.duplicates import DuplicateDetector
+from utils.permissions import MODERATE, has_capability
+from config.config import (
+    MODERATION_LOG_CHANNEL_ID,
+    MODERATION_WEBHOOK_COLOR,
+    FLOOD_WINDOW,
+    FLOOD_MAX_MESSAGES,
+    FLOOD_MAX_MENTIONS,
+    FLOOD_MAX_LINKS,
+    FLOOD_TIMEOUT,
+    FLOOD_MAX_TRACKED_USERS,
+    FLOOD_IDLE_TTL,
+    DUPLICATE_WINDOW,
+    DUPLICATE_MAX_ACCOUNTS,
+    DUPLICATE_MAX_CHANNELS,
+    DUPLICATE_MIN_LENGTH,
+    DUPLICATE_MAX_ENTRIES,
+    DUPLICATE_FUZZY,
+    DUPLICATE_DELETE_DELAY,
+)
+
+# Máximo de mensajes por llamada al endpoint de borrado masivo de Discord
+BULK_DELETE_LIMIT = 100
+
+
+class AutoMod(commands.Cog):
+    """Cog de moderación automática (anti-flood y anti-duplicados)"""
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.flood = FloodDetector(
+            window=FLOOD_WINDOW,
+            max_messages=FLOOD_MAX_MESSAGES,
+            max_mentions=FLOOD_MAX_MENTIONS,
+            max_links=FLOOD_MAX_LINKS,
+            max_users=FLOOD_MAX_TRACKED_USERS,
+            idle_ttl=FLOOD_IDLE_TTL,
+        )
+        # Miembros con un aislamiento en curso (evita sancionar dos veces la misma ráfaga)
+        self.punishing = set()
+        self.duplicates = DuplicateDetector(
+            window=DUPLICATE_WINDOW,
+            max_accounts=DUPLICATE_MAX_ACCOUNTS,
+            max_channels=DUPLICATE_MAX_CHANNELS,
+            max_entries=DUPLICATE_MAX_ENTRIES,
+            min_length=DUPLICATE_MIN_LENGTH,
+            fuzzy=DUPLICATE_FUZZY,
+        )
+        # Copias pendientes de borrar, agrupadas por canal: {channel_id: {message_id}}
+        self.pending_deletes = {}
+        self.pending_sample = None
+        self.delete_task = None
+        REGISTRY.register_gauge(
+            "dorrdbot_automod_tracked_users",
+            "Usuarios con ventana anti-flood en memoria",
+            lambda: len(self.flood.users),
+        )
+        REGISTRY.register_gauge(
+            "dorrdbot_automod_tracked_fingerprints",
+            "Huellas de mensajes recientes en memoria (anti-duplicados)",
+            lambda: len(self.duplicates),
+        )
+
+    @commands.Cog.listener()
+    @instrumented("listener", "automod_on_message")
+    async def on_message(self, message: discord.Message):
+        """Pasa cada mensaje por el anti-duplicados y el anti-flood"""
+        if message.author.bot or not message.guild:
+            return
+
+        member = message.author
+        if not isinstance(member, discord.Member) or has_capability(member, MODERATE):
+            return
+
+        self.check_duplicates(message)
+        await self.check_flood(member, message)
+
+    def check_duplicates(self, message: discord.Message) -> None:
+        """Registra la huella del mensaje y encola el borrado si el contenido se está repitiendo"""
+        copies = self.duplicates.check(message.channel.id, message.id, message.author.id, message.content)
+        if not copies:
+            return
+
+        for channel_id, message_id in copies:
+            self.pending_deletes.setdefault(channel_id, set()).add(message_id)
+        if self.pending_sample is None:
+            self.pending_sample = message.content
+        if self.delete_task is None or self.delete_task.done():
+            self.delete_task = asyncio.create_task(self.flush_deletes(message.guild))
+
+    async def flush_deletes(self, guild: discord.Guild) -> None:
+        """Borra las copias acumuladas con una llamada de borrado masivo por canal"""
+        # Esperar un poco para que las copias que siguen llegando entren en el mismo lote
+        await asyncio.sleep(DUPLICATE_DELETE_DELAY)
+        pending, self.pending_deletes = self.pending_deletes, {}
+        sample, self.pending_sample = self.pending_sample, None
+
+        deleted = {}
+        for channel_id, message_ids in pending.items():
+            channel = guild.get_channel_or_thread(channel_id)
+            if not channel:
+                continue
+            ids = sorted(message_ids)
+            for start in range(0, len(ids), BULK_DELETE_LIMIT):
+                chunk = [discord.Object(id=message_id) for message_id in ids[start:start + BULK_DELETE_LIMIT]]
+                try:
+                    await channel.delete_messages(chunk, reason="Anti-duplicados: mensaje repetido en varios canales")
+                    deleted[channel_id] = deleted.get(channel_id, 0) + len(chunk)
+                except discord.NotFound:
+                    # Alguna copia ya se había borrado; el resto de lotes sigue adelante
+                    pass
+                except discord.HTTPException as e:
+                    print(f"❌ Error al borrar copias en el canal {channel_id}: {e}")
+
+        total = sum(deleted.values())
+        if not total:
+            return
+        REGISTRY.inc("dorrdbot_automod_duplicates_deleted_total", "Mensajes duplicados borrados por el anti-duplicados", total)
+        print(f"✅ Anti-duplicados: {total} mensaje(s) borrado(s) en {len(deleted)} canal(es)")
+        await self.send_duplicate_log(guild, deleted, sample)
+
+    async def send_duplicate_log(self, guild: discord.Guild, deleted: dict, sample: str) -> None:
+        """Resume en el canal de moderación una oleada de mensajes duplicados"""
+        try:
+            channel = guild.get_channel(MODERATION_LOG_CHANNEL_ID)
+            if not channel:
+                print(f"❌ No se encontró el canal de moderación {MODERATION_LOG_CHANNEL_ID}")
+                return
+
+            embed = discord.Embed(
+                title=f"🧹 Anti-duplicados: {sum(deleted.values())} mensaje(s) borrado(s)",
+                description=f"**Contenido:**\n>>> {(sample or '')[:500]}",
+                color=MODERATION_WEBHOOK_COLOR,
+            )
+            embed.add_field(
+                name="Canales",
+                value="\n".join(f"<#{channel_id}>: {count}" for channel_id, count in deleted.items())[:1000],
+                inline=False,
+            )
+            await channel.send(embed=embed)
+
+        except Exception as e:
+            print(f"❌ Error al enviar el log del anti-duplicados: {e}")
+
+    async def check_flood(self, member: discord.Member, message: discord.Message) -> None:
+        """Cuenta mensajes, menciones y enlaces del miembro en la ventana deslizante"""
+        key = (message.guild.id, member.id)
+        mentions = len(message.raw_mentions) + len(message.raw_role_mentions) + message.mention_everyone
+        reason = self.flood.check(key, mentions, count_links(message.content))
+        if reason is None or key in self.punishing:
+            return
+
+        self.flood.reset(key)
+        self.punishing.add(key)
+        try:
+            await self.punish_flood(member, f"Flood: {reason}")
+        finally:
+            self.punishing.discard(key)
+
+    async def punish_flood(self, member: discord.Member, reason: str) -> None:
+        """Aísla al miembro y lo registra como un caso más de moderación"""
+        if member.is_timed_out():
+            return
+
+        try:
+            await member.timeout(timedelta(seconds=FLOOD_TIMEOUT), reason=reason)
+        except discord.Forbidden:
+            print(f"❌ No tengo permisos para aislar a {member.name} (anti-flood)")
+            return
+        except Exception as e:
+            print(f"❌ Error al aislar a {member.name} (anti-flood): {e}")
+            return
+
+        REGISTRY.inc("dorrdbot_automod_flood_timeouts_total", "Aislamientos aplicados por el anti-flood")
+        print(f"✅ {member.name} aislado por flood ({reason})")
+
+        moderation = self.bot.get_cog("Moderation")
+        if not moderation:
+            return
+        moderation.cases.record(
+            member.guild.id, member.id, self.bot.user.id, "timeout", reason,
+            expires_at=discord.utils.utcnow().timestamp() + FLOOD_TIMEOUT,
+        )
+        await moderation.send_moderation_webhook(
+            guild=member.guild,
+            action=f"aislado {FLOOD_TIMEOUT // 60} minuto(s) (anti-flood)",
+            sanctioned_user=member,
+            reason=reason,
+            moderator=self.bot.user,
+        )
+
+
+async def setup(bot):
+    """Cargar el cog"""
+    await bot.add_cog(AutoMod(bot))
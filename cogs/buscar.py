@@ -0,0 +1,184 @@
+import asyncio
+import discord
+from discord import app_commands
+from discord.ext import commands, tasks
+from typing import Literal, Optional
+from utils.metrics import instrumented
+from utils.permissions import MANAGE_TICKET, has_capability
+from utils.search import KIND_SUGGESTION, KIND_TICKET, get_search_index
+from utils.transcripts import read_contents
+from config.config import WEBHOOK_COLOR, SEARCH_FLUSH_INTERVAL
+
+# Resultados por página y máximo de resultados de una búsqueda
+SEARCH_PAGE_SIZE = 5
+SEARCH_MAX_RESULTS = 50
+
+# Valores de la opción "tipo" de /buscar
+SEARCH_KINDS = {
+    "sugerencias": {KIND_SUGGESTION},
+    "tickets": {KIND_TICKET},
+}
+
+KIND_LABELS = {
+    KIND_SUGGESTION: "💡 Sugerencia",
+    KIND_TICKET: "🎫 Ticket",
+}
+
+
+def format_result(guild_id: int, result) -> str:
+    if result.kind == KIND_SUGGESTION:
+        link = f"https://discord.com/channels/{guild_id}/{result.channel_id}/{result.doc_id}"
+    else:
+        link = f"https://discord.com/channels/{guild_id}/{result.channel_id}"
+    title = result.title.replace("\n", " ") or "Sin título"
+    if len(title) > 80:
+        title = title[:80] + "…"
+    return f"{KIND_LABELS[result.kind]} · [{title}]({link})"
+
+
+class SearchResultsView(discord.ui.View):
+    """Paginación de /buscar: los resultados ya están ordenados en memoria"""
+
+    def __init__(self, user_id: int, guild_id: int, query: str, results: list):
+        super().__init__(timeout=300)
+        self.user_id = user_id
+        self.guild_id = guild_id
+        self.query = query
+        self.results = results
+        self.page = 0
+        self.pages = max(1, -(-len(results) // SEARCH_PAGE_SIZE))
+
+    def build_embed(self) -> discord.Embed:
+        start = self.page * SEARCH_PAGE_SIZE
+        lines = [
+            f"**{position}.** {format_result(self.guild_id, result)}"
+            for position, result in enumerate(self.results[start:start + SEARCH_PAGE_SIZE], start=start + 1)
+        ]
+        embed = discord.Embed(
+            title=f"🔎 Resultados para «{self.query[:100]}»",
+            description="\n".join(lines),
+            color=WEBHOOK_COLOR,
+        )
+        embed.set_footer(text=f"Página {self.page + 1}/{self.pages} · {len(self.results)} resultado(s)")
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.pages - 1
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.user_id:
+            await interaction.response.send_message(
+                "❌ Solo quien hizo la búsqueda puede pasar de página.",
+                ephemeral=True
+            )
+            return False
+        return True
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(0, self.page - 1)
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = min(self.pages - 1, self.page + 1)
+        await interaction.response.edit_message(embed=self.build_embed(), view=self)
+
+
+class Buscar(commands.Cog):
+    """Cog de búsqueda en sugerencias y tickets"""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.index = get_search_index()
+        self.seeded = False
+
+    async def cog_load(self) -> None:
+        self.flush_index.start()
+
+    async def cog_unload(self) -> None:
+        self.flush_index.cancel()
+        await self.index.flush()
+
+    @tasks.loop(seconds=SEARCH_FLUSH_INTERVAL)
+    async def flush_index(self) -> None:
+        try:
+            await self.index.flush()
+        except Exception as e:
+            print(f"❌ Error al guardar el índice de búsqueda: {e}")
+
+    async def prepare_index(self) -> None:
+        """
+        Carga el índice en la primera búsqueda y añade lo guardado que aún no
+        esté: las sugerencias del almacén y los transcripts de los tickets.
+        Así se reconstruye también tras descartar una foto de otra versión.
+        """
+        await self.index.ensure_loaded()
+        if self.seeded:
+            return
+        self.seeded = True
+        sugerencias = self.bot.get_cog("Sugerencias")
+        if sugerencias is not None:
+            missing = [
+                suggestion
+                for suggestion in list(sugerencias.store.cache.values())
+                if not self.index.contains(KIND_SUGGESTION, suggestion.message_id)
+            ]
+            for suggestion in missing:
+                self.index.add(
+                    KIND_SUGGESTION, suggestion.message_id, suggestion.channel_id, suggestion.content, suggestion.content
+                )
+            if missing:
+                print(f"✅ {len(missing)} sugerencia(s) añadidas al índice de búsqueda")
+
+        tickets = self.bot.get_cog("Tickets")
+        if tickets is not None:
+            added = 0
+            for ticket_id in list(tickets.store.cache):
+                if self.index.contains(KIND_TICKET, ticket_id):
+                    continue
+                jsonl_path, _ = tickets.transcripts.paths(ticket_id)
+                contents = await asyncio.to_thread(read_contents, jsonl_path)
+                if not contents:
+                    continue
+                channel = self.bot.get_channel(ticket_id)
+                title = channel.name if channel else f"Ticket {ticket_id}"
+                self.index.add(KIND_TICKET, ticket_id, ticket_id, "\n".join(contents), title)
+                added += 1
+            if added:
+                print(f"✅ {added} ticket(s) añadidos al índice de búsqueda desde sus transcripts")
+
+    @app_commands.command(name="buscar", description="Busca en las sugerencias y los tickets")
+    @instrumented("command", "buscar")
+    async def slash_buscar(
+        self,
+        interaction: discord.Interaction,
+        texto: str,
+        tipo: Optional[Literal["sugerencias", "tickets"]] = None
+    ):
+        """Búsqueda de texto completo, ordenada por relevancia y paginada"""
+
+        # Los tickets son privados: solo el staff de tickets puede buscar en ellos
+        can_see_tickets = has_capability(interaction.user, MANAGE_TICKET)
+        if tipo == "tickets" and not can_see_tickets:
+            await interaction.response.send_message(
+                "❌ No tienes permiso para buscar en los tickets.",
+                ephemeral=True
+            )
+            return
+        kinds = SEARCH_KINDS[tipo] if tipo else ({KIND_SUGGESTION, KIND_TICKET} if can_see_tickets else {KIND_SUGGESTION})
+
+        await interaction.response.defer(ephemeral=True)
+        await self.prepare_index()
+        results = self.index.search(texto, kinds, SEARCH_MAX_RESULTS)
+        if not results:
+            await interaction.followup.send(f"ℹ️ No hay resultados para «{texto[:100]}».", ephemeral=True)
+            return
+
+        view = SearchResultsView(interaction.user.id, interaction.guild_id, texto, results)
+        await interaction.followup.send(embed=view.build_embed(), view=view, ephemeral=True)
+
+
+async def setup(bot: commands.Bot) -> None:
+    """Cargar el cog de búsqueda"""
+    await bot.add_cog(Buscar(bot))
+    print("✅ Sistema de búsqueda cargado")
@@ -1,14 +1,100 @@
+import asyncio
 import discord
+import re
+import time
+from datetime import timedelta
 from discord import app_commands
 from discord.ext import commands
-from config.config import MODERATION_LOG_CHANNEL_ID, MODERATION_WEBHOOK_COLOR
+from utils.metrics import instrumented
+from utils.database import get_database
+from utils.scheduler import DeadlineScheduler
+from utils.tempban_store import TempbanStore, parse_duration, format_duration
+from utils.case_store import CaseStore, ACTION_LABELS
+from utils.permissions import MODERATE, has_capability, require
+from utils.dm_outbox import get_dm_outbox
+from config.config import (
+    MODERATION_LOG_CHANNEL_ID,
+    MODERATION_WEBHOOK_COLOR,
+    DM_SANCTION_WAIT,
+    TEMPBAN_RETRY_BASE_DELAY,
+    TEMPBAN_RETRY_MAX_DELAY,
+)
 
-# IDs de roles de admin
-ADMIN_ROLE_IDS = [
-    1466585692791378113,
-    1466585864929804339,
-    1466787362712588309,
-]
+# Máximo de usuarios por llamada al endpoint de baneo masivo de Discord
+MASSBAN_CHUNK_SIZE = 200
+
+# IDs de usuario (sueltos o como mención) dentro de una lista de texto
+USER_ID_PATTERN = re.compile(r"\d{15,20}")
+
+# Casos por página en /historial
+HISTORY_PAGE_SIZE = 5
+
+
+def format_case(case) -> str:
+    """Línea de resumen de un caso para /historial"""
+    moderator = f"<@{case['moderator_id']}>" if case["moderator_id"] else "Desconocido"
+    line = (
+        f"**#{case['case_id']}** {ACTION_LABELS.get(case['action'], case['action'])} "
+        f"· <t:{int(case['created_at'])}:f> · por {moderator}"
+    )
+    if case["reason"]:
+        line += f"\n> {case['reason'][:200]}"
+    return line
+
+
+async def send_ephemeral(interaction: discord.Interaction, content: str) -> None:
+    """Responde en privado tanto si la interacción ya se difirió como si no"""
+    if interaction.response.is_done():
+        await interaction.followup.send(content, ephemeral=True)
+    else:
+        await interaction.response.send_message(content, ephemeral=True)
+
+
+class CaseHistoryView(discord.ui.View):
+    """Paginación de /historial: cada página se consulta al índice por usuario"""
+
+    def __init__(self, cog, moderator_id: int, guild_id: int, user: discord.User, total: int):
+        super().__init__(timeout=300)
+        self.cog = cog
+        self.moderator_id = moderator_id
+        self.guild_id = guild_id
+        self.user = user
+        self.total = total
+        self.page = 0
+        self.pages = max(1, -(-total // HISTORY_PAGE_SIZE))
+
+    async def build_embed(self) -> discord.Embed:
+        cases = await self.cog.cases.history(
+            self.guild_id, self.user.id, HISTORY_PAGE_SIZE, self.page * HISTORY_PAGE_SIZE
+        )
+        embed = discord.Embed(
+            title=f"📋 Historial de {self.user.name}",
+            description="\n\n".join(format_case(case) for case in cases) or "Sin sanciones registradas.",
+            color=MODERATION_WEBHOOK_COLOR,
+        )
+        embed.set_footer(text=f"Página {self.page + 1}/{self.pages} · {self.total} caso(s) · ID: {self.user.id}")
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.pages - 1
+        return embed
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.moderator_id:
+            await interaction.response.send_message(
+                "❌ Solo quien abrió el historial puede pasar de página.",
+                ephemeral=True
+            )
+            return False
+        return True
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = max(0, self.page - 1)
+        await interaction.response.edit_message(embed=await self.build_embed(), view=self)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.page = min(self.pages - 1, self.page + 1)
+        await interaction.response.edit_message(embed=await self.build_embed(), view=self)
 
 
 class Moderation(commands.Cog):
@@ -16,10 +102,98 @@ class Moderation(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
+        self.tempbans = TempbanStore(get_database())
+        # Un único temporizador para todos los baneos temporales, clave (guild_id, user_id)
+        self.unban_timers = DeadlineScheduler(self.expire_tempban, name="baneos temporales")
+        self.cases = CaseStore(get_database())
+        # Desbaneos que hace el propio bot (para no registrarlos dos veces)
+        self.expected_unbans = set()
+        # Reintentos de desbaneos fallidos: {(guild_id, user_id): intentos}
+        self.unban_attempts = {}
+
+    async def cog_load(self) -> None:
+        """Restaura los baneos temporales; los vencidos se levantan en cuanto el bot está listo"""
+        await self.cases.setup()
+        await self.tempbans.setup()
+        for tempban in self.tempbans.bans.values():
+            self.unban_timers.schedule(tempban.key, tempban.expires_at)
+        self.unban_timers.start()
+        print(f"✅ {len(self.tempbans.bans)} baneo(s) temporal(es) pendiente(s)")
+
+    async def cog_unload(self) -> None:
+        self.unban_timers.stop()
+        await self.cases.close()
+
+    def retry_unban(self, key: tuple) -> None:
+        """Reprograma un desbaneo fallido con espera exponencial (el baneo sigue guardado)"""
+        attempt = self.unban_attempts.get(key, 0)
+        self.unban_attempts[key] = attempt + 1
+        delay = min(TEMPBAN_RETRY_BASE_DELAY * 2 ** attempt, TEMPBAN_RETRY_MAX_DELAY)
+        self.unban_timers.schedule(key, time.time() + delay)
+        print(f"⏳ Se reintentará levantar el baneo temporal {key} en {format_duration(delay)}")
+
+    async def expire_tempban(self, key: tuple) -> None:
+        """Callback del temporizador: levanta el baneo temporal y lo registra en el log"""
+        await self.bot.wait_until_ready()
+
+        # El baneo solo se borra del almacén cuando el desbaneo se ha hecho de verdad
+        tempban = self.tempbans.get(key)
+        if not tempban:
+            return
+
+        guild = self.bot.get_guild(tempban.guild_id)
+        if not guild:
+            print(f"❌ No se encontró el servidor {tempban.guild_id} para levantar un baneo temporal")
+            self.retry_unban(key)
+            return
+
+        try:
+            user = await self.bot.fetch_user(tempban.user_id)
+            self.expected_unbans.add(key)
+            await guild.unban(user, reason="Fin del baneo temporal")
+        except discord.NotFound:
+            # El usuario ya no está baneado (o no existe)
+            self.expected_unbans.discard(key)
+            self.unban_attempts.pop(key, None)
+            await self.tempbans.remove(key)
+            return
+        except Exception as e:
+            # Sin permisos, error de Discord o de red: se mantiene el baneo y se reintenta
+            self.expected_unbans.discard(key)
+            print(f"❌ Error al levantar el baneo temporal {key}: {e}")
+            self.retry_unban(key)
+            return
+
+        self.unban_attempts.pop(key, None)
+        await self.tempbans.remove(key)
+
+        self.cases.record(guild.id, user.id, self.bot.user.id, "unban", "Fin del baneo temporal")
+
+        await self.send_moderation_webhook(
+            guild=guild,
+            action="desbaneado (fin del baneo temporal)",
+            sanctioned_user=user,
+            reason=tempban.reason,
+            moderator=self.bot.user,
+        )
+        print(f"✅ Baneo temporal levantado: {user.name}")
+
+    @commands.Cog.listener()
+    async def on_member_unban(self, guild: discord.Guild, user: discord.User) -> None:
+        """Registra los desbaneos manuales y olvida el baneo temporal pendiente"""
+        key = (guild.id, user.id)
+        if key in self.expected_unbans:
+            self.expected_unbans.discard(key)
+        else:
+            self.cases.record(guild.id, user.id, None, "unban", "Desbaneo manual")
+        if self.tempbans.get(key):
+            self.unban_timers.cancel(key)
+            self.unban_attempts.pop(key, None)
+            await self.tempbans.remove(key)
 
     def has_admin_role(self, member: discord.Member) -> bool:
         """Verifica si el miembro tiene alguno de los roles de admin"""
-        return any(role.id in ADMIN_ROLE_IDS for role in member.roles)
+        return has_capability(member, MODERATE)
 
     async def send_moderation_webhook(
         self,
@@ -60,37 +234,80 @@ class Moderation(commands.Cog):
         except Exception as e:
             print(f"❌ Error al enviar webhook de sanción: {e}")
 
-    async def send_sanction_dm(
+    async def send_bulk_moderation_webhook(
         self,
-        sanctioned_user: discord.User,
-        action: str,
+        guild: discord.Guild,
+        banned: list,
+        failed: list,
         reason: str,
         moderator: discord.User,
     ):
         """
-        Envía un mensaje privado al usuario sancionado.
+        Envía una única entrada de log que resume un baneo masivo.
         """
         try:
+            channel = guild.get_channel(MODERATION_LOG_CHANNEL_ID)
+            if not channel:
+                print(f"❌ No se encontró el canal de moderación {MODERATION_LOG_CHANNEL_ID}")
+                return
+
+            reason_display = reason if reason and reason.strip() else "No especificado"
+
             embed = discord.Embed(
-                title=f"❌ Has sido {action}",
+                title=f"🚨 Baneo masivo: {len(banned)} usuario(s) baneado(s)",
                 description=(
-                    f"**Motivo:** {reason if reason and reason.strip() else 'No especificado'}\n"
-                    f"**Sancionador:** {moderator.mention}"
+                    f"**Motivo:** {reason_display}\n"
+                    f"**Sancionador:** {moderator.mention}\n"
+                    f"**Fallidos:** {len(failed)}"
                 ),
                 color=MODERATION_WEBHOOK_COLOR,
             )
-            embed.set_footer(text="Si crees que esto es un error, contacta con los administradores")
-            
-            await sanctioned_user.send(embed=embed)
-            print(f"✅ DM de sanción enviado a: {sanctioned_user.name}")
-            
-        except discord.Forbidden:
-            print(f"❌ No se pudo enviar DM a {sanctioned_user.name} (DMs deshabilitados)")
+            # Listar los IDs mientras quepan en el embed
+            ids_text = "\n".join(str(user.id) for user in banned)
+            if len(ids_text) > 1000:
+                ids_text = ids_text[:1000].rsplit("\n", 1)[0] + "\n…"
+            if ids_text:
+                embed.add_field(name="IDs baneados", value=ids_text, inline=False)
+
+            await channel.send(embed=embed)
+            print(f"✅ Webhook de baneo masivo enviado: {len(banned)} usuario(s)")
+
         except Exception as e:
-            print(f"❌ Error al enviar DM de sanción: {e}")
+            print(f"❌ Error al enviar webhook de baneo masivo: {e}")
+
+    async def send_sanction_dm(
+        self,
+        sanctioned_user: discord.User,
+        action: str,
+        reason: str,
+        moderator: discord.User,
+    ):
+        """
+        Envía un mensaje privado al usuario sancionado.
+
+        El DM sale por la cola de DMs; se espera como mucho DM_SANCTION_WAIT
+        segundos porque tras la expulsión o el baneo ya no se le puede escribir.
+        """
+        embed = discord.Embed(
+            title=f"❌ Has sido {action}",
+            description=(
+                f"**Motivo:** {reason if reason and reason.strip() else 'No especificado'}\n"
+                f"**Sancionador:** {moderator.mention}"
+            ),
+            color=MODERATION_WEBHOOK_COLOR,
+        )
+        embed.set_footer(text="Si crees que esto es un error, contacta con los administradores")
+
+        delivery = get_dm_outbox().send(sanctioned_user, label="sanción", embed=embed)
+        try:
+            await asyncio.wait_for(asyncio.shield(delivery), timeout=DM_SANCTION_WAIT)
+        except asyncio.TimeoutError:
+            print(f"⚠️ El DM de sanción a {sanctioned_user.name} sigue en cola; se aplica la sanción igualmente")
 
 
     @app_commands.command(name="kick", description="Expulsa a un usuario del servidor")
+    @require(MODERATE, "❌ No tienes permiso para usar este comando. Solo admins pueden expulsar miembros.")
+    @instrumented("command", "kick")
     async def slash_kick(
         self, 
         interaction: discord.Interaction, 
@@ -99,15 +316,10 @@ class Moderation(commands.Cog):
     ):
         """Expulsa a un usuario del servidor"""
         
-        # Verificar si el usuario tiene rol de admin
-        if not self.has_admin_role(interaction.user):
-            await interaction.response.send_message(
-                "❌ No tienes permiso para usar este comando. Solo admins pueden expulsar miembros.",
-                ephemeral=True
-            )
-            return
-        
         try:
+            # Diferir antes de esperar al DM de sanción (hasta DM_SANCTION_WAIT segundos)
+            await interaction.response.defer(ephemeral=True, thinking=True)
+
             # Obtener el miembro del servidor
             member = await interaction.guild.fetch_member(usuario.id)
             
@@ -123,6 +335,7 @@ class Moderation(commands.Cog):
             
             # Kickear al usuario
             await member.kick(reason=reason_display)
+            self.cases.record(interaction.guild.id, usuario.id, interaction.user.id, "kick", reason_display)
             
             # Enviar webhook
             await self.send_moderation_webhook(
@@ -139,26 +352,19 @@ class Moderation(commands.Cog):
                 description=f"{usuario.mention} ha sido expulsado del servidor",
                 color=0x00ff00,
             )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+            await interaction.followup.send(embed=embed, ephemeral=True)
             
         except discord.Forbidden:
-            await interaction.response.send_message(
-                "❌ No tengo permisos para expulsar a este usuario.",
-                ephemeral=True
-            )
+            await send_ephemeral(interaction, "❌ No tengo permisos para expulsar a este usuario.")
         except discord.NotFound:
-            await interaction.response.send_message(
-                "❌ Usuario no encontrado en el servidor.",
-                ephemeral=True
-            )
+            await send_ephemeral(interaction, "❌ Usuario no encontrado en el servidor.")
         except Exception as e:
             print(f"❌ Error en kick: {e}")
-            await interaction.response.send_message(
-                f"❌ Error al expulsar al usuario: {e}",
-                ephemeral=True
-            )
+            await send_ephemeral(interaction, f"❌ Error al expulsar al usuario: {e}")
 
     @app_commands.command(name="ban", description="Banea a un usuario del servidor")
+    @require(MODERATE, "❌ No tienes permiso para usar este comando. Solo admins pueden banear miembros.")
+    @instrumented("command", "ban")
     async def slash_ban(
         self,
         interaction: discord.Interaction,
@@ -167,15 +373,10 @@ class Moderation(commands.Cog):
     ):
         """Banea a un usuario del servidor"""
         
-        # Verificar si el usuario tiene rol de admin
-        if not self.has_admin_role(interaction.user):
-            await interaction.response.send_message(
-                "❌ No tienes permiso para usar este comando. Solo admins pueden banear miembros.",
-                ephemeral=True
-            )
-            return
-        
         try:
+            # Diferir antes de esperar al DM de sanción (hasta DM_SANCTION_WAIT segundos)
+            await interaction.response.defer(ephemeral=True, thinking=True)
+
             reason_display = motivo if motivo and motivo.strip() else "No especificado"
             
             # Enviar DM al usuario ANTES de banearlo
@@ -188,6 +389,13 @@ class Moderation(commands.Cog):
             
             # Banear al usuario
             await interaction.guild.ban(usuario, reason=reason_display)
+            self.cases.record(interaction.guild.id, usuario.id, interaction.user.id, "ban", reason_display)
+
+            # Un baneo permanente sustituye a cualquier baneo temporal pendiente
+            key = (interaction.guild.id, usuario.id)
+            if self.tempbans.get(key):
+                self.unban_timers.cancel(key)
+                await self.tempbans.remove(key)
             
             # Enviar webhook
             await self.send_moderation_webhook(
@@ -204,21 +412,17 @@ class Moderation(commands.Cog):
                 description=f"{usuario.mention} ha sido baneado del servidor",
                 color=0x00ff00,
             )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+            await interaction.followup.send(embed=embed, ephemeral=True)
             
         except discord.Forbidden:
-            await interaction.response.send_message(
-                "❌ No tengo permisos para banear a este usuario.",
-                ephemeral=True
-            )
+            await send_ephemeral(interaction, "❌ No tengo permisos para banear a este usuario.")
         except Exception as e:
             print(f"❌ Error en ban: {e}")
-            await interaction.response.send_message(
-                f"❌ Error al banear al usuario: {e}",
-                ephemeral=True
-            )
+            await send_ephemeral(interaction, f"❌ Error al banear al usuario: {e}")
 
     @app_commands.command(name="tempban", description="Banea temporalmente a un usuario del servidor")
+    @require(MODERATE, "❌ No tienes permiso para usar este comando. Solo admins pueden banear miembros.")
+    @instrumented("command", "tempban")
     async def slash_tempban(
         self,
         interaction: discord.Interaction,
@@ -229,41 +433,37 @@ class Moderation(commands.Cog):
         """
         Banea temporalmente a un usuario del servidor.
         
-        Tiempo: número de días (ej: 7, 30, etc)
+        Tiempo: número de días (ej: 7, 30) o duración con unidades (ej: 2h, 3d, 1d12h)
         """
         
-        # Verificar si el usuario tiene rol de admin
-        if not self.has_admin_role(interaction.user):
-            await interaction.response.send_message(
-                "❌ No tienes permiso para usar este comando. Solo admins pueden banear miembros.",
-                ephemeral=True
-            )
-            return
-        
         try:
-            # Validar que el tiempo sea un número
-            try:
-                dias = int(tiempo)
-            except ValueError:
+            # Validar la duración (días o unidades m/h/d/w)
+            duracion = parse_duration(tiempo)
+            if duracion is None:
                 await interaction.response.send_message(
-                    f"❌ El tiempo debe ser un número de días. Recibido: {tiempo}",
+                    f"❌ El tiempo debe ser un número de días o una duración como 2h, 3d o 1d12h. Recibido: {tiempo}",
                     ephemeral=True
                 )
                 return
             
-            if dias <= 0:
+            if duracion <= 0:
                 await interaction.response.send_message(
-                    "❌ El número de días debe ser mayor a 0.",
+                    "❌ La duración debe ser mayor a 0.",
                     ephemeral=True
                 )
                 return
+
+            # Diferir antes de esperar al DM de sanción (hasta DM_SANCTION_WAIT segundos)
+            await interaction.response.defer(ephemeral=True, thinking=True)
+
+            duracion_display = format_duration(duracion)
             
             reason_display = motivo if motivo and motivo.strip() else "No especificado"
             
             # Enviar DM al usuario ANTES de banearlo
             await self.send_sanction_dm(
                 sanctioned_user=usuario,
-                action=f"baneado temporalmente por {dias} día(s)",
+                action=f"baneado temporalmente por {duracion_display}",
                 reason=reason_display,
                 moderator=interaction.user,
             )
@@ -271,13 +471,23 @@ class Moderation(commands.Cog):
             # Banear al usuario
             await interaction.guild.ban(
                 usuario, 
-                reason=f"{reason_display} (Temporal: {dias} día(s))"
+                reason=f"{reason_display} (Temporal: {duracion_display})"
+            )
+
+            # Programar el desbaneo (persistente, sobrevive a reinicios)
+            tempban = await self.tempbans.add(
+                interaction.guild.id, usuario.id, interaction.user.id, reason_display, duracion
+            )
+            self.unban_timers.schedule(tempban.key, tempban.expires_at)
+            self.cases.record(
+                interaction.guild.id, usuario.id, interaction.user.id, "tempban",
+                f"{reason_display} (Temporal: {duracion_display})", expires_at=tempban.expires_at
             )
             
             # Enviar webhook
             await self.send_moderation_webhook(
                 guild=interaction.guild,
-                action=f"baneado temporalmente por {dias} día(s)",
+                action=f"baneado temporalmente por {duracion_display}",
                 sanctioned_user=usuario,
                 reason=reason_display,
                 moderator=interaction.user,
@@ -286,23 +496,175 @@ class Moderation(commands.Cog):
             # Respuesta de éxito
             embed = discord.Embed(
                 title="✅ Usuario Baneado Temporalmente",
-                description=f"{usuario.mention} ha sido baneado por {dias} día(s)",
+                description=f"{usuario.mention} ha sido baneado por {duracion_display}",
                 color=0x00ff00,
             )
-            await interaction.response.send_message(embed=embed, ephemeral=True)
+            await interaction.followup.send(embed=embed, ephemeral=True)
             
         except discord.Forbidden:
+            await send_ephemeral(interaction, "❌ No tengo permisos para banear a este usuario.")
+        except Exception as e:
+            print(f"❌ Error en tempban: {e}")
+            await send_ephemeral(interaction, f"❌ Error al banear temporalmente al usuario: {e}")
+
+
+    @app_commands.command(name="massban", description="Banea en bloque a varios usuarios (respuesta a raids)")
+    @require(MODERATE, "❌ No tienes permiso para usar este comando. Solo admins pueden banear miembros.")
+    @instrumented("command", "massban")
+    async def slash_massban(
+        self,
+        interaction: discord.Interaction,
+        ids: str = None,
+        minutos: int = None,
+        motivo: str = None
+    ):
+        """
+        Banea en bloque usando el endpoint de baneo masivo de Discord.
+
+        ids: lista de IDs o menciones separadas por espacios o comas
+        minutos: banea además a quien se unió en los últimos N minutos
+        """
+        
+        if not ids and not minutos:
             await interaction.response.send_message(
-                "❌ No tengo permisos para banear a este usuario.",
+                "❌ Indica una lista de IDs y/o los minutos de entrada a revisar.",
                 ephemeral=True
             )
+            return
+
+        # Diferir: el baneo masivo puede tardar más de 3 segundos
+        await interaction.response.defer(ephemeral=True, thinking=True)
+
+        try:
+            guild = interaction.guild
+            reason_display = motivo if motivo and motivo.strip() else "No especificado"
+
+            # Reunir los objetivos sin duplicados
+            target_ids = set()
+            if ids:
+                target_ids.update(int(user_id) for user_id in USER_ID_PATTERN.findall(ids))
+            if minutos and minutos > 0:
+                since = discord.utils.utcnow() - timedelta(minutes=minutos)
+                target_ids.update(
+                    member.id for member in guild.members
+                    if member.joined_at and member.joined_at >= since
+                )
+
+            # Nunca banear al propio bot, al moderador ni a otros admins
+            protected = {self.bot.user.id, interaction.user.id}
+            for user_id in list(target_ids):
+                member = guild.get_member(user_id)
+                if user_id in protected or (member and self.has_admin_role(member)):
+                    target_ids.discard(user_id)
+
+            if not target_ids:
+                await interaction.edit_original_response(content="ℹ️ No hay usuarios que banear.")
+                return
+
+            targets = [discord.Object(id=user_id) for user_id in sorted(target_ids)]
+            banned = []
+            failed = []
+
+            # Banear por bloques e informar del progreso en la respuesta diferida
+            for start in range(0, len(targets), MASSBAN_CHUNK_SIZE):
+                chunk = targets[start:start + MASSBAN_CHUNK_SIZE]
+                try:
+                    result = await guild.bulk_ban(chunk, reason=f"{reason_display} (Baneo masivo)")
+                    banned.extend(result.banned)
+                    failed.extend(result.failed)
+                except discord.HTTPException as e:
+                    print(f"❌ Error en un bloque del baneo masivo: {e}")
+                    failed.extend(chunk)
+
+                await interaction.edit_original_response(
+                    content=f"⏳ Baneo masivo en curso: {start + len(chunk)}/{len(targets)} procesados..."
+                )
+
+            # Un caso por usuario, escritos a disco en un solo lote
+            for user in banned:
+                self.cases.record(guild.id, user.id, interaction.user.id, "ban", f"{reason_display} (Baneo masivo)")
+
+            # Un baneo permanente sustituye a cualquier baneo temporal pendiente
+            for user in banned:
+                key = (guild.id, user.id)
+                if self.tempbans.get(key):
+                    self.unban_timers.cancel(key)
+                    await self.tempbans.remove(key)
+
+            # Una sola entrada de log para todo el baneo masivo
+            await self.send_bulk_moderation_webhook(
+                guild=guild,
+                banned=banned,
+                failed=failed,
+                reason=reason_display,
+                moderator=interaction.user,
+            )
+
+            # Respuesta de éxito
+            embed = discord.Embed(
+                title="✅ Baneo Masivo Completado",
+                description=f"**Baneados:** {len(banned)}\n**Fallidos:** {len(failed)}",
+                color=0x00ff00,
+            )
+            await interaction.edit_original_response(content=None, embed=embed)
+
+        except discord.Forbidden:
+            await interaction.edit_original_response(
+                content="❌ No tengo permisos para banear en este servidor."
+            )
         except Exception as e:
-            print(f"❌ Error en tempban: {e}")
+            print(f"❌ Error en massban: {e}")
+            await interaction.edit_original_response(
+                content=f"❌ Error en el baneo masivo: {e}"
+            )
+
+    @app_commands.command(name="historial", description="Muestra las sanciones de un usuario")
+    @require(MODERATE, "❌ No tienes permiso para usar este comando. Solo admins pueden ver el historial.")
+    @instrumented("command", "historial")
+    async def slash_historial(
+        self,
+        interaction: discord.Interaction,
+        usuario: discord.User
+    ):
+        """Historial paginado de sanciones de un usuario"""
+        
+        total = await self.cases.count_for_user(interaction.guild.id, usuario.id)
+        view = CaseHistoryView(self, interaction.user.id, interaction.guild.id, usuario, total)
+        embed = await view.build_embed()
+        await interaction.response.send_message(embed=embed, view=view, ephemeral=True)
+
+    @app_commands.command(name="caso", description="Muestra un caso de moderación por su ID")
+    @require(MODERATE, "❌ No tienes permiso para usar este comando. Solo admins pueden ver casos.")
+    @instrumented("command", "caso")
+    async def slash_caso(
+        self,
+        interaction: discord.Interaction,
+        id: int
+    ):
+        """Muestra un único caso de moderación"""
+        
+        case = await self.cases.get(interaction.guild.id, id)
+        if not case:
             await interaction.response.send_message(
-                f"❌ Error al banear temporalmente al usuario: {e}",
+                f"❌ No existe el caso #{id}.",
                 ephemeral=True
             )
+            return
 
+        moderator = f"<@{case['moderator_id']}>" if case["moderator_id"] else "Desconocido"
+        embed = discord.Embed(
+            title=f"Caso #{case['case_id']} · {ACTION_LABELS.get(case['action'], case['action'])}",
+            description=(
+                f"**Usuario:** <@{case['user_id']}> (`{case['user_id']}`)\n"
+                f"**Sancionador:** {moderator}\n"
+                f"**Motivo:** {case['reason'] or 'No especificado'}\n"
+                f"**Fecha:** <t:{int(case['created_at'])}:f>"
+            ),
+            color=MODERATION_WEBHOOK_COLOR,
+        )
+        if case["expires_at"]:
+            embed.description += f"\n**Expira:** <t:{int(case['expires_at'])}:R>"
+        await interaction.response.send_message(embed=embed, ephemeral=True)
 
 async def setup(bot):
     """Cargar el cog"""
@@ -3,6 +3,8 @@ from discord.ext import commands
 from discord import app_commands
 import json
 import os
+from utils.metrics import instrumented
+from utils.permissions import PRIVATE_SERIES, has_capability
 from config.config import SERIES_CHANNEL_ID, PRO_ROLE_ID, WEBHOOK_COLOR
 
 class SeriesDropdown(discord.ui.Select):
@@ -51,6 +53,7 @@ class SeriesDropdown(discord.ui.Select):
             options=options
         )
     
+    @instrumented("ui", "series_dropdown")
     async def callback(self, interaction: discord.Interaction):
         """Callback cuando se selecciona una serie"""
         
@@ -128,7 +131,7 @@ class SeriesDropdown(discord.ui.Select):
         
         # Verificar si es privado - solo admins pueden seleccionarlo
         if selected_serie.get("privado", False):
-            if not interaction.user.guild_permissions.administrator:
+            if not has_capability(interaction.user, PRIVATE_SERIES):
                 await interaction.response.send_message(
                     "❌ Esta serie es privada y solo los administradores pueden seleccionarla.",
                     ephemeral=True
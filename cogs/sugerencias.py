@@ -1,10 +1,178 @@
+import asyncio
 import discord
 from discord import app_commands
-from discord.ext import commands
-from config.config import WEBHOOK_COLOR
+from discord.ext import commands, tasks
+from utils.metrics import instrumented
+from utils.permissions import APPROVE_SUGGESTION, has_capability
+from utils.dm_outbox import get_dm_outbox
+from utils.database import get_database
+from utils.state import load_json, save_json
+from utils.similarity import SimilarityIndex
+from utils.search import KIND_SUGGESTION, get_search_index
+from utils.suggestion_store import (
+    SuggestionStore,
+    Suggestion,
+    STATUS_PENDING,
+    STATUS_APPROVED,
+    STATUS_REJECTED,
+    STATUS_REVIEW,
+    author_id_from_embed,
+)
+from config.config import (
+    WEBHOOK_COLOR,
+    SUGGESTIONS_BACKFILL_STATE_FILE,
+    SUGGESTIONS_VOTES_FLUSH_INTERVAL,
+    SUGGESTIONS_SIMILARITY_THRESHOLD,
+    SUGGESTIONS_SIMILAR_SHOWN,
+)
 
 SUGERENCIAS_CHANNEL_ID = 1466598331089162278
 
+# Emoji con el que se vota una sugerencia
+VOTE_EMOJI = "⬆️"
+
+# Título de los embeds de sugerencia (para reconocerlos al importar el historial)
+SUGERENCIA_TITLE = "📨 ¡Nueva sugerencia!"
+
+# Mensajes del historial que se importan antes de guardar el progreso
+BACKFILL_PAGE_SIZE = 100
+
+# Versión de la importación: al subirla se repasa el historial completo otra vez
+# (v2: añade los botones de moderación a las sugerencias antiguas)
+BACKFILL_VERSION = 2
+
+
+# Estado al que lleva cada botón de moderación: (estado, etiqueta, emoji, estilo)
+SUGGESTION_ACTIONS = {
+    "approve": (STATUS_APPROVED, "Aprobar", "✅", discord.ButtonStyle.success),
+    "reject": (STATUS_REJECTED, "Rechazar", "❌", discord.ButtonStyle.danger),
+    "review": (STATUS_REVIEW, "En revisión", "🔍", discord.ButtonStyle.secondary),
+}
+
+# Texto y color del embed en cada estado
+STATUS_DISPLAY = {
+    STATUS_PENDING: ("⏳ Pendiente", WEBHOOK_COLOR),
+    STATUS_APPROVED: ("✅ Aprobada", 0x57F287),
+    STATUS_REJECTED: ("❌ Rechazada", 0xED4245),
+    STATUS_REVIEW: ("🔍 En revisión", 0xFEE75C),
+}
+
+
+def get_sugerencias_cog(client) -> "Sugerencias":
+    return client.get_cog("Sugerencias")
+
+
+def suggestion_link(guild_id: int, suggestion) -> str:
+    return f"https://discord.com/channels/{guild_id}/{suggestion.channel_id}/{suggestion.message_id}"
+
+
+def suggestion_snippet(suggestion, length: int = 80) -> str:
+    snippet = suggestion.content.replace("\n", " ")
+    return snippet[:length] + "…" if len(snippet) > length else snippet
+
+
+async def publish_suggestion(client, channel: discord.TextChannel, user: discord.abc.User, text: str) -> discord.Message:
+    """Publica la sugerencia en el canal, la indexa y añade la reacción de voto"""
+    # Crear el embed (webhook) con la sugerencia
+    embed = discord.Embed(
+        title=SUGERENCIA_TITLE,
+        description=text,
+        color=WEBHOOK_COLOR,
+    )
+
+    # Configurar el header del webhook con información del usuario
+    embed.set_author(
+        name=user.display_name,
+        icon_url=user.display_avatar.url,
+    )
+    # El ID del autor queda en el embed por si hay que reconstruir el índice
+    embed.set_footer(text=f"ID: {user.id}")
+
+    # Enviar el embed al canal de sugerencias con los botones de moderación
+    message = await channel.send(embed=embed, view=build_suggestion_view())
+
+    # Indexar el autor de la sugerencia por el ID del mensaje
+    cog = get_sugerencias_cog(client)
+    await cog.store.add(message.id, channel.id, user.id, text)
+    cog.similarity.add(message.id, text)
+    get_search_index().add(KIND_SUGGESTION, message.id, channel.id, text, text)
+
+    # Auto-reaccionar con :arrow_up:
+    await message.add_reaction(VOTE_EMOJI)
+    return message
+
+
+class SimilarSuggestionsView(discord.ui.View):
+    """Aviso de sugerencias parecidas: publicar igualmente o cancelar"""
+
+    def __init__(self, channel: discord.TextChannel, text: str):
+        super().__init__(timeout=300)
+        self.channel = channel
+        self.text = text
+
+    @discord.ui.button(label="Publicar igualmente", style=discord.ButtonStyle.primary)
+    async def publish(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.edit_message(content="⏳ Publicando tu sugerencia...", embed=None, view=None)
+        try:
+            await publish_suggestion(interaction.client, self.channel, interaction.user, self.text)
+            await interaction.edit_original_response(content="✅ ¡Tu sugerencia ha sido enviada exitosamente!")
+        except Exception as e:
+            print(f"❌ Error al publicar la sugerencia: {e}")
+            await interaction.edit_original_response(content="❌ Hubo un error al procesar tu sugerencia.")
+        self.stop()
+
+    @discord.ui.button(label="Cancelar", style=discord.ButtonStyle.secondary)
+    async def cancel(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.edit_message(content="❌ Sugerencia cancelada.", embed=None, view=None)
+        self.stop()
+
+
+def apply_status(embed: discord.Embed, status: str, moderator: discord.abc.User) -> discord.Embed:
+    """Refleja el estado en el propio embed de la sugerencia (color y campo Estado)"""
+    label, color = STATUS_DISPLAY[status]
+    embed.color = color
+    value = f"{label} · por {moderator.mention}"
+    for index, field in enumerate(embed.fields):
+        if field.name == "Estado":
+            embed.set_field_at(index, name="Estado", value=value, inline=False)
+            return embed
+    embed.add_field(name="Estado", value=value, inline=False)
+    return embed
+
+
+class SuggestionButton(
+    discord.ui.DynamicItem[discord.ui.Button],
+    template=r"suggestion:(?P<action>approve|reject|review)",
+):
+    """
+    Botón persistente de moderación de sugerencias.
+
+    Un solo handler registrado sirve a todas las sugerencias: la acción va
+    en el custom_id y la sugerencia es el mensaje que lleva el botón.
+    """
+
+    def __init__(self, action: str):
+        _, label, emoji, style = SUGGESTION_ACTIONS[action]
+        super().__init__(
+            discord.ui.Button(label=label, emoji=emoji, style=style, custom_id=f"suggestion:{action}")
+        )
+        self.action = action
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match["action"])
+
+    @instrumented("ui", "suggestion_button")
+    async def callback(self, interaction: discord.Interaction) -> None:
+        await get_sugerencias_cog(interaction.client).moderate(interaction, self.action)
+
+
+def build_suggestion_view() -> discord.ui.View:
+    view = discord.ui.View(timeout=None)
+    for action in SUGGESTION_ACTIONS:
+        view.add_item(SuggestionButton(action))
+    return view
+
 
 class SugerenciaModal(discord.ui.Modal, title="📨 ¡Nueva sugerencia!"):
     """Modal para que los usuarios envíen sus sugerencias"""
@@ -17,6 +185,7 @@ class SugerenciaModal(discord.ui.Modal, title="📨 ¡Nueva sugerencia!"):
         style=discord.TextStyle.long,
     )
 
+    @instrumented("ui", "sugerencia_modal")
     async def on_submit(self, interaction: discord.Interaction) -> None:
         """Se ejecuta cuando el usuario envía el formulario"""
         try:
@@ -29,24 +198,33 @@ class SugerenciaModal(discord.ui.Modal, title="📨 ¡Nueva sugerencia!"):
                 )
                 return
 
-            # Crear el embed (webhook) con la sugerencia
-            embed = discord.Embed(
-                title="📨 ¡Nueva sugerencia!",
-                description=self.sugerencia.value,
-                color=WEBHOOK_COLOR,
-            )
-
-            # Configurar el header del webhook con información del usuario
-            embed.set_author(
-                name=interaction.user.display_name,
-                icon_url=interaction.user.display_avatar.url,
-            )
-
-            # Enviar el embed al canal de sugerencias
-            message = await sugerencias_channel.send(embed=embed)
+            text = self.sugerencia.value
+            cog = get_sugerencias_cog(interaction.client)
+
+            # Si ya hay ideas parecidas, enseñarlas antes de publicar
+            similar = cog.find_similar(text)
+            if similar:
+                lines = [
+                    f"• [{suggestion_snippet(suggestion)}]({suggestion_link(interaction.guild_id, suggestion)})\n"
+                    f"> {VOTE_EMOJI} {suggestion.votes} · {STATUS_DISPLAY[suggestion.status][0]} · {round(score * 100)}% parecida"
+                    for suggestion, score in similar
+                ]
+                embed = discord.Embed(
+                    title="🔎 Hay sugerencias parecidas",
+                    description=(
+                        "Antes de publicar, mira si tu idea ya está propuesta (puedes votarla con ⬆️):\n\n"
+                        + "\n".join(lines)
+                    ),
+                    color=WEBHOOK_COLOR,
+                )
+                await interaction.response.send_message(
+                    embed=embed,
+                    view=SimilarSuggestionsView(sugerencias_channel, text),
+                    ephemeral=True,
+                )
+                return
 
-            # Auto-reaccionar con :arrow_up:
-            await message.add_reaction("⬆️")
+            await publish_suggestion(interaction.client, sugerencias_channel, interaction.user, text)
 
             # Responder al usuario
             await interaction.response.send_message(
@@ -64,10 +242,176 @@ class SugerenciaModal(discord.ui.Modal, title="📨 ¡Nueva sugerencia!"):
 class Sugerencias(commands.Cog):
     """Cog para manejar el sistema de sugerencias"""
 
+    sugerencias_group = app_commands.Group(name="sugerencias", description="Consultas sobre las sugerencias")
+
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.store = SuggestionStore(get_database())
+        self.similarity = SimilarityIndex(threshold=SUGGESTIONS_SIMILARITY_THRESHOLD)
+        self.backfill_started = False
+
+    async def cog_load(self) -> None:
+        await self.store.setup()
+        # Construir el índice de similitud en un hilo para no bloquear el arranque
+        await asyncio.to_thread(self.build_similarity_index, list(self.store.cache.values()))
+        print(f"✅ {len(self.store.cache)} sugerencia(s) indexada(s)")
+        self.bot.add_dynamic_items(SuggestionButton)
+        self.flush_votes.start()
+
+    async def cog_unload(self) -> None:
+        self.flush_votes.cancel()
+        await self.store.flush_votes()
+
+    def build_similarity_index(self, suggestions: list) -> None:
+        for suggestion in suggestions:
+            self.similarity.add(suggestion.message_id, suggestion.content)
+
+    def index_page(self, page: list) -> None:
+        """Añade una página de sugerencias importadas a los índices de similitud y de búsqueda"""
+        search = get_search_index()
+        for suggestion in page:
+            self.similarity.add(suggestion.message_id, suggestion.content)
+            search.add(KIND_SUGGESTION, suggestion.message_id, suggestion.channel_id, suggestion.content, suggestion.content)
+
+    def find_similar(self, text: str) -> list:
+        """Sugerencias existentes parecidas al texto: [(sugerencia, similitud)]"""
+        return [
+            (self.store.get(message_id), score)
+            for message_id, score in self.similarity.query(text, SUGGESTIONS_SIMILAR_SHOWN)
+            if self.store.get(message_id)
+        ]
+
+    @tasks.loop(seconds=SUGGESTIONS_VOTES_FLUSH_INTERVAL)
+    async def flush_votes(self) -> None:
+        """Persiste por lotes los votos cambiados desde la última escritura"""
+        try:
+            await self.store.flush_votes()
+        except Exception as e:
+            print(f"❌ Error al guardar los votos de las sugerencias: {e}")
+
+    async def reconcile_votes(self, channel: discord.TextChannel) -> None:
+        """
+        Recalcula una vez los votos desde el historial (reacciones hechas con
+        el bot apagado). Se lee página a página solo desde la sugerencia más antigua.
+        """
+        if not self.store.cache:
+            return
+        oldest = min(self.store.cache)
+        updated = 0
+        async for message in channel.history(limit=None, after=discord.Object(id=oldest - 1)):
+            suggestion = self.store.get(message.id)
+            if not suggestion:
+                continue
+            votes = 0
+            for reaction in message.reactions:
+                if str(reaction.emoji) == VOTE_EMOJI:
+                    # La reacción inicial del bot no cuenta como voto
+                    votes = reaction.count - (1 if reaction.me else 0)
+                    break
+            if votes != suggestion.votes:
+                self.store.set_votes(suggestion, votes)
+                updated += 1
+        await self.store.flush_votes()
+        print(f"✅ Votos de sugerencias reconciliados ({updated} actualizada(s))")
+
+    async def count_vote(self, payload: discord.RawReactionActionEvent, delta: int) -> None:
+        if payload.channel_id != SUGERENCIAS_CHANNEL_ID or str(payload.emoji) != VOTE_EMOJI:
+            return
+        if payload.user_id == self.bot.user.id:
+            return
+        suggestion = self.store.get(payload.message_id)
+        if suggestion:
+            self.store.add_vote(suggestion, delta)
+
+    @commands.Cog.listener()
+    @instrumented("listener", "sugerencias.on_raw_reaction_add")
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent) -> None:
+        """Suma un voto (⬆️) a la sugerencia"""
+        await self.count_vote(payload, 1)
+
+    @commands.Cog.listener()
+    @instrumented("listener", "sugerencias.on_raw_reaction_remove")
+    async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent) -> None:
+        """Resta un voto (⬆️) a la sugerencia"""
+        await self.count_vote(payload, -1)
+
+    async def backfill_suggestions(self, channel: discord.TextChannel) -> None:
+        """
+        Importa al índice las sugerencias publicadas antes de que existiera.
+
+        Recorre el historial del canal de la más nueva a la más antigua y
+        guarda tras cada página el último mensaje revisado, así que una
+        importación interrumpida continúa donde se quedó.
+        """
+        state = load_json(SUGGESTIONS_BACKFILL_STATE_FILE, {})
+        if state.get("version") != BACKFILL_VERSION:
+            state = {}
+        if state.get("done"):
+            return
+
+        before = discord.Object(id=state["before"]) if state.get("before") else None
+        page = []
+        imported = 0
+        unresolved = 0
+        last_id = None
+
+        async for message in channel.history(limit=None, before=before):
+            last_id = message.id
+            if (
+                message.author.id == self.bot.user.id
+                and message.embeds
+                and message.embeds[0].title == SUGERENCIA_TITLE
+            ):
+                indexed = self.store.get(message.id) is not None
+                if not indexed:
+                    embed = message.embeds[0]
+                    author_id = author_id_from_embed(embed)
+                    if author_id is None:
+                        unresolved += 1
+                    else:
+                        page.append(Suggestion(
+                            message.id, channel.id, author_id, embed.description or "",
+                            STATUS_PENDING, message.created_at.timestamp(),
+                        ))
+                        indexed = True
+                # Las sugerencias antiguas no tenían botones de moderación
+                if indexed and not message.components:
+                    await message.edit(view=build_suggestion_view())
+
+            if len(page) >= BACKFILL_PAGE_SIZE:
+                await self.store.add_many(page)
+                self.index_page(page)
+                imported += len(page)
+                page = []
+                save_json(SUGGESTIONS_BACKFILL_STATE_FILE, {"version": BACKFILL_VERSION, "before": last_id, "done": False})
+
+        if page:
+            await self.store.add_many(page)
+            self.index_page(page)
+            imported += len(page)
+        save_json(SUGGESTIONS_BACKFILL_STATE_FILE, {"version": BACKFILL_VERSION, "before": last_id, "done": True})
+        print(f"✅ {imported} sugerencia(s) antigua(s) importada(s) al índice ({unresolved} sin autor recuperable)")
 
     @commands.Cog.listener()
+    async def on_ready(self) -> None:
+        """Importa una sola vez las sugerencias antiguas (on_ready se repite en cada reconexión)"""
+        if self.backfill_started:
+            return
+        self.backfill_started = True
+
+        channel = self.bot.get_channel(SUGERENCIAS_CHANNEL_ID)
+        if not channel:
+            print(f"❌ No se pudo encontrar el canal de sugerencias {SUGERENCIAS_CHANNEL_ID}")
+            return
+        try:
+            await self.backfill_suggestions(channel)
+            await self.reconcile_votes(channel)
+        except Exception as e:
+            self.backfill_started = False
+            print(f"❌ Error al importar sugerencias antiguas: {e}")
+
+    @commands.Cog.listener()
+    @instrumented("listener", "sugerencias.on_message")
     async def on_message(self, message: discord.Message) -> None:
         """Listener para eliminar automáticamente mensajes en el canal de sugerencias (excepto del bot)"""
         # Ignorar mensajes del bot
@@ -88,103 +432,88 @@ class Sugerencias(commands.Cog):
             except Exception as e:
                 print(f"❌ Error al eliminar mensaje en sugerencias: {e}")
 
-    @commands.Cog.listener()
-    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent) -> None:
-        """Listener para detectar reacciones en el canal de sugerencias"""
-        # Verificar si la reacción está en el canal de sugerencias
-        if payload.channel_id != SUGERENCIAS_CHANNEL_ID:
+    async def moderate(self, interaction: discord.Interaction, action: str) -> None:
+        """Cambia el estado de la sugerencia del mensaje y edita su embed en el sitio"""
+        if not isinstance(interaction.user, discord.Member) or not has_capability(interaction.user, APPROVE_SUGGESTION):
+            await interaction.response.send_message(
+                "❌ Solo los administradores pueden moderar sugerencias.",
+                ephemeral=True,
+            )
             return
 
-        # Verificar si la reacción es un check mark
-        if payload.emoji.name != "✅":
+        message = interaction.message
+        suggestion = self.store.get(message.id)
+        if not suggestion or not message.embeds:
+            await interaction.response.send_message(
+                "❌ Esta sugerencia no está registrada.",
+                ephemeral=True,
+            )
             return
 
-        # Ignorar reacciones del bot
-        if payload.user_id == self.bot.user.id:
+        status = SUGGESTION_ACTIONS[action][0]
+        if suggestion.status == status:
+            await interaction.response.send_message(
+                f"ℹ️ La sugerencia ya está en estado {STATUS_DISPLAY[status][0]}.",
+                ephemeral=True,
+            )
             return
 
         try:
-            # Obtener el usuario que reaccionó
-            guild = self.bot.get_guild(payload.guild_id)
-            member = guild.get_member(payload.user_id)
-
-            # Verificar que el usuario tiene permisos de administrador
-            if not member or not member.guild_permissions.administrator:
-                return
-
-            # Obtener el canal y el mensaje
-            channel = self.bot.get_channel(payload.channel_id)
-            message = await channel.fetch_message(payload.message_id)
-
-            # Extraer la información de la sugerencia del embed original
-            if not message.embeds:
-                return
-
-            original_embed = message.embeds[0]
-            sugerencia_text = original_embed.description
-            autor_name = original_embed.author.name
-            autor_icon = original_embed.author.icon_url
-
-            # Obtener el usuario original de la sugerencia
-            # Intentamos encontrarlo por el nombre en el servidor
-            original_user = None
-            for member_search in guild.members:
-                if member_search.display_name == autor_name:
-                    original_user = member_search
-                    break
-
-            # Crear el embed de aprobación con color verde claro
-            approval_embed = discord.Embed(
-                title="✅ ¡Sugerencia Aprobada!",
-                description=sugerencia_text,
-                color=0x57F287,  # Verde claro
-            )
-
-            # Configurar el header del webhook
-            approval_embed.set_author(
-                name=autor_name,
-                icon_url=autor_icon,
-            )
-
-            # Agregar mención al usuario original si se encontró
-            mention_text = ""
-            if original_user:
-                mention_text = f"\n\n👤 Sugerencia de {original_user.mention}"
-            else:
-                mention_text = f"\n\n👤 Sugerencia de {autor_name}"
-
-            approval_embed.add_field(
-                name="",
-                value=mention_text,
-                inline=False,
-            )
-
-            # Enviar el embed de aprobación al mismo canal
-            await channel.send(embed=approval_embed)
-
-            # Enviar mensaje privado al usuario original si existe
-            if original_user:
-                try:
+            # El embed llega con la interacción: no hace falta volver a pedir el mensaje
+            embed = apply_status(message.embeds[0], status, interaction.user)
+            await interaction.response.edit_message(embed=embed)
+            await self.store.set_status(suggestion, status)
+
+            # Avisar al autor por DM cuando se aprueba
+            if status == STATUS_APPROVED:
+                author = interaction.guild.get_member(suggestion.author_id)
+                if author is None:
+                    try:
+                        author = await self.bot.fetch_user(suggestion.author_id)
+                    except discord.NotFound:
+                        author = None
+                if author:
                     dm_embed = discord.Embed(
                         title="✅ ¡Tu sugerencia fue aprobada!",
-                        description=f"Un administrador ha aprobado tu sugerencia:\n\n> {sugerencia_text}",
+                        description=f"Un administrador ha aprobado tu sugerencia:\n\n> {suggestion.content}",
                         color=0x57F287,  # Verde claro
                     )
-                    await original_user.send(embed=dm_embed)
-                except discord.Forbidden:
-                    print(f"⚠️ No se pudo enviar DM a {original_user} - tiene los DMs desactivados")
-                except Exception as e:
-                    print(f"❌ Error al enviar DM al usuario: {e}")
+                    get_dm_outbox().send(author, label="sugerencia aprobada", embed=dm_embed)
 
         except Exception as e:
-            print(f"❌ Error procesando reacción de aprobación: {e}")
+            print(f"❌ Error moderando la sugerencia {message.id}: {e}")
 
     @app_commands.command(name="sugerencia", description="Envía una sugerencia al servidor")
+    @instrumented("command", "sugerencia")
     async def sugerencia(self, interaction: discord.Interaction) -> None:
         """Comando slash para abrir el modal de sugerencias"""
         # Mostrar el modal al usuario
         await interaction.response.send_modal(SugerenciaModal())
 
+    @sugerencias_group.command(name="top", description="Muestra las sugerencias más votadas")
+    @instrumented("command", "sugerencias_top")
+    async def sugerencias_top(self, interaction: discord.Interaction, cantidad: app_commands.Range[int, 1, 25] = 10) -> None:
+        """Ranking de sugerencias por votos (desde memoria, sin leer mensajes)"""
+        top = self.store.top(cantidad)
+        if not top:
+            await interaction.response.send_message("ℹ️ Todavía no hay sugerencias.", ephemeral=True)
+            return
+
+        lines = []
+        for position, suggestion in enumerate(top, start=1):
+            lines.append(
+                f"**{position}.** {VOTE_EMOJI} **{suggestion.votes}** · "
+                f"[{suggestion_snippet(suggestion)}]({suggestion_link(interaction.guild_id, suggestion)})\n"
+                f"> <@{suggestion.author_id}> · {STATUS_DISPLAY[suggestion.status][0]}"
+            )
+
+        embed = discord.Embed(
+            title="🏆 Sugerencias más votadas",
+            description="\n".join(lines),
+            color=WEBHOOK_COLOR,
+        )
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
 
 async def setup(bot: commands.Bot) -> None:
     """Cargar el cog de sugerencias"""
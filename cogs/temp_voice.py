@@ -1,5 +1,6 @@
 import discord
 from discord.ext import commands
+from utils.metrics import instrumented
 from config.config import TEMP_VOICE_TRIGGER_CHANNEL_ID, TEMP_VOICE_CATEGORY_ID
 
 
@@ -18,6 +19,7 @@ class EditChannelNameModal(discord.ui.Modal, title="✏️ Editar nombre del can
         max_length=100,
     )
     
+    @instrumented("ui", "edit_channel_name_modal")
     async def on_submit(self, interaction: discord.Interaction) -> None:
         try:
             guild = self.bot.get_guild(self.guild_id)
@@ -66,6 +68,7 @@ class EditChannelLimitModal(discord.ui.Modal, title="👥 Establecer límite de
         max_length=2,
     )
     
+    @instrumented("ui", "edit_channel_limit_modal")
     async def on_submit(self, interaction: discord.Interaction) -> None:
         try:
             # Validar que sea un número
@@ -124,16 +127,19 @@ class ChannelConfigView(discord.ui.View):
         self.channel_locked = {}
     
     @discord.ui.button(label="✏️ Editar nombre", style=discord.ButtonStyle.primary)
+    @instrumented("ui", "channel_config.edit_name")
     async def edit_name(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Botón para editar el nombre del canal"""
         await interaction.response.send_modal(EditChannelNameModal(self.bot, self.guild_id))
     
     @discord.ui.button(label="👥 Límite de usuarios", style=discord.ButtonStyle.primary)
+    @instrumented("ui", "channel_config.edit_limit")
     async def edit_limit(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Botón para establecer el límite de usuarios"""
         await interaction.response.send_modal(EditChannelLimitModal(self.bot, self.guild_id))
     
     @discord.ui.button(label="🔒 Bloquear/Desbloquear", style=discord.ButtonStyle.danger)
+    @instrumented("ui", "channel_config.toggle_lock")
     async def toggle_lock(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Botón para bloquear/desbloquear el canal"""
         try:
@@ -222,6 +228,7 @@ class TempVoice(commands.Cog):
         self.temp_channels = {}
 
     @commands.Cog.listener()
+    @instrumented("listener", "on_voice_state_update")
     async def on_voice_state_update(self, member, before, after):
         """
         Se ejecuta cuando un usuario cambia de estado de voz
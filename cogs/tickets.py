@@ -1,9 +1,168 @@
 import discord
 from discord import app_commands
-from discord.ext import commands
+from discord.ext import commands, tasks
 from typing import Optional
 import asyncio
-from config.config import WEBHOOK_COLOR, TICKETS_CHANNEL_ID, TICKETS_CATEGORY_ID, TICKETS_ADMIN_CHANNEL_ID
+import re
+import time
+from collections import deque
+from utils.metrics import instrumented
+from utils.state import load_json, save_json
+from utils.database import get_database
+from utils.ticket_store import TicketStore, STATUS_OPEN, STATUS_CLOSED, build_topic, format_topic
+from utils.rating_store import RatingStore
+from utils.scheduler import DeadlineScheduler
+from utils.transcripts import TranscriptArchiver
+from utils.permissions import CLOSE_TICKET, MANAGE_TICKET, has_capability
+from utils.dm_outbox import get_dm_outbox
+from utils.search import KIND_TICKET, get_search_index
+from config.config import (
+    WEBHOOK_COLOR,
+    TICKETS_CHANNEL_ID,
+    TICKETS_CATEGORY_ID,
+    TICKETS_ADMIN_CHANNEL_ID,
+    TICKETS_ADMIN_ROLE_ID,
+    TICKETS_PANEL_STATE_FILE,
+    TICKETS_RATING_TIMEOUT,
+    TICKETS_IDLE_WARNING_AFTER,
+    TICKETS_IDLE_CLOSE_AFTER,
+    TICKETS_ACTIVITY_FLUSH_INTERVAL,
+)
+
+# custom_id del botón del panel (vista persistente registrada con bot.add_view)
+CREATE_TICKET_CUSTOM_ID = "create_ticket_button"
+
+# custom_id del desplegable de opciones de cada ticket (vista persistente)
+TICKET_SELECT_CUSTOM_ID = "ticket_select"
+
+# Discord solo permite 2 cambios de topic cada 10 minutos por canal
+TOPIC_EDITS_PER_WINDOW = 2
+TOPIC_EDIT_WINDOW = 600
+
+# Mensajes recientes en los que buscar el panel si no hay ID guardado
+PANEL_SEARCH_LIMIT = 50
+
+
+class TicketIndex:
+    """Índice en memoria de los tickets abiertos: creator_id <-> channel_id"""
+
+    def __init__(self):
+        self.by_creator = {}
+        self.by_channel = {}
+        # Usuarios con un ticket en creación (evita duplicados por doble clic)
+        self.pending = set()
+
+    def get(self, creator_id: int) -> Optional[int]:
+        return self.by_creator.get(creator_id)
+
+    def add(self, creator_id: int, channel_id: int) -> None:
+        self.by_creator[creator_id] = channel_id
+        self.by_channel[channel_id] = creator_id
+
+    def remove_channel(self, channel_id: int) -> Optional[int]:
+        """Elimina el ticket del canal indicado y devuelve su creator_id"""
+        creator_id = self.by_channel.pop(channel_id, None)
+        if creator_id is not None and self.by_creator.get(creator_id) == channel_id:
+            del self.by_creator[creator_id]
+        return creator_id
+
+    def rebuild(self, tickets) -> None:
+        """Reconstruye el índice a partir de los tickets abiertos del almacén"""
+        self.by_creator.clear()
+        self.by_channel.clear()
+        for ticket in tickets:
+            self.add(ticket.creator_id, ticket.ticket_id)
+
+
+class TopicMirror:
+    """
+    Refleja el estado del ticket en el topic del canal de forma diferida.
+
+    El topic es solo cosmético: se escribe en segundo plano, respetando el
+    límite de Discord y escribiendo únicamente el último valor pendiente.
+    """
+
+    def __init__(self):
+        self.pending = {}
+        self.tasks = {}
+        self.history = {}
+
+    def schedule(self, channel: discord.TextChannel, topic: str) -> None:
+        self.pending[channel.id] = (channel, topic)
+        if channel.id not in self.tasks:
+            self.tasks[channel.id] = asyncio.create_task(self._flush(channel.id))
+
+    def discard(self, channel_id: int) -> None:
+        """Cancela las escrituras pendientes de un canal (por ejemplo, al borrarlo)"""
+        self.pending.pop(channel_id, None)
+        self.history.pop(channel_id, None)
+        task = self.tasks.pop(channel_id, None)
+        if task:
+            task.cancel()
+
+    async def _flush(self, channel_id: int) -> None:
+        try:
+            history = self.history.setdefault(channel_id, deque(maxlen=TOPIC_EDITS_PER_WINDOW))
+            while channel_id in self.pending:
+                # Esperar a que haya hueco en la ventana del límite de Discord
+                if len(history) == TOPIC_EDITS_PER_WINDOW:
+                    wait = history[0] + TOPIC_EDIT_WINDOW - time.monotonic()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+
+                channel, topic = self.pending.pop(channel_id)
+                if channel.topic == topic:
+                    continue
+                try:
+                    await channel.edit(topic=topic)
+                except discord.NotFound:
+                    break
+                except Exception as e:
+                    print(f"❌ Error al actualizar el topic del ticket {channel_id}: {e}")
+                history.append(time.monotonic())
+        finally:
+            self.tasks.pop(channel_id, None)
+
+
+def get_tickets_cog(client: discord.Client) -> "Tickets":
+    """Devuelve el cog de tickets cargado (índice, almacén y topics)"""
+    return client.get_cog("Tickets")
+
+
+def build_ticket_overwrites(
+    guild: discord.Guild, creator: Optional[discord.Member], closed: bool = False
+) -> dict:
+    """
+    Permisos completos de un canal de ticket, para aplicarlos en una sola llamada.
+
+    - @everyone no puede ver el canal
+    - El creador puede verlo y escribir (solo leer si está cerrado)
+    - El rol de admin puede ver y escribir
+    """
+    overwrites = {
+        guild.default_role: discord.PermissionOverwrite(view_channel=False, send_messages=False),
+    }
+    if creator:
+        overwrites[creator] = discord.PermissionOverwrite(
+            view_channel=True, send_messages=not closed, read_message_history=True
+        )
+    admin_role = guild.get_role(TICKETS_ADMIN_ROLE_ID)
+    if admin_role:
+        overwrites[admin_role] = discord.PermissionOverwrite(
+            view_channel=True, send_messages=True, read_message_history=True
+        )
+    return overwrites
+
+
+async def send_interaction_error(interaction: discord.Interaction, message: str) -> None:
+    """Envía un mensaje de error tanto si la interacción ya se respondió como si no"""
+    try:
+        if interaction.response.is_done():
+            await interaction.followup.send(message, ephemeral=True)
+        else:
+            await interaction.response.send_message(message, ephemeral=True)
+    except Exception as e:
+        print(f"❌ Error al enviar el mensaje de error: {e}")
 
 
 class TicketModal(discord.ui.Modal, title="🔐 Cerrar Ticket"):
@@ -17,6 +176,7 @@ class TicketModal(discord.ui.Modal, title="🔐 Cerrar Ticket"):
         style=discord.TextStyle.long,
     )
 
+    @instrumented("ui", "ticket_modal")
     async def on_submit(self, interaction: discord.Interaction) -> None:
         """Se ejecuta cuando el usuario envía el formulario de cierre"""
         try:
@@ -29,162 +189,39 @@ class TicketModal(discord.ui.Modal, title="🔐 Cerrar Ticket"):
                 )
                 return
 
-            # Crear el embed con el cierre del ticket
-            embed = discord.Embed(
-                title="🔐 Ticket Cerrado",
-                description=f"**Motivo del cierre:**\n{self.reason.value}",
-                color=0xff6b6b,
-            )
-            embed.set_author(
-                name=interaction.user.display_name,
-                icon_url=interaction.user.display_avatar.url,
-            )
+            # Responder de inmediato; el resto del trabajo va por followup
+            await interaction.response.defer(ephemeral=True, thinking=True)
 
-            # Enviar el embed al canal del ticket
-            await ticket_channel.send(embed=embed)
-
-            # Actualizar el topic del canal para mostrar que está cerrado
-            ticket_id = ticket_channel.id
-            creator_id = None
-            claimed_info = ""
-            
-            # Extraer información del topic actual
-            if ticket_channel.topic:
-                import re
-                creator_match = re.search(r'creator_id: (\d+)', ticket_channel.topic)
-                claimed_match = re.search(r'Reclamado: :white_check_mark: Sí \((.*?)\)', ticket_channel.topic)
-                
-                if creator_match:
-                    creator_id = int(creator_match.group(1))
-                if claimed_match:
-                    claimed_info = f" ({claimed_match.group(1)})"
-            
-            # Actualizar el topic con estado cerrado
-            new_topic = f"ID del ticket: {ticket_id} | Estado: :red_square: Cerrado | Reclamado: :white_check_mark: Sí{claimed_info} | creator_id: {creator_id}"
-            await ticket_channel.edit(topic=new_topic)
-
-            # Bloquear el canal cuando está cerrado
-            # - El creador puede VER pero NO escribir
-            # - Los admins pueden ver y escribir
-            # - @everyone está bloqueado
-            admin_role_id = 1466585864929804339
-            admin_role = ticket_channel.guild.get_role(admin_role_id)
-            
-            # Bloquear a @everyone
-            await ticket_channel.set_permissions(
-                ticket_channel.guild.default_role, view_channel=False, send_messages=False
+            # Cerrar el ticket (mismo camino que el cierre automático por inactividad)
+            await get_tickets_cog(interaction.client).close_ticket(
+                ticket_channel, interaction.user, self.reason.value
             )
-            
-            # El creador puede ver pero NO escribir
-            if creator_id:
-                try:
-                    creator_member = await ticket_channel.guild.fetch_member(creator_id)
-                    await ticket_channel.set_permissions(
-                        creator_member,
-                        view_channel=True,
-                        send_messages=False,
-                        read_message_history=True
-                    )
-                except:
-                    pass
-            
-            # Los admins pueden ver y escribir
-            if admin_role:
-                await ticket_channel.set_permissions(
-                    admin_role,
-                    view_channel=True,
-                    send_messages=True,
-                    read_message_history=True
-                )
 
             # Responder al usuario
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 "✅ El ticket ha sido cerrado exitosamente.",
                 ephemeral=True,
             )
 
-            # Enviar mensaje privado al creador del ticket solicitando valoración
-            if creator_id:
-                try:
-                    creator = await interaction.client.fetch_user(creator_id)
-                    
-                    # Crear el embed del mensaje privado
-                    rating_embed = discord.Embed(
-                        title="¡Muchas gracias por tu ticket!",
-                        description="Esperemos que su duda o problema haya sido resuelta, agradecemos que nos valore con una nota. ¿Que nota nos pones del 0 al 10 por tu asistencia? \n\nEscribe tu valoración en este mismo chat. Si no deseas valorar, escribe 'cancelar'.",
-                        color=WEBHOOK_COLOR,
-                    )
-                    
-                    # Enviar el mensaje
-                    await creator.send(embed=rating_embed)
-                    
-                    # Esperar la respuesta del usuario
-                    def check(msg):
-                        return msg.author.id == creator_id and isinstance(msg.channel, discord.DMChannel)
-                    
-                    try:
-                        response = await interaction.client.wait_for('message', check=check, timeout=300.0)  # 5 minutos
-                        
-                        # Validar la respuesta
-                        if response.content.lower() == "cancelar":
-                            await creator.send("❌ Valoración cancelada. ¡Gracias de todas formas!")
-                            return
-                        
-                        try:
-                            rating = int(response.content)
-                            if 0 <= rating <= 10:
-                                # Enviar la valoración al canal de administración
-                                admin_channel = interaction.client.get_channel(TICKETS_ADMIN_CHANNEL_ID)
-                                if admin_channel:
-                                    admin_embed = discord.Embed(
-                                        title="⭐ Nueva Valoración de Ticket",
-                                        color=WEBHOOK_COLOR,
-                                    )
-                                    admin_embed.add_field(name="Usuario", value=creator.mention, inline=True)
-                                    admin_embed.add_field(name="ID Ticket", value=ticket_id, inline=True)
-                                    admin_embed.add_field(name="Valoración", value=f"⭐ {rating}/10", inline=True)
-                                    admin_embed.add_field(name="Atendido por", value=interaction.user.mention, inline=True)
-                                    
-                                    await admin_channel.send(embed=admin_embed)
-                                
-                                # Confirmar al usuario
-                                await creator.send(f"✅ ¡Gracias! Tu valoración de {rating}/10 ha sido registrada.")
-                            else:
-                                await creator.send("❌ Por favor, introduce un número entre 0 y 10.")
-                        except ValueError:
-                            await creator.send("❌ Por favor, introduce un número entre 0 y 10 o escribe 'cancelar'.")
-                    
-                    except asyncio.TimeoutError:
-                        await creator.send("⏱️ Se agotó el tiempo para responder. Valoración cancelada.")
-                
-                except discord.NotFound:
-                    print(f"❌ No se pudo encontrar el usuario con ID {creator_id}")
-                except Exception as e:
-                    print(f"❌ Error al enviar mensaje privado: {e}")
-        
         except Exception as e:
             print(f"❌ Error al cerrar el ticket: {e}")
-            await interaction.response.send_message(
-                "❌ Hubo un error al cerrar el ticket.",
-                ephemeral=True,
-            )
-        except Exception as e:
-            print(f"❌ Error al cerrar el ticket: {e}")
-            await interaction.response.send_message(
-                "❌ Hubo un error al cerrar el ticket.",
-                ephemeral=True,
-            )
+            await send_interaction_error(interaction, "❌ Hubo un error al cerrar el ticket.")
 
 
 class TicketSelectView(discord.ui.View):
-    """Vista con el desplegable para manejar opciones del ticket"""
+    """
+    Vista persistente con el desplegable para manejar opciones del ticket.
+
+    El estado del ticket se lee del almacén por el ID del canal, así que una
+    sola vista registrada sirve para todos los tickets, también tras reinicios.
+    """
 
-    def __init__(self, bot: commands.Bot, creator_id: int):
-        super().__init__()
+    def __init__(self, bot: commands.Bot):
+        super().__init__(timeout=None)
         self.bot = bot
-        self.creator_id = creator_id
 
     @discord.ui.select(
+        custom_id=TICKET_SELECT_CUSTOM_ID,
         placeholder="🎫 Selecciona una opción...",
         min_values=1,
         max_values=1,
@@ -209,41 +246,34 @@ class TicketSelectView(discord.ui.View):
             ),
         ],
     )
+    @instrumented("ui", "ticket_select")
     async def ticket_select(
         self, interaction: discord.Interaction, select: discord.ui.Select
     ) -> None:
         """Maneja la selección del desplegable"""
         selected_value = select.values[0]
-
-        # Verificar si es admin
-        is_admin = (
-            interaction.user.guild_permissions.administrator
-            or interaction.user.id == self.creator_id
-        )
+        tickets_cog = get_tickets_cog(self.bot)
 
         if selected_value == "claim_ticket":
-            if not interaction.user.guild_permissions.administrator:
+            if not has_capability(interaction.user, MANAGE_TICKET):
                 await interaction.response.send_message(
                     "❌ Solo los admins pueden reclamar tickets.",
                     ephemeral=True,
                 )
                 return
 
-            # Actualizar el topic del canal
             channel = interaction.channel
-            ticket_id = channel.id
-            creator_id = None
-            
-            # Extraer el creator_id del topic actual
-            if channel.topic:
-                import re
-                match = re.search(r'creator_id: (\d+)', channel.topic)
-                if match:
-                    creator_id = match.group(1)
-            
-            # Actualizar el topic con la información de reclamado
-            new_topic = f"ID del ticket: {ticket_id} | Estado: :white_check_mark: Abierto | Reclamado: :white_check_mark: Sí ({interaction.user.mention}) | creator_id: {creator_id}"
-            await channel.edit(topic=new_topic)
+            ticket = tickets_cog.store.get(channel.id)
+            if not ticket:
+                await interaction.response.send_message(
+                    "❌ Este canal no es un ticket registrado.",
+                    ephemeral=True,
+                )
+                return
+
+            # Guardar quién reclamó el ticket; el topic se actualiza en segundo plano
+            await tickets_cog.store.claim(ticket, interaction.user.id)
+            tickets_cog.topics.schedule(channel, format_topic(ticket))
 
             await interaction.response.send_message(
                 f"✅ {interaction.user.mention} ha reclamado el ticket.",
@@ -252,11 +282,7 @@ class TicketSelectView(discord.ui.View):
 
         elif selected_value == "close_ticket":
             # Solo admins con el rol específico pueden cerrar tickets
-            admin_role_id = 1466585864929804339
-            admin_role = interaction.guild.get_role(admin_role_id)
-            has_admin_role = admin_role and admin_role in interaction.user.roles
-            
-            if not has_admin_role:
+            if not has_capability(interaction.user, CLOSE_TICKET):
                 await interaction.response.send_message(
                     "❌ Solo los admins pueden cerrar tickets.",
                     ephemeral=True,
@@ -268,7 +294,7 @@ class TicketSelectView(discord.ui.View):
             await interaction.response.send_modal(modal)
 
         elif selected_value == "delete_ticket":
-            if not interaction.user.guild_permissions.administrator:
+            if not has_capability(interaction.user, MANAGE_TICKET):
                 await interaction.response.send_message(
                     "❌ Solo los admins pueden borrar tickets.",
                     ephemeral=True,
@@ -281,10 +307,22 @@ class TicketSelectView(discord.ui.View):
                 ephemeral=False,
             )
 
-            # Esperar 5 segundos y luego eliminar el canal
-            import asyncio
-
+            # Archivar el historial mientras corre la cuenta atrás; el canal
+            # solo se elimina cuando el transcript está en disco
+            archive_job = tickets_cog.transcripts.archive_channel(interaction.channel)
             await asyncio.sleep(5)
+            try:
+                await archive_job
+            except Exception:
+                await interaction.followup.send(
+                    "❌ No se pudo archivar el ticket, así que no se ha eliminado.",
+                )
+                return
+
+            tickets_cog.index.remove_channel(interaction.channel.id)
+            tickets_cog.topics.discard(interaction.channel.id)
+            tickets_cog.idle_timers.cancel(interaction.channel.id)
+            await tickets_cog.store.mark_deleted(interaction.channel.id)
             try:
                 await interaction.channel.delete(reason="Ticket eliminado por admin")
             except Exception as e:
@@ -292,81 +330,76 @@ class TicketSelectView(discord.ui.View):
 
 
 class TicketCreateView(discord.ui.View):
-    """Vista con el botón para crear un ticket"""
+    """Vista persistente con el botón para crear un ticket"""
 
     def __init__(self, bot: commands.Bot):
-        super().__init__()
+        super().__init__(timeout=None)
         self.bot = bot
 
     @discord.ui.button(
         label="Crear Ticket",
         style=discord.ButtonStyle.primary,
         emoji="✉️",
-        custom_id="create_ticket_button",
+        custom_id=CREATE_TICKET_CUSTOM_ID,
     )
+    @instrumented("ui", "create_ticket")
     async def create_ticket(
         self, interaction: discord.Interaction, button: discord.ui.Button
     ) -> None:
         """Crea un nuevo ticket para el usuario"""
         try:
+            # Diferir de inmediato: crear el canal puede tardar más de 3 segundos
+            await interaction.response.defer(ephemeral=True, thinking=True)
+
             user = interaction.user
             guild = interaction.guild
+            tickets_cog = get_tickets_cog(self.bot)
+            index = tickets_cog.index
+
+            # Verificar si el usuario ya tiene un ticket abierto (búsqueda O(1) en el índice)
+            existing_id = index.get(user.id)
+            existing = guild.get_channel(existing_id) if existing_id else None
+            if existing:
+                await interaction.followup.send(
+                    f"❌ Ya tienes un ticket abierto: {existing.mention}",
+                    ephemeral=True,
+                )
+                return
+            if existing_id:
+                # El canal ya no existe: limpiar la entrada obsoleta
+                index.remove_channel(existing_id)
 
-            # Verificar si el usuario ya tiene un ticket abierto
-            # Buscar un canal con el creator_id del usuario en el topic
-            for channel in guild.text_channels:
-                if channel.topic and f"creator_id: {user.id}" in channel.topic:
-                    await interaction.response.send_message(
-                        f"❌ Ya tienes un ticket abierto: {channel.mention}",
-                        ephemeral=True,
-                    )
-                    return
+            if user.id in index.pending:
+                await interaction.followup.send(
+                    "❌ Tu ticket se está creando, espera un momento.",
+                    ephemeral=True,
+                )
+                return
 
             # Obtener la categoría de tickets
             category = guild.get_channel(TICKETS_CATEGORY_ID)
             if not category:
-                await interaction.response.send_message(
+                await interaction.followup.send(
                     "❌ No se pudo encontrar la categoría de tickets.",
                     ephemeral=True,
                 )
                 return
 
-            # Crear el canal del ticket
-            ticket_info = f"ID del ticket: (waiting) | Estado: :white_check_mark: Abierto | Reclamado: :x: No | creator_id: {user.id}"
-            ticket_channel = await guild.create_text_channel(
-                name=f"✉️┃{user.name}",
-                category=category,
-                topic=ticket_info,
-                reason=f"Ticket creado por {user.display_name}",
-            )
-            
-            # Actualizar el topic con el ID real del canal
-            ticket_id = ticket_channel.id
-            ticket_info = f"ID del ticket: {ticket_id} | Estado: :white_check_mark: Abierto | Reclamado: :x: No | creator_id: {user.id}"
-            await ticket_channel.edit(topic=ticket_info)
-
-            # Establecer los permisos del canal
-            admin_role_id = 1466585864929804339
-            admin_role = guild.get_role(admin_role_id)
-            
-            # Bloquear @everyone para ver el ticket
-            await ticket_channel.set_permissions(
-                guild.default_role, view_channel=False, send_messages=False
-            )
-
-            # Permitir acceso al creador del ticket (ver y escribir)
-            await ticket_channel.set_permissions(
-                user, view_channel=True, send_messages=True, read_message_history=True
-            )
-
-            # Permitir acceso al rol de admin (ver y escribir)
-            if admin_role:
-                await ticket_channel.set_permissions(
-                    admin_role,
-                    view_channel=True,
-                    send_messages=True,
-                    read_message_history=True,
+            # Crear el canal del ticket con los permisos y el topic definitivo ya aplicados
+            # (una sola llamada, sin ventana en la que @everyone pueda ver el canal)
+            ticket_info = build_topic(user.id)
+            index.pending.add(user.id)
+            try:
+                ticket_channel = await guild.create_text_channel(
+                    name=f"✉️┃{user.name}",
+                    category=category,
+                    topic=ticket_info,
+                    overwrites=build_ticket_overwrites(guild, user),
+                    reason=f"Ticket creado por {user.display_name}",
                 )
+            finally:
+                index.pending.discard(user.id)
+            index.add(user.id, ticket_channel.id)
 
             # Enviar un mensaje mencionando al usuario
             welcome_embed = discord.Embed(
@@ -378,22 +411,23 @@ class TicketCreateView(discord.ui.View):
                 name=guild.name, icon_url=guild.icon.url if guild.icon else None
             )
 
-            # Enviar el mensaje con la vista del desplegable
-            view = TicketSelectView(self.bot, user.id)
-            await ticket_channel.send(embed=welcome_embed, view=view)
+            # Registrar el ticket y enviar el mensaje con el desplegable en paralelo
+            ticket, _ = await asyncio.gather(
+                tickets_cog.store.create(ticket_channel.id, guild.id, user.id),
+                ticket_channel.send(embed=welcome_embed, view=TicketSelectView(self.bot)),
+            )
+
+            tickets_cog.schedule_idle_check(ticket)
 
             # Responder al usuario que creó el ticket
-            await interaction.response.send_message(
+            await interaction.followup.send(
                 f"✅ Tu ticket ha sido creado exitosamente: {ticket_channel.mention}",
                 ephemeral=True,
             )
 
         except Exception as e:
             print(f"❌ Error al crear el ticket: {e}")
-            await interaction.response.send_message(
-                "❌ Hubo un error al crear el ticket.",
-                ephemeral=True,
-            )
+            await send_interaction_error(interaction, "❌ Hubo un error al crear el ticket.")
 
 
 class Tickets(commands.Cog):
@@ -401,10 +435,338 @@ class Tickets(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.panel_ready = False
+        self.index = TicketIndex()
+        self.store = TicketStore(get_database())
+        self.topics = TopicMirror()
+        self.legacy_imported = False
+        self.ratings = RatingStore(get_database())
+        self.rating_timers = DeadlineScheduler(self.expire_rating, name="valoraciones")
+        self.transcripts = TranscriptArchiver()
+        self.idle_timers = DeadlineScheduler(self.on_idle_deadline, name="inactividad de tickets")
+
+    async def cog_load(self) -> None:
+        """Carga el almacén y registra las vistas persistentes para que funcionen tras reinicios"""
+        await self.store.setup()
+        self.index.rebuild(self.store.open_tickets())
+        self.bot.add_view(TicketCreateView(self.bot))
+        self.bot.add_view(TicketSelectView(self.bot))
+
+        # Restaurar las valoraciones pendientes con un único temporizador
+        await self.ratings.setup()
+        for rating in self.ratings.pending.values():
+            self.rating_timers.schedule(rating.user_id, rating.expires_at)
+        self.rating_timers.start()
+
+        # Reconstruir las fechas límite de inactividad desde el estado persistido
+        # (los tickets ya avisados van directos a su cierre, sin repetir el aviso)
+        for ticket in self.store.open_tickets():
+            self.schedule_idle_check(ticket)
+        self.idle_timers.start()
+        self.flush_activity.start()
+
+    async def cog_unload(self) -> None:
+        self.rating_timers.stop()
+        self.idle_timers.stop()
+        self.flush_activity.cancel()
+        await self.store.flush_activity()
+
+    async def close_ticket(self, channel: discord.TextChannel, closed_by: discord.abc.User, reason: str) -> None:
+        """
+        Cierra un ticket: embed de cierre, estado en el almacén, permisos de
+        solo lectura para el creador, transcript y solicitud de valoración.
+        """
+        # Crear el embed con el cierre del ticket
+        embed = discord.Embed(
+            title="🔐 Ticket Cerrado",
+            description=f"**Motivo del cierre:**\n{reason}",
+            color=0xff6b6b,
+        )
+        embed.set_author(
+            name=closed_by.display_name,
+            icon_url=closed_by.display_avatar.url,
+        )
+
+        # Marcar el ticket como cerrado en el almacén
+        ticket_id = channel.id
+        ticket = self.store.get(ticket_id)
+        creator_id = ticket.creator_id if ticket else None
+        if ticket:
+            await self.store.close(ticket, closed_by.id, reason)
+            # El topic solo refleja el estado, se actualiza en segundo plano
+            self.topics.schedule(channel, format_topic(ticket))
+
+        # Un ticket cerrado ya no bloquea la creación de uno nuevo ni caduca por inactividad
+        self.index.remove_channel(ticket_id)
+        self.idle_timers.cancel(ticket_id)
+
+        # Bloquear el canal cuando está cerrado, con un único edit de permisos
+        # - El creador puede VER pero NO escribir
+        # - Los admins pueden ver y escribir
+        # - @everyone está bloqueado
+        guild = channel.guild
+        creator_member = guild.get_member(creator_id) if creator_id else None
+        overwrites = build_ticket_overwrites(guild, creator_member, closed=True)
+
+        # Enviar el embed y aplicar los permisos en paralelo
+        await asyncio.gather(
+            channel.send(embed=embed),
+            channel.edit(overwrites=overwrites),
+        )
+
+        # Archivar el historial en segundo plano
+        self.transcripts.archive_channel(channel)
+
+        # Solicitar la valoración por DM; la respuesta la procesa el listener del cog
+        if creator_id:
+            asyncio.create_task(self.request_rating(creator_id, ticket_id, closed_by.id))
+
+    @staticmethod
+    def idle_close_at(ticket) -> float:
+        """Cierre por inactividad de un ticket ya avisado: siempre con el plazo completo tras el aviso"""
+        return max(
+            ticket.last_activity_at + TICKETS_IDLE_CLOSE_AFTER,
+            ticket.idle_warned_at + TICKETS_IDLE_CLOSE_AFTER - TICKETS_IDLE_WARNING_AFTER,
+        )
+
+    def schedule_idle_check(self, ticket) -> None:
+        """Programa el siguiente paso de inactividad de un ticket abierto (aviso o cierre)"""
+        if ticket.idle_warned_at is not None:
+            self.idle_timers.schedule(ticket.ticket_id, self.idle_close_at(ticket))
+        else:
+            self.idle_timers.schedule(ticket.ticket_id, ticket.last_activity_at + TICKETS_IDLE_WARNING_AFTER)
+
+    async def on_idle_deadline(self, ticket_id: int) -> None:
+        """Callback del temporizador de inactividad: primero avisa y después cierra"""
+        # Las fechas vencidas durante una caída saltan al arrancar, antes de tener la caché de canales
+        await self.bot.wait_until_ready()
+
+        ticket = self.store.get(ticket_id)
+        channel = self.bot.get_channel(ticket_id)
+        if not ticket or not ticket.is_open or not channel:
+            return
+
+        if ticket.idle_warned_at is None:
+            last_activity = ticket.last_activity_at
+            hours = round((TICKETS_IDLE_CLOSE_AFTER - TICKETS_IDLE_WARNING_AFTER) / 3600)
+            await channel.send(
+                f"⏰ <@{ticket.creator_id}>, este ticket lleva tiempo sin actividad. "
+                f"Se cerrará automáticamente en {hours} hora(s) si nadie escribe."
+            )
+            # Si alguien escribió mientras se enviaba el aviso, ya tiene su nuevo temporizador
+            if ticket.last_activity_at != last_activity:
+                return
+            # El aviso queda en el almacén: tras un reinicio se programa el cierre, no otro aviso
+            await self.store.mark_idle_warned(ticket)
+            self.idle_timers.schedule(ticket_id, self.idle_close_at(ticket))
+            return
+
+        await self.close_ticket(channel, self.bot.user, "Cerrado automáticamente por inactividad")
+        print(f"✅ Ticket {ticket_id} cerrado por inactividad")
+
+    @tasks.loop(seconds=TICKETS_ACTIVITY_FLUSH_INTERVAL)
+    async def flush_activity(self) -> None:
+        """Persiste en bloque la última actividad de los tickets (write-behind)"""
+        try:
+            await self.store.flush_activity()
+        except Exception as e:
+            print(f"❌ Error al guardar la actividad de los tickets: {e}")
+
+    async def get_or_fetch_user(self, user_id: int) -> discord.User:
+        return self.bot.get_user(user_id) or await self.bot.fetch_user(user_id)
+
+    async def request_rating(self, creator_id: int, ticket_id: int, staff_id: int) -> None:
+        """Envía el DM de valoración y registra la valoración pendiente"""
+        try:
+            creator = await self.get_or_fetch_user(creator_id)
+
+            # Crear el embed del mensaje privado
+            rating_embed = discord.Embed(
+                title="¡Muchas gracias por tu ticket!",
+                description="Esperemos que su duda o problema haya sido resuelta, agradecemos que nos valore con una nota. ¿Que nota nos pones del 0 al 10 por tu asistencia? \n\nEscribe tu valoración en este mismo chat. Si no deseas valorar, escribe 'cancelar'.",
+                color=WEBHOOK_COLOR,
+            )
+
+            # Enviar el mensaje desde la cola de DMs; sin DM no hay valoración que esperar
+            if not await get_dm_outbox().send(creator, label="valoración", embed=rating_embed):
+                return
+
+            rating = await self.ratings.add(creator_id, ticket_id, staff_id, TICKETS_RATING_TIMEOUT)
+            self.rating_timers.schedule(creator_id, rating.expires_at)
+
+        except discord.NotFound:
+            print(f"❌ No se pudo encontrar el usuario con ID {creator_id}")
+        except Exception as e:
+            print(f"❌ Error al enviar mensaje privado: {e}")
+
+    async def expire_rating(self, user_id: int) -> None:
+        """Callback del temporizador: la valoración no se respondió a tiempo"""
+        await self.bot.wait_until_ready()
+
+        if not await self.ratings.remove(user_id):
+            return
+        try:
+            user = await self.get_or_fetch_user(user_id)
+            get_dm_outbox().send(user, label="valoración expirada", content="⏱️ Se agotó el tiempo para responder. Valoración cancelada.")
+        except Exception as e:
+            print(f"❌ Error al avisar de la valoración expirada: {e}")
+
+    @commands.Cog.listener()
+    @instrumented("listener", "tickets.on_message")
+    async def on_message(self, message: discord.Message) -> None:
+        """
+        Registra la actividad de los tickets y hace de único dispatcher de
+        respuestas de valoración (busca la valoración pendiente por user_id).
+        """
+        if message.author.bot:
+            return
+
+        if message.guild is not None:
+            ticket = self.store.get(message.channel.id)
+            if ticket and message.content:
+                # Los mensajes del ticket se suman a su documento en el índice de /buscar
+                get_search_index().add(
+                    KIND_TICKET, ticket.ticket_id, message.channel.id, message.content, message.channel.name
+                )
+            # Actividad en un ticket abierto: reiniciar su temporizador de inactividad
+            if ticket and ticket.is_open:
+                self.store.touch(ticket)
+                self.schedule_idle_check(ticket)
+            return
+
+        pending = self.ratings.get(message.author.id)
+        if not pending:
+            return
+
+        if pending.expired:
+            self.rating_timers.cancel(pending.user_id)
+            await self.expire_rating(pending.user_id)
+            return
+
+        try:
+            # Validar la respuesta
+            if message.content.strip().lower() == "cancelar":
+                self.rating_timers.cancel(pending.user_id)
+                await self.ratings.remove(pending.user_id)
+                await message.channel.send("❌ Valoración cancelada. ¡Gracias de todas formas!")
+                return
+
+            try:
+                rating = int(message.content)
+            except ValueError:
+                await message.channel.send("❌ Por favor, introduce un número entre 0 y 10 o escribe 'cancelar'.")
+                return
+
+            if not 0 <= rating <= 10:
+                await message.channel.send("❌ Por favor, introduce un número entre 0 y 10.")
+                return
+
+            self.rating_timers.cancel(pending.user_id)
+            await self.ratings.remove(pending.user_id)
+            await self.store.set_rating(pending.ticket_id, rating)
+
+            # Enviar la valoración al canal de administración
+            admin_channel = self.bot.get_channel(TICKETS_ADMIN_CHANNEL_ID)
+            if admin_channel:
+                admin_embed = discord.Embed(
+                    title="⭐ Nueva Valoración de Ticket",
+                    color=WEBHOOK_COLOR,
+                )
+                admin_embed.add_field(name="Usuario", value=message.author.mention, inline=True)
+                admin_embed.add_field(name="ID Ticket", value=pending.ticket_id, inline=True)
+                admin_embed.add_field(name="Valoración", value=f"⭐ {rating}/10", inline=True)
+                admin_embed.add_field(name="Atendido por", value=f"<@{pending.staff_id}>", inline=True)
+
+                await admin_channel.send(embed=admin_embed)
+
+            # Confirmar al usuario
+            await message.channel.send(f"✅ ¡Gracias! Tu valoración de {rating}/10 ha sido registrada.")
+
+        except Exception as e:
+            print(f"❌ Error al procesar la valoración: {e}")
+
+    async def import_legacy_tickets(self, category: discord.CategoryChannel) -> None:
+        """Importa al almacén los tickets creados antes de que existiera (leyendo su topic)"""
+        imported = 0
+        for channel in category.text_channels:
+            if not channel.topic or self.store.get(channel.id):
+                continue
+            creator_match = re.search(r'creator_id: (\d+)', channel.topic)
+            if not creator_match:
+                continue
+            claimed_match = re.search(r'Reclamado: :white_check_mark: Sí \(<@!?(\d+)>\)', channel.topic)
+            status = STATUS_CLOSED if ":red_square: Cerrado" in channel.topic else STATUS_OPEN
+            ticket = await self.store.create(
+                channel.id,
+                channel.guild.id,
+                int(creator_match.group(1)),
+                claimed_by=int(claimed_match.group(1)) if claimed_match else None,
+                status=status,
+            )
+            if ticket.is_open:
+                self.index.add(ticket.creator_id, ticket.ticket_id)
+                self.schedule_idle_check(ticket)
+            imported += 1
+        if imported:
+            print(f"✅ {imported} ticket(s) antiguos importados al almacén")
+
+    def build_panel_embed(self) -> discord.Embed:
+        """Embed del panel con el botón de crear ticket"""
+        return discord.Embed(
+            title="✉️ ¿Necesitas ayuda?",
+            description="En este canal podrás abrir un ticket para hablar directamente con el staff de DorrD, quienes te ayudarán con los problemas o dudas que tengas.",
+            color=WEBHOOK_COLOR,
+        )
+
+    def is_panel_message(self, message: discord.Message) -> bool:
+        """Comprueba si el mensaje es el panel de tickets enviado por el bot"""
+        if message.author.id != self.bot.user.id:
+            return False
+        return any(
+            getattr(child, "custom_id", None) == CREATE_TICKET_CUSTOM_ID
+            for row in message.components
+            for child in getattr(row, "children", [])
+        )
+
+    async def find_panel_message(self, channel: discord.TextChannel) -> Optional[discord.Message]:
+        """Busca el panel existente: primero por el ID guardado y luego en los mensajes recientes"""
+        state = load_json(TICKETS_PANEL_STATE_FILE, default={})
+        message_id = state.get("message_id")
+
+        if message_id:
+            try:
+                return await channel.fetch_message(message_id)
+            except discord.NotFound:
+                pass
+
+        async for message in channel.history(limit=PANEL_SEARCH_LIMIT):
+            if self.is_panel_message(message):
+                return message
+        return None
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel: discord.abc.GuildChannel) -> None:
+        """Quita del índice los tickets cuyo canal se borró (también a mano)"""
+        self.index.remove_channel(channel.id)
+        if self.store.get(channel.id):
+            self.topics.discard(channel.id)
+            self.idle_timers.cancel(channel.id)
+            await self.store.mark_deleted(channel.id)
 
     @commands.Cog.listener()
     async def on_ready(self):
-        """Se ejecuta cuando el bot está listo"""
+        """Se ejecuta cuando el bot está listo (solo publica el panel la primera vez)"""
+        # Importar una sola vez los tickets que solo existen como topic (sin llamadas REST)
+        category = self.bot.get_channel(TICKETS_CATEGORY_ID)
+        if not self.legacy_imported and isinstance(category, discord.CategoryChannel):
+            await self.import_legacy_tickets(category)
+            self.legacy_imported = True
+            print(f"✅ Índice de tickets: {len(self.index.by_creator)} ticket(s) abierto(s)")
+
+        # on_ready se repite en cada reconexión del gateway
+        if self.panel_ready:
+            return
+
         print("✅ Cog de Tickets cargado")
         
         # Obtener el canal de tickets
@@ -413,33 +775,28 @@ class Tickets(commands.Cog):
         if not channel:
             print(f"❌ Canal de tickets {TICKETS_CHANNEL_ID} no encontrado")
             return
-        
-        # Limpiar todos los mensajes del canal
-        try:
-            async for message in channel.history(limit=None):
-                await message.delete()
-            print(f"✅ Canal {TICKETS_CHANNEL_ID} limpiado")
-        except discord.Forbidden:
-            print(f"❌ No tengo permisos para eliminar mensajes en el canal {TICKETS_CHANNEL_ID}")
-        except Exception as e:
-            print(f"❌ Error limpiando el canal: {e}")
-        
-        # Crear y enviar el embed con el botón de crear ticket
-        embed = discord.Embed(
-            title="✉️ ¿Necesitas ayuda?",
-            description="En este canal podrás abrir un ticket para hablar directamente con el staff de DorrD, quienes te ayudarán con los problemas o dudas que tengas.",
-            color=WEBHOOK_COLOR,
-        )
-        
+
+        embed = self.build_panel_embed()
         view = TicketCreateView(self.bot)
-        
+
         try:
-            await channel.send(embed=embed, view=view)
-            print(f"✅ Sistema de tickets enviado al canal {TICKETS_CHANNEL_ID}")
+            # Reutilizar el panel existente si lo encontramos
+            message = await self.find_panel_message(channel)
+            if message:
+                await message.edit(embed=embed, view=view)
+                print(f"✅ Panel de tickets reutilizado en el canal {TICKETS_CHANNEL_ID}")
+            else:
+                # Limpiar el canal con borrado masivo y publicar un panel nuevo
+                await channel.purge(limit=None)
+                message = await channel.send(embed=embed, view=view)
+                print(f"✅ Sistema de tickets enviado al canal {TICKETS_CHANNEL_ID}")
+
+            save_json(TICKETS_PANEL_STATE_FILE, {"message_id": message.id})
+            self.panel_ready = True
         except discord.Forbidden:
-            print(f"❌ No tengo permisos para enviar mensajes en el canal {TICKETS_CHANNEL_ID}")
+            print(f"❌ No tengo permisos para gestionar mensajes en el canal {TICKETS_CHANNEL_ID}")
         except Exception as e:
-            print(f"❌ Error al enviar el sistema de tickets: {e}")
+            print(f"❌ Error al preparar el sistema de tickets: {e}")
 
 
 async def setup(bot: commands.Bot) -> None:
@@ -45,4 +45,138 @@ MODERATION_WEBHOOK_COLOR = 0xFF6B6B
 SERIES_CHANNEL_ID = 1466824978266591323
 
 # ID del rol PRO
-PRO_ROLE_ID = 1466829169454485617
\ No newline at end of file
+PRO_ROLE_ID = 1466829169454485617
+
+# Servidor HTTP de salud (healthchecks de Render)
+HTTP_HOST = "0.0.0.0"
+HTTP_PORT = int(os.getenv("PORT", 8080))
+
+# Latencia máxima del websocket (en segundos) para considerar el bot listo
+READY_MAX_LATENCY = 2.0
+
+# Archivo donde se guarda el hash del último árbol de comandos sincronizado
+COMMAND_SYNC_STATE_FILE = "data/command_sync.json"
+
+# Archivo donde se guarda el ID del mensaje del panel de tickets
+TICKETS_PANEL_STATE_FILE = "data/tickets_panel.json"
+
+# Base de datos SQLite local (tickets, sanciones, sugerencias...)
+DATABASE_PATH = "data/dorrdbot.db"
+
+# Tiempo (en segundos) que tiene el usuario para valorar un ticket cerrado
+TICKETS_RATING_TIMEOUT = 300
+
+# Carpeta de transcripciones de tickets y máximo de archivados simultáneos
+TRANSCRIPTS_DIR = "data/transcripts"
+TRANSCRIPTS_MAX_CONCURRENCY = 2
+
+# Inactividad de tickets (en segundos): aviso y cierre automático
+TICKETS_IDLE_WARNING_AFTER = 48 * 3600
+TICKETS_IDLE_CLOSE_AFTER = 72 * 3600
+
+# Cada cuánto se guarda en disco la última actividad de los tickets (en segundos)
+TICKETS_ACTIVITY_FLUSH_INTERVAL = 60
+
+# IDs de roles de admin (moderación)
+ADMIN_ROLE_IDS = [
+    1466585692791378113,
+    1466585864929804339,
+    1466787362712588309,
+]
+
+# ID del rol de admin con acceso a los tickets
+TICKETS_ADMIN_ROLE_ID = 1466585864929804339
+
+# Roles que otorgan cada capacidad (ver utils/permissions.py)
+CAPABILITY_ROLE_IDS = {
+    "moderate": ADMIN_ROLE_IDS,
+    "close_ticket": [TICKETS_ADMIN_ROLE_ID],
+}
+
+# Capacidades que otorga el permiso de Administrador del servidor
+CAPABILITY_ADMINISTRATOR = ["manage_ticket", "approve_suggestion", "private_series"]
+
+# Anti-flood: ventana deslizante (en segundos) y máximos permitidos dentro de ella
+FLOOD_WINDOW = 8
+FLOOD_MAX_MESSAGES = 7
+FLOOD_MAX_MENTIONS = 10
+FLOOD_MAX_LINKS = 5
+
+# Duración (en segundos) del aislamiento que aplica el anti-flood
+FLOOD_TIMEOUT = 600
+
+# Límites de memoria del anti-flood: usuarios vigilados y segundos de inactividad antes de olvidarlos
+FLOOD_MAX_TRACKED_USERS = 5000
+FLOOD_IDLE_TTL = 60
+
+# Anti-duplicados: el mismo texto desde N cuentas o en N canales dentro de la ventana (en segundos)
+DUPLICATE_WINDOW = 30
+DUPLICATE_MAX_ACCOUNTS = 3
+DUPLICATE_MAX_CHANNELS = 3
+
+# Límites del anti-duplicados: longitud mínima del texto y huellas guardadas en memoria
+DUPLICATE_MIN_LENGTH = 20
+DUPLICATE_MAX_ENTRIES = 5000
+
+# Comparar también textos casi idénticos (SimHash). Solo se calcula para los mensajes
+# que comparten casi todas sus palabras más largas con uno reciente, así que cabe en
+# el presupuesto del automod (ver scripts/bench_automod.py); con False solo se
+# detectan las copias exactas
+DUPLICATE_FUZZY = True
+
+# Espera (en segundos) para agrupar copias antes de borrarlas en bloque
+DUPLICATE_DELETE_DELAY = 1.5
+
+# Anti-raid por entradas: ráfaga admitida y ritmo sostenido (entradas por minuto)
+JOIN_RATE_BURST = 10
+JOIN_RATE_PER_MINUTE = 20
+
+# Segundos sin desbordar el ritmo antes de levantar el bloqueo, y cada cuánto se comprueba
+LOCKDOWN_CALM_PERIOD = 300
+LOCKDOWN_CHECK_INTERVAL = 15
+
+# Nivel de verificación del servidor durante el bloqueo (low, medium, high, highest)
+LOCKDOWN_VERIFICATION_LEVEL = "high"
+
+# Bienvenidas agrupadas: si entran más de THRESHOLD miembros en WINDOW segundos,
+# se acumulan durante la ventana y se publican en un solo mensaje
+WELCOME_BATCH_WINDOW = 5
+WELCOME_BATCH_THRESHOLD = 3
+WELCOME_BATCH_MAX_EMBEDS = 10
+WELCOME_BATCH_MENTIONS_PER_EMBED = 50
+
+# Cola de DMs: workers, tamaño máximo, reintentos ante 429/5xx y canales privados nuevos por segundo
+DM_OUTBOX_WORKERS = 4
+DM_OUTBOX_MAX_QUEUE = 1000
+DM_OUTBOX_MAX_RETRIES = 3
+DM_OUTBOX_OPEN_RATE = 2
+
+# Tiempo (en segundos) que se recuerda a un usuario con los DMs cerrados
+DM_OUTBOX_CLOSED_TTL = 6 * 3600
+
+# Espera máxima (en segundos) del DM de sanción antes de aplicar la expulsión o el baneo
+DM_SANCTION_WAIT = 2
+
+# Reconciliación del rol de bienvenida al arrancar: progreso guardado, asignaciones simultáneas y tamaño de lote
+WELCOME_RECONCILE_STATE_FILE = "data/welcome_reconcile.json"
+WELCOME_RECONCILE_WORKERS = 4
+WELCOME_RECONCILE_BATCH = 50
+
+# Progreso de la importación de sugerencias antiguas al índice de autores
+SUGGESTIONS_BACKFILL_STATE_FILE = "data/suggestions_backfill.json"
+
+# Cada cuánto se guardan en disco los votos de las sugerencias (en segundos)
+SUGGESTIONS_VOTES_FLUSH_INTERVAL = 60
+
+# Sugerencias parecidas: similitud mínima (0-1) para avisar antes de publicar y cuántas se muestran
+SUGGESTIONS_SIMILARITY_THRESHOLD = 0.4
+SUGGESTIONS_SIMILAR_SHOWN = 3
+
+# Índice de búsqueda (/buscar): archivo comprimido, registros del diario antes de reescribirlo y guardado periódico (en segundos)
+SEARCH_INDEX_FILE = "data/search_index.json.gz"
+SEARCH_COMPACT_AFTER = 500
+SEARCH_FLUSH_INTERVAL = 60
+
+# Reintentos de un desbaneo temporal fallido: espera inicial y máxima (en segundos, se duplica en cada intento)
+TEMPBAN_RETRY_BASE_DELAY = 60
+TEMPBAN_RETRY_MAX_DELAY = 3600
@@ -0,0 +1,42 @@
+import traceback
+import discord
+from discord import app_commands
+from utils.permissions import MissingCapability, invalidate_member, invalidate_guild
+
+
+async def setup_permission_events(bot):
+    """Configura la invalidación de la caché de capacidades y el aviso de permisos"""
+
+    async def on_member_update(before: discord.Member, after: discord.Member):
+        """Los roles del miembro cambiaron: recalcular sus capacidades"""
+        if before.roles != after.roles:
+            invalidate_member(after.guild.id, after.id)
+
+    async def on_member_remove(member: discord.Member):
+        invalidate_member(member.guild.id, member.id)
+
+    async def on_guild_role_update(before: discord.Role, after: discord.Role):
+        """Cambiaron los permisos de un rol: afecta a todos los miembros del servidor"""
+        if before.permissions != after.permissions:
+            invalidate_guild(after.guild.id)
+
+    async def on_guild_role_delete(role: discord.Role):
+        invalidate_guild(role.guild.id)
+
+    bot.add_listener(on_member_update)
+    bot.add_listener(on_member_remove)
+    bot.add_listener(on_guild_role_update)
+    bot.add_listener(on_guild_role_delete)
+
+    @bot.tree.error
+    async def on_app_command_error(interaction: discord.Interaction, error: app_commands.AppCommandError):
+        """Responde a los checks de capacidad fallidos con su mensaje y registra el resto de errores"""
+        if isinstance(error, MissingCapability):
+            if interaction.response.is_done():
+                await interaction.followup.send(error.message, ephemeral=True)
+            else:
+                await interaction.response.send_message(error.message, ephemeral=True)
+            return
+        print(f"❌ Error en el comando {interaction.command.name if interaction.command else '?'}: {error}")
+        # Este handler sustituye al de discord.py: conservar el traceback completo
+        traceback.print_exception(type(error), error, error.__traceback__)
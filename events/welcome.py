@@ -1,68 +1,286 @@
+import asyncio
 import discord
+from collections import deque
 from discord.ext import commands
-from config.config import WELCOME_CHANNEL_ID, WEBHOOK_COLOR, WELCOME_ROLE_ID, INFO_CHANNEL_ID
+from utils.metrics import instrumented, REGISTRY
+from utils.join_guard import JoinRateMonitor
+from utils.welcome_dispatcher import WelcomeDispatcher
+from utils.dm_outbox import get_dm_outbox
+from utils.state import load_json, save_json
+from config.config import (
+    WELCOME_CHANNEL_ID,
+    WEBHOOK_COLOR,
+    WELCOME_ROLE_ID,
+    INFO_CHANNEL_ID,
+    MODERATION_LOG_CHANNEL_ID,
+    MODERATION_WEBHOOK_COLOR,
+    JOIN_RATE_BURST,
+    JOIN_RATE_PER_MINUTE,
+    LOCKDOWN_CALM_PERIOD,
+    LOCKDOWN_CHECK_INTERVAL,
+    LOCKDOWN_VERIFICATION_LEVEL,
+    WELCOME_BATCH_WINDOW,
+    WELCOME_BATCH_THRESHOLD,
+    WELCOME_BATCH_MAX_EMBEDS,
+    WELCOME_BATCH_MENTIONS_PER_EMBED,
+    WELCOME_RECONCILE_STATE_FILE,
+    WELCOME_RECONCILE_WORKERS,
+    WELCOME_RECONCILE_BATCH,
+)
+
+
+def build_welcome_embed(member: discord.Member) -> discord.Embed:
+    """Embed de bienvenida individual"""
+    embed = discord.Embed(
+        title="¡Bienvenido a DorrD Club! 💜",
+        description=f"¡Tenemos un nuevo miembro, es {member.mention}!\n\nEs un placer conocerte por aqui y entrar al servidor oficial de **DorrD**. Estamos encantados de que unas al club.\n\nSi tu eres {member.name}, recibirás un mensaje privado para ayudarte.",
+        color=WEBHOOK_COLOR
+    )
+
+    # Pie de página
+    embed.set_thumbnail(url=member.avatar.url if member.avatar else member.default_avatar.url)
+    embed.set_footer(
+        text=f"{member.guild.name}",
+        icon_url=member.guild.icon.url if member.guild.icon else None
+    )
+    return embed
+
+
+def build_welcome_summary(members: list, total: int) -> discord.Embed:
+    """Embed de bienvenida conjunta con la lista de menciones (picos de entradas)"""
+    guild = members[0].guild
+    embed = discord.Embed(
+        title="¡Bienvenidos a DorrD Club! 💜",
+        description=f"¡Tenemos {total} nuevos miembros!\n\n" + " ".join(member.mention for member in members),
+        color=WEBHOOK_COLOR
+    )
+    embed.set_footer(
+        text=f"{guild.name}",
+        icon_url=guild.icon.url if guild.icon else None
+    )
+    return embed
 
 
 async def setup_welcome_event(bot):
     """Configura el evento de bienvenida cuando un miembro se une al servidor"""
-    
-    @bot.event
-    async def on_member_join(member):
-        """Se ejecuta cuando un nuevo miembro se une al servidor"""
+
+    monitor = JoinRateMonitor(JOIN_RATE_BURST, JOIN_RATE_PER_MINUTE, LOCKDOWN_CALM_PERIOD)
+    # Miembros que entraron durante el bloqueo y esperan su rol: {guild_id: deque(member_id)}
+    role_queues = {}
+    # Nivel de verificación previo al bloqueo, para restaurarlo después
+    previous_verification = {}
+    welcomes = WelcomeDispatcher(
+        get_channel=lambda: bot.get_channel(WELCOME_CHANNEL_ID),
+        build_embed=build_welcome_embed,
+        build_summary=build_welcome_summary,
+        window=WELCOME_BATCH_WINDOW,
+        threshold=WELCOME_BATCH_THRESHOLD,
+        max_embeds=WELCOME_BATCH_MAX_EMBEDS,
+        mentions_per_embed=WELCOME_BATCH_MENTIONS_PER_EMBED,
+    )
+
+    async def send_lockdown_log(guild: discord.Guild, title: str, description: str):
+        """Avisa en el canal de moderación de los cambios del modo bloqueo"""
         try:
-            # Obtener el canal de bienvenida
-            channel = bot.get_channel(WELCOME_CHANNEL_ID)
-            
-            if channel is None:
-                print(f"❌ No se pudo encontrar el canal con ID: {WELCOME_CHANNEL_ID}")
+            channel = guild.get_channel(MODERATION_LOG_CHANNEL_ID)
+            if not channel:
+                print(f"❌ No se encontró el canal de moderación {MODERATION_LOG_CHANNEL_ID}")
                 return
-            
-            # Asignar el rol automáticamente
+            embed = discord.Embed(title=title, description=description, color=MODERATION_WEBHOOK_COLOR)
+            await channel.send(embed=embed)
+        except Exception as e:
+            print(f"❌ Error al avisar del modo bloqueo: {e}")
+
+    async def enter_lockdown(guild: discord.Guild):
+        """Pausa las bienvenidas, sube el nivel de verificación y vigila el fin de la oleada"""
+        REGISTRY.inc("dorrdbot_join_lockdowns_total", "Veces que se activó el modo bloqueo por entradas")
+        print(f"🚨 Oleada de entradas en {guild.name}: modo bloqueo activado")
+
+        level = discord.VerificationLevel[LOCKDOWN_VERIFICATION_LEVEL]
+        verification_note = f"Nivel de verificación: **{guild.verification_level.name}**"
+        if guild.verification_level.value < level.value:
+            try:
+                previous_verification[guild.id] = guild.verification_level
+                await guild.edit(verification_level=level, reason="Modo bloqueo: oleada de entradas")
+                verification_note = f"Nivel de verificación subido a **{level.name}**"
+            except discord.HTTPException as e:
+                previous_verification.pop(guild.id, None)
+                print(f"❌ No se pudo subir el nivel de verificación: {e}")
+
+        await send_lockdown_log(
+            guild,
+            "🚨 Modo bloqueo activado",
+            (
+                f"Se superó el ritmo de entradas permitido ({JOIN_RATE_BURST} de golpe o {JOIN_RATE_PER_MINUTE}/min).\n"
+                f"Bienvenidas pausadas y roles en cola.\n{verification_note}"
+            ),
+        )
+
+        # Esperar a que el ritmo se normalice para levantar el bloqueo
+        while not monitor.should_resume(guild.id):
+            await asyncio.sleep(LOCKDOWN_CHECK_INTERVAL)
+        await exit_lockdown(guild)
+
+    async def exit_lockdown(guild: discord.Guild):
+        """Restaura la verificación y asigna el rol a los miembros que entraron durante el bloqueo"""
+        monitor.end_lockdown(guild.id)
+        print(f"✅ Fin del modo bloqueo en {guild.name}")
+
+        previous = previous_verification.pop(guild.id, None)
+        if previous is not None:
+            try:
+                await guild.edit(verification_level=previous, reason="Fin del modo bloqueo")
+            except discord.HTTPException as e:
+                print(f"❌ No se pudo restaurar el nivel de verificación: {e}")
+
+        queue = role_queues.pop(guild.id, deque())
+        role = guild.get_role(WELCOME_ROLE_ID)
+        assigned = 0
+        while queue and role:
+            member = guild.get_member(queue.popleft())
+            # Puede que haya salido del servidor (o que lo haya expulsado la moderación)
+            if not member or role in member.roles:
+                continue
             try:
-                role = member.guild.get_role(WELCOME_ROLE_ID)
-                if role:
-                    await member.add_roles(role)
-                    print(f"✅ Rol asignado a {member.name}")
-                else:
-                    print(f"❌ No se pudo encontrar el rol con ID: {WELCOME_ROLE_ID}")
+                await member.add_roles(role, reason="Rol de bienvenida pendiente del modo bloqueo")
+                assigned += 1
             except Exception as e:
-                print(f"❌ Error al asignar rol: {e}")
+                print(f"❌ Error al asignar rol pendiente a {member.name}: {e}")
+
+        await send_lockdown_log(
+            guild,
+            "✅ Modo bloqueo desactivado",
+            f"El ritmo de entradas se ha normalizado.\nRoles asignados desde la cola: **{assigned}**",
+        )
+
+    @bot.event
+    @instrumented("listener", "on_member_join")
+    async def on_member_join(member):
+        """Se ejecuta cuando un nuevo miembro se une al servidor"""
+        if monitor.record_join(member.guild.id):
+            asyncio.create_task(enter_lockdown(member.guild))
+
+        # Durante el bloqueo no se dan bienvenidas: el rol se asigna al terminar
+        if monitor.in_lockdown(member.guild.id):
+            role_queues.setdefault(member.guild.id, deque()).append(member.id)
+            return
+
+        # Rol, bienvenida y DM son independientes: se lanzan a la vez y el fallo de uno no frena a los demás
+        await asyncio.gather(
+            assign_welcome_role(member),
+            announce_welcome(member),
+            send_welcome_dm(member),
+        )
+
+    async def assign_welcome_role(member: discord.Member):
+        """Asigna el rol de bienvenida al nuevo miembro"""
+        try:
+            role = member.guild.get_role(WELCOME_ROLE_ID)
+            if role:
+                await member.add_roles(role)
+                print(f"✅ Rol asignado a {member.name}")
+            else:
+                print(f"❌ No se pudo encontrar el rol con ID: {WELCOME_ROLE_ID}")
+        except Exception as e:
+            print(f"❌ Error al asignar rol: {e}")
+
+    async def announce_welcome(member: discord.Member):
+        """Publica la bienvenida (se agrupa con otras si hay un pico de entradas)"""
+        try:
+            await welcomes.announce(member)
+        except Exception as e:
+            print(f"❌ Error al enviar mensaje de bienvenida: {e}")
+
+    async def send_welcome_dm(member: discord.Member):
+        """Encola el mensaje privado de bienvenida en la cola de DMs"""
+        try:
+            info_channel = bot.get_channel(INFO_CHANNEL_ID)
+            channel_mention = f"<#{INFO_CHANNEL_ID}>" if info_channel else f"canal de información"
             
-            # Crear el embed con el mensaje de bienvenida
-            embed = discord.Embed(
-                title="¡Bienvenido a DorrD Club! 💜",
-                description=f"¡Tenemos un nuevo miembro, es {member.mention}!\n\nEs un placer conocerte por aqui y entrar al servidor oficial de **DorrD**. Estamos encantados de que unas al club.\n\nSi tu eres {member.name}, recibirás un mensaje privado para ayudarte.",
+            dm_embed = discord.Embed(
+                title="¡Bienvenido a DorrD Club! 👋",
+                description=f"Hola {member.name},\n\nEs un placer darte la bienvenida oficial a **DorrD Club**. Nos alegra mucho que te hayas unido a nosotros.\n\nPor favor, asegúrate de leer el canal {channel_mention} para enterarte de las normas y toda la información importante del servidor.\n\n¡Que disfrutes tu estancia aquí! 💜",
                 color=WEBHOOK_COLOR
             )
             
-            # Pie de página
-            embed.set_thumbnail(url=member.avatar.url if member.avatar else member.default_avatar.url)
-            embed.set_footer(
-                text=f"{member.guild.name}",
-                icon_url=member.guild.icon.url if member.guild.icon else None
-            )
+            dm_embed.set_footer(text="DorrD Club")
             
-            # Enviar el embed al canal de bienvenida
-            await channel.send(embed=embed)
-            print(f"✅ Mensaje de bienvenida enviado a {member.name}")
-            
-            # Enviar mensaje privado al usuario
+            get_dm_outbox().send(member, label="bienvenida", embed=dm_embed)
+        except Exception as e:
+            print(f"⚠️ No se pudo enviar mensaje privado a {member.name}: {e}")
+
+    async def reconcile_welcome_roles(guild: discord.Guild):
+        """
+        Asigna el rol de bienvenida a quien entró mientras el bot estaba apagado.
+
+        Recorre la caché de miembros por orden de ID en lotes; tras cada lote
+        guarda el último ID procesado, así que si el bot se reinicia a mitad
+        la siguiente pasada continúa desde ahí.
+        """
+        role = guild.get_role(WELCOME_ROLE_ID)
+        if not role:
+            print(f"❌ No se pudo encontrar el rol con ID: {WELCOME_ROLE_ID}")
+            return
+        if not guild.chunked:
+            await guild.chunk()
+
+        state = load_json(WELCOME_RECONCILE_STATE_FILE, {})
+        cursor = state.get(str(guild.id), 0)
+        # Los bots se quedan fuera: su rol lo gestiona la administración
+        pending = sorted(
+            (member for member in guild.members
+             if member.id > cursor and not member.bot and role not in member.roles),
+            key=lambda member: member.id,
+        )
+        if not pending:
+            save_json(WELCOME_RECONCILE_STATE_FILE, {**state, str(guild.id): 0})
+            return
+
+        print(f"⏳ Reconciliación del rol de bienvenida: {len(pending)} miembro(s) sin rol")
+        semaphore = asyncio.Semaphore(WELCOME_RECONCILE_WORKERS)
+        assigned = 0
+
+        async def assign(member: discord.Member) -> bool:
+            async with semaphore:
+                try:
+                    await member.add_roles(role, reason="Rol de bienvenida pendiente (bot desconectado)")
+                    return True
+                except discord.NotFound:
+                    # Salió del servidor entre el escaneo y la asignación
+                    return False
+                except Exception as e:
+                    print(f"❌ Error al asignar rol pendiente a {member.name}: {e}")
+                    return False
+
+        for start in range(0, len(pending), WELCOME_RECONCILE_BATCH):
+            # En modo bloqueo los roles esperan al final de la oleada; se retoma desde el cursor en el próximo arranque
+            if monitor.in_lockdown(guild.id):
+                print("⚠️ Reconciliación del rol de bienvenida pausada por el modo bloqueo")
+                return
+            batch = pending[start:start + WELCOME_RECONCILE_BATCH]
+            results = await asyncio.gather(*(assign(member) for member in batch))
+            assigned += sum(results)
+            state[str(guild.id)] = batch[-1].id
+            save_json(WELCOME_RECONCILE_STATE_FILE, state)
+            print(f"⏳ Reconciliación del rol de bienvenida: {start + len(batch)}/{len(pending)} revisados")
+
+        # Pasada completa: la próxima vez se empieza desde el principio
+        state[str(guild.id)] = 0
+        save_json(WELCOME_RECONCILE_STATE_FILE, state)
+        print(f"✅ Reconciliación del rol de bienvenida terminada: {assigned} rol(es) asignado(s)")
+
+    reconciled = set()
+
+    async def on_ready():
+        """Reconciliación del rol de bienvenida (una vez por servidor y proceso)"""
+        for guild in bot.guilds:
+            if guild.id in reconciled:
+                continue
+            reconciled.add(guild.id)
             try:
-                info_channel = bot.get_channel(INFO_CHANNEL_ID)
-                channel_mention = f"<#{INFO_CHANNEL_ID}>" if info_channel else f"canal de información"
-                
-                dm_embed = discord.Embed(
-                    title="¡Bienvenido a DorrD Club! 👋",
-                    description=f"Hola {member.name},\n\nEs un placer darte la bienvenida oficial a **DorrD Club**. Nos alegra mucho que te hayas unido a nosotros.\n\nPor favor, asegúrate de leer el canal {channel_mention} para enterarte de las normas y toda la información importante del servidor.\n\n¡Que disfrutes tu estancia aquí! 💜",
-                    color=WEBHOOK_COLOR
-                )
-                
-                dm_embed.set_footer(text="DorrD Club")
-                
-                await member.send(embed=dm_embed)
-                print(f"✅ Mensaje privado enviado a {member.name}")
+                await reconcile_welcome_roles(guild)
             except Exception as e:
-                print(f"⚠️ No se pudo enviar mensaje privado a {member.name}: {e}")
-            
-        except Exception as e:
-            print(f"❌ Error al enviar mensaje de bienvenida: {e}")
+                reconciled.discard(guild.id)
+                print(f"❌ Error en la reconciliación del rol de bienvenida: {e}")
+
+    bot.add_listener(on_ready)
@@ -3,8 +3,11 @@ from discord.ext import commands
 import os
 from config.config import TOKEN, BOT_PREFIX, BOT_NAME
 from events.welcome import setup_welcome_event
-from flask import Flask
-import threading
+from events.permissions import setup_permission_events
+from utils.http_server import HealthServer
+from utils.metrics import install_rest_hook, metrics_handler
+from utils.command_sync import sync_command_tree
+from utils.dm_outbox import get_dm_outbox
 
 # Validar que el TOKEN esté configurado
 if not TOKEN:
@@ -18,16 +21,15 @@ intents.voice_states = True  # Importante para recibir eventos de voz
 
 bot = commands.Bot(command_prefix=BOT_PREFIX, intents=intents, help_command=None)
 
-# Servidor Flask para mantener el bot despierto
-app = Flask(__name__)
+# Opciones de sincronización de slash commands (se rellenan desde la línea de comandos)
+sync_options = {"force": False, "guild_id": None}
 
-@app.route('/')
-def home():
-    return "✅ Bot activo", 200
+# Servidor HTTP (healthchecks) en el mismo event loop que el bot
+http_server = HealthServer(bot)
+http_server.add_route("/metrics", metrics_handler)
 
-def run_flask():
-    port = int(os.environ.get('PORT', 8080))
-    app.run(host='0.0.0.0', port=port, debug=False, use_reloader=False)
+# Contar las llamadas REST que hace cada handler
+install_rest_hook(bot)
 
 @bot.event
 async def on_ready():
@@ -35,10 +37,12 @@ async def on_ready():
     print(f"✅ {BOT_NAME} conectado como {bot.user}")
     print(f"📊 Bot en {len(bot.guilds)} servidor(es)")
     
-    # Sincronizar los slash commands
+    # Sincronizar los slash commands solo si el árbol cambió
+    # (on_ready se repite en cada reconexión del gateway)
     try:
-        synced = await bot.tree.sync()
-        print(f"✅ {len(synced)} comando(s) slash sincronizado(s)")
+        await sync_command_tree(bot, **sync_options)
+        # --sync fuerza solo la primera sincronización del proceso
+        sync_options["force"] = False
     except Exception as e:
         print(f"❌ Error al sincronizar comandos slash: {e}")
     
@@ -53,6 +57,7 @@ async def on_ready():
 async def load_events():
     """Cargar todos los eventos del bot"""
     await setup_welcome_event(bot)
+    await setup_permission_events(bot)
     print("✅ Eventos cargados exitosamente")
 
 async def load_cogs():
@@ -71,24 +76,44 @@ async def load_cogs():
 async def main():
     """Función principal para iniciar el bot"""
     async with bot:
+        # Iniciar el servidor HTTP antes de conectar al gateway
+        await http_server.start()
+
         # Cargar eventos
         await load_events()
         
         # Cargar cogs
         await load_cogs()
+
+        # Workers de la cola de DMs, arrancados fuera de cualquier handler
+        get_dm_outbox().start()
         
         # Iniciar el bot
-        await bot.start(TOKEN)
+        try:
+            await bot.start(TOKEN)
+        finally:
+            await get_dm_outbox().stop()
+            await http_server.stop()
 
 if __name__ == "__main__":
+    import argparse
     import asyncio
-    # Iniciar servidor Flask en un thread ANTES que el bot
-    flask_thread = threading.Thread(target=run_flask, daemon=True)
-    flask_thread.start()
-    port = int(os.environ.get('PORT', 8080))
-    print(f"✅ Servidor Flask iniciado en puerto {port}")
-    # Pequeña pausa para que Flask se inicialice
-    import time
-    time.sleep(1)
-    # Iniciar el bot
+
+    parser = argparse.ArgumentParser(description=f"Iniciar {BOT_NAME}")
+    parser.add_argument(
+        "--sync",
+        action="store_true",
+        help="Forzar la sincronización de los slash commands aunque no hayan cambiado",
+    )
+    parser.add_argument(
+        "--sync-guild",
+        type=int,
+        metavar="GUILD_ID",
+        help="Sincronizar los comandos solo en este servidor (cambios instantáneos para desarrollo)",
+    )
+    args = parser.parse_args()
+    sync_options["force"] = args.sync
+    sync_options["guild_id"] = args.sync_guild
+
+    # Iniciar el bot (el servidor HTTP arranca dentro de main)
     asyncio.run(main())
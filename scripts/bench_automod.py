@@ -0,0 +1,138 @@
+# Benchmark del automod (anti-flood + anti-duplicados) sobre un flujo sintético de mensajes
+#
+#   python scripts/bench_automod.py [--messages 200000] [--seed 1]
+#
+# Mezcla conversación normal (muchos usuarios, textos distintos) con oleadas
+# de raid que pegan el mismo texto con pequeñas variaciones en varios canales,
+# y mide mensajes por segundo de cada detector y de los dos juntos.
+import argparse
+import itertools
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.antiflood import FloodDetector, count_links  # noqa: E402
+from utils.duplicates import DuplicateDetector  # noqa: E402
+
+# Presupuesto del listener de automod (mensajes por segundo)
+BUDGET = 10_000
+
+# Vocabulario de la conversación: palabras frecuentes reales y una cola larga de
+# palabras inventadas con frecuencias tipo Zipf (como en un chat de verdad)
+COMMON_WORDS = [
+    "hola", "que", "tal", "alguien", "juega", "esta", "noche", "partida", "servidor", "gracias",
+    "jajaja", "buenas", "minecraft", "evento", "directo", "canal", "mañana", "sí", "no", "vale",
+    "creo", "mejor", "ayer", "hoy", "grande", "pequeño", "rápido", "música", "película", "serie",
+]
+RAID_TEXTS = [
+    "Nitro gratis para todos entra ya en https://discord-gift.example/abc antes de que se acabe",
+    "ÚNETE AL MEJOR SERVIDOR DE ESPAÑA https://discord.gg/ejemplo sorteos cada día!!!",
+    "free robux generator no scam 100% real https://robux.example/free click aqui",
+]
+
+
+def build_vocabulary(rng: random.Random, size: int = 5000) -> tuple:
+    words = COMMON_WORDS + [
+        "".join(rng.choice("abcdefghijlmnopqrstuvzáéíóñ") for _ in range(rng.randint(3, 9)))
+        for _ in range(size - len(COMMON_WORDS))
+    ]
+    # Pesos acumulados una sola vez: choices() no tiene que recalcularlos en cada mensaje
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    return words, cum_weights
+
+
+def chat_message(rng: random.Random, vocabulary: tuple) -> str:
+    words, cum_weights = vocabulary
+    return " ".join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(2, 25)))
+
+
+def raid_message(rng: random.Random, text: str) -> str:
+    # Variaciones típicas para esquivar filtros: sufijo aleatorio y mayúsculas
+    suffix = "".join(rng.choice(string.ascii_letters) for _ in range(rng.randint(0, 4)))
+    return (text.upper() if rng.random() < 0.3 else text) + " " + suffix
+
+
+def build_stream(count: int, rng: random.Random) -> list:
+    vocabulary = build_vocabulary(rng)
+    stream = []
+    now = 0.0
+    raid_ids = set()
+    for message_id in range(count):
+        now += 0.0005
+        if rng.random() < 0.02:
+            content = raid_message(rng, rng.choice(RAID_TEXTS))
+            raid_ids.add(message_id)
+            author_id = rng.randint(1_000_000, 1_000_500)
+        else:
+            content = chat_message(rng, vocabulary)
+            author_id = rng.randint(1, 20_000)
+        stream.append((now, rng.randint(1, 30), message_id, author_id, content))
+    return stream, raid_ids
+
+
+def run(label: str, stream: list, step) -> float:
+    start = time.perf_counter()
+    for item in stream:
+        step(item)
+    elapsed = time.perf_counter() - start
+    rate = len(stream) / elapsed
+    mark = "✅" if rate >= BUDGET else "⚠️"
+    print(f"{mark} {label:<22} {rate:>12,.0f} msg/s ({elapsed * 1e6 / len(stream):.1f} µs/msg)")
+    return rate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    stream, raid_ids = build_stream(args.messages, rng)
+    print(f"{len(stream)} mensajes, {len(raid_ids)} de raid")
+
+    flood = FloodDetector(window=8, max_messages=7, max_mentions=10, max_links=5, max_users=5000, idle_ttl=60)
+    run("anti-flood", stream, lambda m: flood.check(m[3], 0, count_links(m[4]), m[0]))
+
+    duplicates = DuplicateDetector(window=30, max_accounts=3, max_channels=3, max_entries=5000)
+    flagged = set()
+
+    def check_duplicates(m):
+        copies = duplicates.check(m[1], m[2], m[3], m[4], m[0])
+        if copies:
+            flagged.update(message_id for _, message_id in copies)
+
+    run("anti-duplicados", stream, check_duplicates)
+
+    recall = len(flagged & raid_ids) / len(raid_ids) if raid_ids else 1.0
+    print(f"   copias de raid detectadas: {recall:.1%} · falsos positivos: {len(flagged - raid_ids)}")
+
+    exact = DuplicateDetector(window=30, max_accounts=3, max_channels=3, max_entries=5000, fuzzy=False)
+    flagged_exact = set()
+
+    def check_exact(m):
+        copies = exact.check(m[1], m[2], m[3], m[4], m[0])
+        if copies:
+            flagged_exact.update(message_id for _, message_id in copies)
+
+    run("anti-duplicados exacto", stream, check_exact)
+    recall = len(flagged_exact & raid_ids) / len(raid_ids) if raid_ids else 1.0
+    print(f"   copias de raid detectadas: {recall:.1%} · falsos positivos: {len(flagged_exact - raid_ids)}")
+
+    for fuzzy in (True, False):
+        flood = FloodDetector(window=8, max_messages=7, max_mentions=10, max_links=5, max_users=5000, idle_ttl=60)
+        duplicates = DuplicateDetector(window=30, max_accounts=3, max_channels=3, max_entries=5000, fuzzy=fuzzy)
+
+        def both(m):
+            duplicates.check(m[1], m[2], m[3], m[4], m[0])
+            flood.check(m[3], 0, count_links(m[4]), m[0])
+
+        run("automod completo" + ("" if fuzzy else " (exacto)"), stream, both)
+
+
+if __name__ == "__main__":
+    main()
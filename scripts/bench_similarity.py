@@ -0,0 +1,134 @@
+# Benchmark del índice de sugerencias parecidas (utils/similarity.py)
+#
+#   python scripts/bench_similarity.py [--docs 50000] [--queries 300] [--seed 3]
+#
+# Construye el índice con sugerencias sintéticas (vocabulario con frecuencias
+# tipo Zipf, de 8 a 40 palabras) y mide el tiempo de consulta de:
+#   - casi duplicados (una sugerencia existente con una palabra cambiada):
+#     la original debe salir entre los resultados;
+#   - textos sin relación: no debe salir nada.
+# Antes comprueba que el singular y el plural de palabras cortas en español
+# dan la misma raíz y que una sugerencia se encuentra escrita en plural.
+# Termina con código 1 si falla alguna comprobación o si el p95 de las
+# consultas pasa del presupuesto.
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.similarity import SimilarityIndex, tokens  # noqa: E402
+
+# Presupuesto por consulta (en milisegundos) con 50k sugerencias guardadas
+BUDGET_MS = 5.0
+
+# Singulares y plurales que deben dar la misma raíz
+PLURAL_PAIRS = [
+    ("canal", "canales"), ("mes", "meses"), ("rol", "roles"), ("voz", "voces"),
+    ("bot", "bots"), ("clase", "clases"), ("noche", "noches"), ("país", "países"),
+    ("nivel", "niveles"), ("emoji", "emojis"), ("servidor", "servidores"), ("sugerencia", "sugerencias"),
+]
+
+# Sugerencias guardadas y la misma idea escrita con los plurales cambiados
+PLURAL_QUERIES = [
+    ("Añadir un canal de voz por cada rol", "Añadir canales de voz para los roles"),
+    ("Sorteo de nitro cada mes", "Sorteos de nitro todos los meses"),
+    ("Un bot de música con clases de guitarra", "Bots de música y clase de guitarra"),
+]
+
+
+def build_corpus(rng: random.Random, count: int) -> tuple:
+    vocabulary = [
+        "".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(3, 9)))
+        for _ in range(5000)
+    ]
+    weights = [1 / rank for rank in range(1, len(vocabulary) + 1)]
+    docs = [" ".join(rng.choices(vocabulary, weights, k=rng.randint(8, 40))) for _ in range(count)]
+    return vocabulary, docs
+
+
+def mutate(rng: random.Random, text: str, vocabulary: list) -> str:
+    words = text.split()
+    words[rng.randrange(len(words))] = rng.choice(vocabulary)
+    return " ".join(words)
+
+
+def check_plurals() -> int:
+    """Comprueba las raíces de los plurales cortos; devuelve el número de fallos"""
+    failed = 0
+    for singular, plural in PLURAL_PAIRS:
+        if tokens(singular) != tokens(plural):
+            failed += 1
+            print(f"❌ {singular}/{plural}: {tokens(singular)} ≠ {tokens(plural)}")
+
+    index = SimilarityIndex()
+    for doc_id, (stored, _) in enumerate(PLURAL_QUERIES):
+        index.add(doc_id, stored)
+    for doc_id, (stored, query) in enumerate(PLURAL_QUERIES):
+        if not any(found == doc_id for found, _ in index.query(query)):
+            failed += 1
+            print(f"❌ «{query}» no encuentra «{stored}»")
+
+    if not failed:
+        print(f"✅ {len(PLURAL_PAIRS)} pares singular/plural y {len(PLURAL_QUERIES)} consultas en plural")
+    return failed
+
+
+def timed_queries(index: SimilarityIndex, queries: list) -> tuple:
+    timings = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(index.query(query))
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, results
+
+
+def report(label: str, timings: list) -> float:
+    p95 = statistics.quantiles(timings, n=20)[-1]
+    print(f"{label:<18} media {statistics.mean(timings):.2f} ms · p95 {p95:.2f} ms · máx {max(timings):.2f} ms")
+    return p95
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    plural_failures = check_plurals()
+
+    rng = random.Random(args.seed)
+    vocabulary, docs = build_corpus(rng, args.docs)
+
+    index = SimilarityIndex()
+    start = time.perf_counter()
+    for doc_id, text in enumerate(docs):
+        index.add(doc_id, text)
+    print(f"Índice de {len(index)} sugerencias construido en {time.perf_counter() - start:.1f} s")
+
+    targets = [rng.randrange(len(docs)) for _ in range(args.queries)]
+    timings, results = timed_queries(index, [mutate(rng, docs[target], vocabulary) for target in targets])
+    near_p95 = report("casi duplicados", timings)
+    found = sum(any(doc_id == target for doc_id, _ in result) for target, result in zip(targets, results))
+    print(f"{'':<18} la original aparece en {found / len(targets):.1%} de las consultas")
+
+    unrelated = [" ".join(rng.choices(vocabulary, k=20)) for _ in range(args.queries)]
+    timings, results = timed_queries(index, unrelated)
+    unrelated_p95 = report("sin relación", timings)
+    print(f"{'':<18} con resultados: {sum(bool(result) for result in results) / len(unrelated):.1%}")
+
+    worst = max(near_p95, unrelated_p95)
+    if worst > BUDGET_MS:
+        print(f"⚠️ p95 de {worst:.2f} ms por encima del presupuesto de {BUDGET_MS} ms")
+        return 1
+    print(f"✅ p95 por debajo del presupuesto de {BUDGET_MS} ms")
+    return 1 if plural_failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
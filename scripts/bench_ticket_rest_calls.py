@@ -0,0 +1,375 @@
+# Cuenta las llamadas REST de abrir y cerrar un ticket, antes y después de user-007
+#
+#   python scripts/bench_ticket_rest_calls.py [--latency 0.05] [--messages 250]
+#
+# Ejecuta los handlers reales de cogs/tickets.py (TicketCreateView.create_ticket
+# y TicketModal.on_submit) contra un servidor y un canal falsos que apuntan cada
+# petición que harían a la API de Discord. El flujo antiguo es una copia fiel de
+# las llamadas del código anterior, sobre los mismos objetos falsos. Cada
+# petición tarda --latency segundos, así que también se ve cuánto espera el
+# usuario hasta recibir la respuesta. Termina con código 1 si el flujo nuevo no
+# hace menos llamadas que el antiguo.
+import argparse
+import asyncio
+import datetime
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import discord  # noqa: E402
+
+from cogs.tickets import Tickets, TicketCreateView, TicketModal, TicketSelectView  # noqa: E402
+from utils.database import Database  # noqa: E402
+from utils.dm_outbox import get_dm_outbox  # noqa: E402
+from utils.rating_store import RatingStore  # noqa: E402
+from utils.ticket_store import TicketStore  # noqa: E402
+from utils.transcripts import PAGE_SIZE, TranscriptArchiver  # noqa: E402
+from config.config import TICKETS_ADMIN_ROLE_ID, TICKETS_CATEGORY_ID, WEBHOOK_COLOR  # noqa: E402
+
+GUILD_ID = 1000
+USER_ID = 2000
+STAFF_ID = 3000
+BOT_ID = 4000
+
+
+# Tareas que el handler lanza sin esperarlas: sus llamadas no retrasan la respuesta
+BACKGROUND_COROUTINES = {
+    "TopicMirror._flush",
+    "TranscriptArchiver._archive",
+    "Tickets.request_rating",
+    "DMOutbox._worker",
+}
+
+
+class RestLog:
+    """Peticiones a la API de Discord, separadas entre el handler y el segundo plano"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = []
+        self.answered_at = None
+
+    async def request(self, route: str) -> None:
+        coroutine = asyncio.current_task().get_coro()
+        background = getattr(coroutine, "__qualname__", "") in BACKGROUND_COROUTINES
+        self.calls.append(("background" if background else "handler", route))
+        await asyncio.sleep(self.latency)
+
+    def count(self, phase: str) -> int:
+        return sum(1 for call_phase, _ in self.calls if call_phase == phase)
+
+
+class FakeAsset:
+    url = "https://cdn.discordapp.com/embed/avatars/0.png"
+
+
+class FakeRole:
+    def __init__(self, role_id: int):
+        self.id = role_id
+
+
+class FakeUser:
+    def __init__(self, log: RestLog, user_id: int, name: str):
+        self.log = log
+        self.id = user_id
+        self.name = name
+        self.display_name = name
+        self.display_avatar = FakeAsset()
+        self.mention = f"<@{user_id}>"
+        self.bot = user_id == BOT_ID
+        self.dm_channel = None
+
+    def __str__(self) -> str:
+        return self.name
+
+    def __hash__(self) -> int:
+        return self.id
+
+    async def send(self, **kwargs) -> None:
+        if self.dm_channel is None:
+            await self.log.request("POST /users/@me/channels")
+            self.dm_channel = FakeRole(self.id + 1)
+        await self.log.request("POST /channels/{dm}/messages")
+
+
+class FakeMessage:
+    def __init__(self, message_id: int, author: FakeUser, content: str):
+        self.id = message_id
+        self.author = author
+        self.content = content
+        self.created_at = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+        self.attachments = []
+        self.embeds = []
+
+
+class FakeChannel:
+    def __init__(self, log: RestLog, guild: "FakeGuild", channel_id: int, name: str, topic: str, messages: int):
+        self.log = log
+        self.guild = guild
+        self.id = channel_id
+        self.name = name
+        self.topic = topic
+        self.mention = f"<#{channel_id}>"
+        author = guild.members[USER_ID]
+        self.messages = [FakeMessage(i, author, f"mensaje {i}") for i in range(messages)]
+
+    async def send(self, **kwargs) -> None:
+        await self.log.request("POST /channels/{id}/messages")
+
+    async def edit(self, **kwargs) -> None:
+        await self.log.request("PATCH /channels/{id}")
+        if "topic" in kwargs:
+            self.topic = kwargs["topic"]
+
+    async def set_permissions(self, target, **kwargs) -> None:
+        await self.log.request("PUT /channels/{id}/permissions/{target}")
+
+    async def history(self, limit=None, oldest_first=False):
+        for i, message in enumerate(self.messages):
+            if i % PAGE_SIZE == 0:
+                await self.log.request("GET /channels/{id}/messages")
+            yield message
+
+
+class FakeGuild:
+    def __init__(self, log: RestLog, messages: int):
+        self.log = log
+        self.id = GUILD_ID
+        self.name = "Servidor de prueba"
+        self.icon = None
+        self.default_role = FakeRole(GUILD_ID)
+        self.roles = {TICKETS_ADMIN_ROLE_ID: FakeRole(TICKETS_ADMIN_ROLE_ID)}
+        self.members = {USER_ID: FakeUser(log, USER_ID, "usuario"), STAFF_ID: FakeUser(log, STAFF_ID, "staff")}
+        self.channels = {TICKETS_CATEGORY_ID: FakeRole(TICKETS_CATEGORY_ID)}
+        self.text_channels = []
+        self.messages = messages
+
+    def get_role(self, role_id: int):
+        return self.roles.get(role_id)
+
+    def get_member(self, user_id: int):
+        return self.members.get(user_id)
+
+    def get_channel(self, channel_id: int):
+        return self.channels.get(channel_id)
+
+    async def fetch_member(self, user_id: int) -> FakeUser:
+        await self.log.request("GET /guilds/{id}/members/{user}")
+        return self.members[user_id]
+
+    async def create_text_channel(self, name: str, **kwargs) -> FakeChannel:
+        await self.log.request("POST /guilds/{id}/channels")
+        channel = FakeChannel(self.log, self, 5000 + len(self.text_channels), name, kwargs.get("topic"), self.messages)
+        self.channels[channel.id] = channel
+        self.text_channels.append(channel)
+        return channel
+
+
+class FakeResponse:
+    def __init__(self, log: RestLog):
+        self.log = log
+        self.done = False
+
+    def is_done(self) -> bool:
+        return self.done
+
+    async def defer(self, **kwargs) -> None:
+        self.done = True
+        await self.log.request("POST /interactions/{id}/{token}/callback")
+
+    async def send_message(self, *args, **kwargs) -> None:
+        self.done = True
+        await self.log.request("POST /interactions/{id}/{token}/callback")
+        self.log.answered_at = asyncio.get_running_loop().time()
+
+
+class FakeFollowup:
+    def __init__(self, log: RestLog):
+        self.log = log
+
+    async def send(self, *args, **kwargs) -> None:
+        await self.log.request("POST /webhooks/{app}/{token}")
+        self.log.answered_at = asyncio.get_running_loop().time()
+
+
+class FakeBot:
+    def __init__(self, log: RestLog, guild: FakeGuild):
+        self.log = log
+        self.guild = guild
+        self.user = FakeUser(log, BOT_ID, "DorrD Bot")
+        self.cogs = {}
+
+    def get_cog(self, name: str):
+        return self.cogs.get(name)
+
+    def get_user(self, user_id: int):
+        # Como en producción sin la caché de usuarios llena: hay que pedirlo a la API
+        return None
+
+    async def fetch_user(self, user_id: int) -> FakeUser:
+        await self.log.request("GET /users/{id}")
+        return self.guild.members[user_id]
+
+
+class FakeInteraction:
+    def __init__(self, log: RestLog, bot: FakeBot, user: FakeUser, channel=None):
+        self.client = bot
+        self.user = user
+        self.guild = bot.guild
+        self.guild_id = GUILD_ID
+        self.channel = channel
+        self.response = FakeResponse(log)
+        self.followup = FakeFollowup(log)
+
+
+async def legacy_create_ticket(bot: FakeBot, interaction: FakeInteraction) -> FakeChannel:
+    """Llamadas del flujo anterior de creación (canal, topic con el ID, 3 permisos, mensaje, respuesta)"""
+    user, guild = interaction.user, interaction.guild
+    category = guild.get_channel(TICKETS_CATEGORY_ID)
+    topic = f"ID del ticket: (waiting) | Estado: :white_check_mark: Abierto | Reclamado: :x: No | creator_id: {user.id}"
+    channel = await guild.create_text_channel(name=f"✉️┃{user.name}", category=category, topic=topic)
+    await channel.edit(topic=topic.replace("(waiting)", str(channel.id)))
+    admin_role = guild.get_role(TICKETS_ADMIN_ROLE_ID)
+    await channel.set_permissions(guild.default_role, view_channel=False, send_messages=False)
+    await channel.set_permissions(user, view_channel=True, send_messages=True, read_message_history=True)
+    if admin_role:
+        await channel.set_permissions(admin_role, view_channel=True, send_messages=True, read_message_history=True)
+    embed = discord.Embed(title="✉️ Ticket Creado Correctamente", color=WEBHOOK_COLOR)
+    await channel.send(embed=embed, view=TicketSelectView(bot))
+    await interaction.response.send_message(f"✅ Tu ticket ha sido creado exitosamente: {channel.mention}", ephemeral=True)
+    return channel
+
+
+async def legacy_close_ticket(bot: FakeBot, interaction: FakeInteraction, reason: str) -> None:
+    """Llamadas del flujo anterior de cierre (mensaje, topic, fetch_member, 3 permisos, respuesta, DM)"""
+    channel = interaction.channel
+    guild = channel.guild
+    await channel.send(embed=discord.Embed(title="🔐 Ticket Cerrado", description=reason))
+    await channel.edit(topic=f"ID del ticket: {channel.id} | Estado: :red_square: Cerrado | creator_id: {USER_ID}")
+    admin_role = guild.get_role(TICKETS_ADMIN_ROLE_ID)
+    await channel.set_permissions(guild.default_role, view_channel=False, send_messages=False)
+    creator = await guild.fetch_member(USER_ID)
+    await channel.set_permissions(creator, view_channel=True, send_messages=False, read_message_history=True)
+    if admin_role:
+        await channel.set_permissions(admin_role, view_channel=True, send_messages=True, read_message_history=True)
+    await interaction.response.send_message("✅ El ticket ha sido cerrado exitosamente.", ephemeral=True)
+    # La valoración se pedía dentro del mismo handler
+    creator = await bot.fetch_user(USER_ID)
+    await creator.send(embed=discord.Embed(title="¡Muchas gracias por tu ticket!"))
+
+
+async def wait_background() -> None:
+    """Espera a las tareas en segundo plano (topic, transcript, valoración) salvo los workers de DMs"""
+    outbox = get_dm_outbox()
+    while True:
+        pending = [
+            task for task in asyncio.all_tasks()
+            if task is not asyncio.current_task() and task not in outbox.tasks
+        ]
+        if not pending and outbox.queue.empty():
+            break
+        await asyncio.gather(*pending, return_exceptions=True)
+        await outbox.queue.join()
+
+
+async def run_legacy(latency: float, messages: int) -> dict:
+    results = {}
+    for action in ("create", "close"):
+        log = RestLog(latency)
+        guild = FakeGuild(log, messages)
+        bot = FakeBot(log, guild)
+        start = asyncio.get_running_loop().time()
+        if action == "create":
+            await legacy_create_ticket(bot, FakeInteraction(log, bot, guild.members[USER_ID]))
+        else:
+            channel = FakeChannel(log, guild, 5000, "✉️┃usuario", f"creator_id: {USER_ID}", messages)
+            await legacy_close_ticket(bot, FakeInteraction(log, bot, guild.members[STAFF_ID], channel), "Resuelto")
+        results[action] = (log, log.answered_at - start)
+    return results
+
+
+async def run_current(latency: float, messages: int, directory: str) -> dict:
+    results = {}
+    log = RestLog(latency)
+    guild = FakeGuild(log, messages)
+    bot = FakeBot(log, guild)
+    cog = Tickets(bot)
+    database = Database(os.path.join(directory, "bench.db"))
+    cog.store = TicketStore(database)
+    cog.ratings = RatingStore(database)
+    cog.transcripts = TranscriptArchiver(os.path.join(directory, "transcripts"))
+    await cog.store.setup()
+    await cog.ratings.setup()
+    bot.cogs["Tickets"] = cog
+
+    # Crear el ticket con el callback real del botón del panel
+    view = TicketCreateView(bot)
+    button = next(item for item in view.children if getattr(item, "custom_id", None) == "create_ticket_button")
+    start = asyncio.get_running_loop().time()
+    await button.callback(FakeInteraction(log, bot, guild.members[USER_ID]))
+    answered = log.answered_at - start
+    await wait_background()
+    results["create"] = (log, answered)
+
+    # Cerrarlo con el modal real (mismo camino que el cierre por inactividad)
+    channel = guild.text_channels[0]
+    log = RestLog(latency)
+    for obj in (guild, bot, channel, bot.user, *guild.members.values()):
+        obj.log = log
+    modal = TicketModal()
+    modal.reason._value = "Resuelto"
+    start = asyncio.get_running_loop().time()
+    await modal.on_submit(FakeInteraction(log, bot, guild.members[STAFF_ID], channel))
+    answered = log.answered_at - start
+    await wait_background()
+    results["close"] = (log, answered)
+
+    database.close()
+    return results
+
+
+def report(title: str, results: dict) -> None:
+    print(f"\n{title}")
+    for action, (log, answered) in results.items():
+        print(
+            f"  {action:<6} {log.count('handler'):>2} llamada(s) en el handler, "
+            f"{log.count('background'):>2} en segundo plano · respuesta al usuario en {answered * 1000:.0f} ms"
+        )
+        for phase, route in log.calls:
+            print(f"           [{phase}] {route}")
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.05, help="Segundos que tarda cada petición simulada")
+    parser.add_argument("--messages", type=int, default=250, help="Mensajes en el historial del ticket (transcript)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        get_dm_outbox().start()
+        legacy = await run_legacy(args.latency, args.messages)
+        current = await run_current(args.latency, args.messages, directory)
+        await get_dm_outbox().stop()
+
+    report("Antes (permisos uno a uno, topic con el ID, fetch_member)", legacy)
+    report("Ahora (overwrites en la creación, un solo edit al cerrar, topic diferido)", current)
+
+    failed = False
+    print()
+    for action in ("create", "close"):
+        before = len(legacy[action][0].calls)
+        after = current[action][0].count("handler")
+        total = len(current[action][0].calls)
+        ok = after < before
+        failed |= not ok
+        print(
+            f"{'✅' if ok else '❌'} {action}: {before} → {after} llamada(s) REST antes de terminar el handler "
+            f"({total} en total contando el segundo plano)"
+        )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,138 @@
+# Reproduce oleadas sintéticas de entradas contra JoinRateMonitor (sin Discord)
+#
+#   python scripts/replay_join_storms.py
+#
+# Cada escenario es una lista de marcas de tiempo de entradas; el monitor se
+# consulta como lo hace events/welcome.py (should_resume cada
+# LOCKDOWN_CHECK_INTERVAL segundos mientras dura el bloqueo). Termina con
+# código 1 si algún escenario no activa o no levanta el bloqueo cuando debe.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.join_guard import JoinRateMonitor  # noqa: E402
+
+# Mismos valores por defecto que config/config.py
+BURST = 10
+PER_MINUTE = 20
+CALM_PERIOD = 300
+CHECK_INTERVAL = 15
+
+GUILD = 1
+
+
+def replay(joins: list, until: float, guild_id: int = GUILD, monitor: JoinRateMonitor = None) -> list:
+    """
+    Devuelve los eventos [(momento, "lockdown" | "resume")] de la reproducción.
+
+    Las comprobaciones de reanudación se intercalan con las entradas en orden
+    de tiempo, igual que el bucle de sondeo del bot.
+    """
+    monitor = monitor or JoinRateMonitor(BURST, PER_MINUTE, CALM_PERIOD)
+    events = []
+    next_check = None
+    joins = sorted(joins)
+    index = 0
+    now = 0.0
+    while now <= until:
+        upcoming_join = joins[index] if index < len(joins) else None
+        if next_check is not None and (upcoming_join is None or next_check <= upcoming_join):
+            now = next_check
+            if monitor.should_resume(guild_id, now):
+                monitor.end_lockdown(guild_id)
+                events.append((now, "resume"))
+                next_check = None
+            else:
+                next_check = now + CHECK_INTERVAL
+            continue
+        if upcoming_join is None:
+            break
+        now = upcoming_join
+        index += 1
+        if monitor.record_join(guild_id, now):
+            events.append((now, "lockdown"))
+            next_check = now + CHECK_INTERVAL
+    return events
+
+
+def kinds(events: list) -> list:
+    return [kind for _, kind in events]
+
+
+def scenario_normal_traffic():
+    # Una entrada cada 10 s durante dos horas: nunca debe bloquear
+    joins = [i * 10.0 for i in range(720)]
+    events = replay(joins, until=7200)
+    assert events == [], events
+
+
+def scenario_burst_within_capacity():
+    # Exactamente BURST entradas de golpe caben en el cubo
+    events = replay([100.0 + i * 0.1 for i in range(BURST)], until=1000)
+    assert events == [], events
+
+
+def scenario_storm_then_calm():
+    # 60 entradas en 30 s: bloqueo en cuanto se agotan la ráfaga y lo recargado, y reanudación tras la calma
+    joins = [i * 0.5 for i in range(60)]
+    events = replay(joins, until=2000)
+    assert kinds(events) == ["lockdown", "resume"], events
+    started, resumed = events[0][0], events[1][0]
+    # Primera entrada que supera la capacidad más las fichas recargadas desde el principio
+    expected = next(t for n, t in enumerate(joins, start=1) if n > BURST + int(t * PER_MINUTE / 60))
+    assert started == expected, (started, expected)
+    last_join = joins[-1]
+    assert resumed - last_join >= CALM_PERIOD, (resumed, last_join)
+    assert resumed - last_join < CALM_PERIOD + 2 * CHECK_INTERVAL, (resumed, last_join)
+
+
+def scenario_sustained_trickle_keeps_lockdown():
+    # Tras la oleada siguen entrando 2 por segundo durante 10 minutos: no se levanta hasta que paran
+    storm = [i * 0.2 for i in range(30)]
+    trickle = [10.0 + i * 0.5 for i in range(1200)]
+    events = replay(storm + trickle, until=3000)
+    assert kinds(events) == ["lockdown", "resume"], events
+    assert events[1][0] - trickle[-1] >= CALM_PERIOD, events
+
+
+def scenario_second_storm_after_resume():
+    # Dos oleadas separadas por una hora: dos bloqueos independientes
+    first = [i * 0.3 for i in range(40)]
+    second = [3600.0 + i * 0.3 for i in range(40)]
+    events = replay(first + second, until=6000)
+    assert kinds(events) == ["lockdown", "resume", "lockdown", "resume"], events
+
+
+def scenario_guilds_are_independent():
+    monitor = JoinRateMonitor(BURST, PER_MINUTE, CALM_PERIOD)
+    replay([i * 0.1 for i in range(50)], until=5, guild_id=1, monitor=monitor)
+    assert monitor.in_lockdown(1)
+    events = replay([i * 10.0 for i in range(30)], until=400, guild_id=2, monitor=monitor)
+    assert events == [] and not monitor.in_lockdown(2), events
+
+
+SCENARIOS = [
+    scenario_normal_traffic,
+    scenario_burst_within_capacity,
+    scenario_storm_then_calm,
+    scenario_sustained_trickle_keeps_lockdown,
+    scenario_second_storm_after_resume,
+    scenario_guilds_are_independent,
+]
+
+
+def main() -> int:
+    failed = 0
+    for scenario in SCENARIOS:
+        try:
+            scenario()
+            print(f"✅ {scenario.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"❌ {scenario.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
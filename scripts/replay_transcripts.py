@@ -0,0 +1,157 @@
+# Archiva canales sintéticos con TranscriptArchiver y FakeHistorySource (sin Discord)
+#
+#   python scripts/replay_transcripts.py
+#
+# Comprueba el JSONL comprimido y el HTML de un ticket de 10 000 mensajes, el
+# escapado de contenido hostil, los canales vacíos, la reutilización de un
+# trabajo en curso y que nunca se archivan más de TRANSCRIPTS_MAX_CONCURRENCY
+# canales a la vez. Termina con código 1 si algún escenario falla.
+import asyncio
+import gzip
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.transcripts import FakeHistorySource, TranscriptArchiver  # noqa: E402
+from config.config import TRANSCRIPTS_MAX_CONCURRENCY  # noqa: E402
+
+LONG_TICKET_MESSAGES = 10_000
+
+
+def record(i: int, content: str = None, attachments: list = None) -> dict:
+    """Registro con la misma forma que serialize_message"""
+    author_id = 2000 + i % 3
+    return {
+        "id": 10_000_000 + i,
+        "author_id": author_id,
+        "author": f"usuario{author_id}",
+        "bot": author_id == 2000,
+        "created_at": f"2026-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}+00:00",
+        "content": content if content is not None else f"mensaje {i} del ticket",
+        "attachments": attachments or [],
+        "embeds": [],
+    }
+
+
+def read_jsonl(path: str) -> list:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+class TrackedSource:
+    """FakeHistorySource que anota cuántos canales se están leyendo a la vez"""
+
+    active = 0
+    peak = 0
+
+    def __init__(self, records):
+        self.source = FakeHistorySource(records)
+
+    async def __aiter__(self):
+        TrackedSource.active += 1
+        TrackedSource.peak = max(TrackedSource.peak, TrackedSource.active)
+        try:
+            async for item in self.source:
+                yield item
+        finally:
+            TrackedSource.active -= 1
+
+
+async def scenario_long_ticket(directory: str):
+    archiver = TranscriptArchiver(directory)
+    records = [record(i) for i in range(LONG_TICKET_MESSAGES)]
+    count = await archiver.archive(1, "Ticket ✉️┃largo", FakeHistorySource(records))
+    assert count == LONG_TICKET_MESSAGES, count
+
+    jsonl_path, html_path = archiver.paths(1)
+    assert not os.path.exists(f"{jsonl_path}.tmp"), "quedó el archivo temporal"
+    with open(jsonl_path, "rb") as f:
+        assert f.read(2) == b"\x1f\x8b", "el JSONL no está comprimido con gzip"
+    assert read_jsonl(jsonl_path) == records, "el JSONL no conserva los mensajes en orden"
+
+    with open(html_path, encoding="utf-8") as f:
+        page = f.read()
+    assert page.count('<div class="msg">') == LONG_TICKET_MESSAGES, "faltan mensajes en el HTML"
+    assert f"{LONG_TICKET_MESSAGES} mensaje(s)" in page, "falta el recuento del HTML"
+    assert page.index("mensaje 0 del ticket") < page.index(f"mensaje {LONG_TICKET_MESSAGES - 1} del ticket")
+    assert not archiver.jobs, "el trabajo terminado sigue registrado"
+
+
+async def scenario_hostile_content(directory: str):
+    archiver = TranscriptArchiver(directory)
+    attachment = {
+        "filename": "<img src=x onerror=alert(1)>.png",
+        "url": "https://cdn.example/a.png?x=\"><script>",
+        "size": 123,
+        "content_type": "image/png",
+    }
+    records = [record(0, "<script>alert('xss')</script> & ñandú"), record(1, "", [attachment])]
+    await archiver.archive(2, "Ticket <b>raro</b>", FakeHistorySource(records))
+
+    _, html_path = archiver.paths(2)
+    with open(html_path, encoding="utf-8") as f:
+        page = f.read()
+    assert "<script>" not in page and "<img" not in page and "<b>raro" not in page, "contenido sin escapar"
+    assert "&lt;script&gt;alert(&#x27;xss&#x27;)&lt;/script&gt; &amp; ñandú" in page, page
+    assert "📎" in page and "(123 bytes)" in page, "falta el adjunto"
+
+
+async def scenario_empty_channel(directory: str):
+    archiver = TranscriptArchiver(directory)
+    count = await archiver.archive(3, "Ticket vacío", FakeHistorySource([]))
+    jsonl_path, html_path = archiver.paths(3)
+    assert count == 0 and read_jsonl(jsonl_path) == [], count
+    assert os.path.exists(html_path)
+
+
+async def scenario_job_is_reused(directory: str):
+    archiver = TranscriptArchiver(directory)
+    records = [record(i) for i in range(500)]
+    first = archiver.archive(4, "Ticket", FakeHistorySource(records))
+    second = archiver.archive(4, "Ticket", FakeHistorySource(records[:1]))
+    assert first is second, "se lanzó un segundo archivado del mismo ticket"
+    assert await first == 500
+
+
+async def scenario_concurrency_cap(directory: str):
+    archiver = TranscriptArchiver(directory)
+    TrackedSource.active = TrackedSource.peak = 0
+    channels = 3 * TRANSCRIPTS_MAX_CONCURRENCY + 1
+    jobs = [
+        archiver.archive(100 + n, f"Ticket {n}", TrackedSource([record(i) for i in range(1000)]))
+        for n in range(channels)
+    ]
+    counts = await asyncio.gather(*jobs)
+    assert counts == [1000] * channels, counts
+    assert TrackedSource.peak == TRANSCRIPTS_MAX_CONCURRENCY, (
+        f"{TrackedSource.peak} canales a la vez con un límite de {TRANSCRIPTS_MAX_CONCURRENCY}"
+    )
+
+
+SCENARIOS = [
+    scenario_long_ticket,
+    scenario_hostile_content,
+    scenario_empty_channel,
+    scenario_job_is_reused,
+    scenario_concurrency_cap,
+]
+
+
+async def main() -> int:
+    failed = 0
+    with tempfile.TemporaryDirectory() as directory:
+        for scenario in SCENARIOS:
+            try:
+                await scenario(os.path.join(directory, scenario.__name__))
+                print(f"✅ {scenario.__name__}")
+            except AssertionError as e:
+                failed += 1
+                print(f"❌ {scenario.__name__}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
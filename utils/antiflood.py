@@ -0,0 +1,102 @@
+# Detección de flood con ventanas deslizantes por usuario en memoria acotada
+import re
+import time
+from collections import OrderedDict, deque
+
+LINK_PATTERN = re.compile(r"https?://", re.IGNORECASE)
+
+
+class UserWindow:
+    """
+    Ventana deslizante de un usuario sobre un ring buffer de tamaño fijo.
+
+    Guarda (marca de tiempo, menciones, enlaces) de sus últimos mensajes y
+    mantiene las sumas al día al entrar y salir de la ventana, así que cada
+    mensaje cuesta O(1) amortizado.
+    """
+
+    __slots__ = ("entries", "mentions", "links", "last_seen")
+
+    def __init__(self, size: int):
+        self.entries = deque(maxlen=size)
+        self.mentions = 0
+        self.links = 0
+        self.last_seen = 0.0
+
+    def add(self, now: float, window: float, mentions: int, links: int) -> None:
+        entries = self.entries
+        cutoff = now - window
+        while entries and entries[0][0] < cutoff:
+            _, old_mentions, old_links = entries.popleft()
+            self.mentions -= old_mentions
+            self.links -= old_links
+        if len(entries) == entries.maxlen:
+            _, old_mentions, old_links = entries.popleft()
+            self.mentions -= old_mentions
+            self.links -= old_links
+        entries.append((now, mentions, links))
+        self.mentions += mentions
+        self.links += links
+        self.last_seen = now
+
+
+class FloodDetector:
+    """
+    Contadores de mensajes, menciones y enlaces por usuario.
+
+    Solo se guardan los usuarios activos: los inactivos más de `idle_ttl`
+    segundos se descartan y nunca se guardan más de `max_users` ventanas
+    (se expulsa la usada hace más tiempo).
+    """
+
+    def __init__(self, window: float, max_messages: int, max_mentions: int, max_links: int,
+                 max_users: int, idle_ttl: float):
+        self.window = window
+        self.max_messages = max_messages
+        self.max_mentions = max_mentions
+        self.max_links = max_links
+        self.max_users = max_users
+        self.idle_ttl = idle_ttl
+        self.users = OrderedDict()
+
+    def check(self, key, mentions: int = 0, links: int = 0, now: float = None):
+        """
+        Registra un mensaje y devuelve el motivo si se supera algún umbral (o None).
+        """
+        now = time.monotonic() if now is None else now
+        users = self.users
+
+        user = users.get(key)
+        if user is None:
+            user = users[key] = UserWindow(self.max_messages + 1)
+        else:
+            users.move_to_end(key)
+        user.add(now, self.window, mentions, links)
+
+        self._evict(now)
+
+        if len(user.entries) > self.max_messages:
+            return f"{len(user.entries)} mensajes en {self.window:g} segundos"
+        if user.mentions > self.max_mentions:
+            return f"{user.mentions} menciones en {self.window:g} segundos"
+        if user.links > self.max_links:
+            return f"{user.links} enlaces en {self.window:g} segundos"
+        return None
+
+    def reset(self, key) -> None:
+        self.users.pop(key, None)
+
+    def _evict(self, now: float) -> None:
+        users = self.users
+        while len(users) > self.max_users:
+            users.popitem(last=False)
+        cutoff = now - self.idle_ttl
+        while users:
+            oldest = next(iter(users.values()))
+            if oldest.last_seen >= cutoff:
+                break
+            users.popitem(last=False)
+
+
+def count_links(content: str) -> int:
+    return len(LINK_PATTERN.findall(content))
@@ -0,0 +1,132 @@
+# Registro de casos de moderación (sanciones) indexado por usuario, moderador y fecha
+import asyncio
+import time
+from typing import Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    case_id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    moderator_id INTEGER,
+    action TEXT NOT NULL,
+    reason TEXT,
+    created_at REAL NOT NULL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_cases_user ON cases (guild_id, user_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_cases_moderator ON cases (guild_id, moderator_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_cases_created ON cases (created_at);
+"""
+
+# Nombre legible de cada tipo de sanción
+ACTION_LABELS = {
+    "kick": "👢 Expulsión",
+    "ban": "🔨 Baneo",
+    "tempban": "⏳ Baneo temporal",
+    "unban": "🔓 Desbaneo",
+    "timeout": "🔇 Aislamiento",
+}
+
+# Casos acumulados que fuerzan una escritura inmediata
+FLUSH_BATCH_SIZE = 100
+
+# Tiempo máximo (en segundos) que un caso espera en memoria antes de escribirse
+FLUSH_INTERVAL = 2.0
+
+
+class CaseStore:
+    """
+    Casos de moderación en SQLite con escritura por lotes.
+
+    Los IDs se asignan en memoria al registrar el caso, y las filas se
+    escriben fuera del event loop en una sola transacción por lote, así que
+    un baneo masivo no espera al disco por cada usuario. Las consultas
+    vacían antes la cola para ver siempre los casos recientes.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.next_id = 1
+        self.queue = []
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._flush_lock = asyncio.Lock()
+
+    async def setup(self) -> None:
+        await self.db.executescript(SCHEMA)
+        row = await self.db.fetchone("SELECT COALESCE(MAX(case_id), 0) AS last_id FROM cases")
+        self.next_id = row["last_id"] + 1
+        self._task = asyncio.create_task(self._writer())
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    def record(self, guild_id: int, user_id: int, moderator_id: Optional[int], action: str,
+               reason: Optional[str], expires_at: Optional[float] = None) -> int:
+        """Registra un caso y devuelve su ID (la escritura a disco se hace por lotes)"""
+        case_id = self.next_id
+        self.next_id += 1
+        self.queue.append((case_id, guild_id, user_id, moderator_id, action, reason, time.time(), expires_at))
+        if len(self.queue) >= FLUSH_BATCH_SIZE:
+            self._wakeup.set()
+        return case_id
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            if not self.queue:
+                return
+            rows, self.queue = self.queue, []
+            try:
+                await self.db.executemany(
+                    """
+                    INSERT INTO cases (case_id, guild_id, user_id, moderator_id, action, reason, created_at, expires_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    rows,
+                )
+            except Exception:
+                # Devolver el lote a la cola para reintentarlo en el siguiente flush
+                self.queue[:0] = rows
+                raise
+
+    async def _writer(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"❌ Error al guardar casos de moderación: {e}")
+
+    async def get(self, guild_id: int, case_id: int):
+        await self.flush()
+        return await self.db.fetchone(
+            "SELECT * FROM cases WHERE guild_id = ? AND case_id = ?",
+            (guild_id, case_id),
+        )
+
+    async def count_for_user(self, guild_id: int, user_id: int) -> int:
+        await self.flush()
+        row = await self.db.fetchone(
+            "SELECT COUNT(*) AS total FROM cases WHERE guild_id = ? AND user_id = ?",
+            (guild_id, user_id),
+        )
+        return row["total"]
+
+    async def history(self, guild_id: int, user_id: int, limit: int, offset: int = 0) -> list:
+        """Casos de un usuario, del más reciente al más antiguo (usa idx_cases_user)"""
+        await self.flush()
+        return await self.db.fetchall(
+            """
+            SELECT * FROM cases WHERE guild_id = ? AND user_id = ?
+            ORDER BY created_at DESC LIMIT ? OFFSET ?
+            """,
+            (guild_id, user_id, limit, offset),
+        )
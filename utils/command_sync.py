@@ -0,0 +1,44 @@
+# Sincronización idempotente de los slash commands
+import hashlib
+import json
+import discord
+from utils.state import load_json, save_json
+from config.config import COMMAND_SYNC_STATE_FILE
+
+
+def command_tree_hash(tree: discord.app_commands.CommandTree, guild=None) -> str:
+    """Calcula un hash estable del árbol de comandos serializado"""
+    payload = [command.to_dict(tree) for command in tree.get_commands(guild=guild)]
+    payload.sort(key=lambda c: (c.get("type", 1), c["name"]))
+    serialized = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+async def sync_command_tree(bot, force: bool = False, guild_id: int = None) -> bool:
+    """
+    Sincroniza los slash commands solo si el árbol cambió desde la última vez.
+
+    force: sincroniza aunque el hash coincida
+    guild_id: copia los comandos globales a ese servidor y sincroniza solo ahí
+    (se propaga al instante, útil para desarrollo)
+
+    Devuelve True si se llamó a la API de Discord.
+    """
+    guild = discord.Object(id=guild_id) if guild_id else None
+    scope = f"guild:{guild_id}" if guild_id else "global"
+
+    if guild:
+        bot.tree.copy_global_to(guild=guild)
+
+    current_hash = command_tree_hash(bot.tree, guild=guild)
+    state = load_json(COMMAND_SYNC_STATE_FILE, default={})
+
+    if not force and state.get(scope) == current_hash:
+        print(f"✅ Comandos slash sin cambios ({scope}), no se sincroniza")
+        return False
+
+    synced = await bot.tree.sync(guild=guild)
+    state[scope] = current_hash
+    save_json(COMMAND_SYNC_STATE_FILE, state)
+    print(f"✅ {len(synced)} comando(s) slash sincronizado(s) ({scope})")
+    return True
@@ -0,0 +1,74 @@
+# Base de datos SQLite local (modo WAL) accedida fuera del event loop
+import asyncio
+import os
+import sqlite3
+import threading
+from config.config import DATABASE_PATH
+
+
+class Database:
+    """
+    Conexión SQLite compartida.
+
+    Todas las consultas se ejecutan en un hilo con asyncio.to_thread para no
+    bloquear el event loop; un lock serializa el acceso a la conexión.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn = conn
+        return self._conn
+
+    def _run(self, func):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                return func(conn)
+
+    async def execute(self, sql: str, params=()) -> int:
+        """Ejecuta una sentencia y devuelve el lastrowid"""
+        return await asyncio.to_thread(self._run, lambda conn: conn.execute(sql, params).lastrowid)
+
+    async def executemany(self, sql: str, rows) -> None:
+        """Ejecuta una sentencia para muchas filas en una sola transacción"""
+        rows = list(rows)
+        await asyncio.to_thread(self._run, lambda conn: conn.executemany(sql, rows))
+
+    async def executescript(self, script: str) -> None:
+        """Ejecuta varias sentencias (por ejemplo, la creación del esquema)"""
+        await asyncio.to_thread(self._run, lambda conn: conn.executescript(script))
+
+    async def fetchone(self, sql: str, params=()):
+        return await asyncio.to_thread(self._run, lambda conn: conn.execute(sql, params).fetchone())
+
+    async def fetchall(self, sql: str, params=()) -> list:
+        return await asyncio.to_thread(self._run, lambda conn: conn.execute(sql, params).fetchall())
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_database = None
+
+
+def get_database() -> Database:
+    """Devuelve la base de datos compartida por todos los cogs"""
+    global _database
+    if _database is None:
+        _database = Database(DATABASE_PATH)
+    return _database
@@ -0,0 +1,192 @@
+# Cola compartida de mensajes privados (DMs) con workers en segundo plano
+import asyncio
+import contextvars
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import discord
+
+from utils.join_guard import TokenBucket
+from utils.metrics import REGISTRY
+from config.config import (
+    DM_OUTBOX_WORKERS,
+    DM_OUTBOX_MAX_QUEUE,
+    DM_OUTBOX_MAX_RETRIES,
+    DM_OUTBOX_OPEN_RATE,
+    DM_OUTBOX_CLOSED_TTL,
+)
+
+# Código de error de Discord: "Cannot send messages to this user" (DMs cerrados)
+CANNOT_MESSAGE_USER = 50007
+
+# Espera base (en segundos) del backoff exponencial ante 429/5xx
+RETRY_BASE_DELAY = 1.0
+
+# Mensajes por segundo a un mismo canal privado
+DM_CHANNEL_RATE = 1.0
+
+
+@dataclass
+class OutgoingDM:
+    user: discord.abc.User
+    kwargs: dict
+    label: str
+    future: asyncio.Future = field(repr=False)
+
+
+class DMOutbox:
+    """
+    Envía DMs desde una cola con un número fijo de workers.
+
+    Quien encola recibe un Future que se resuelve a True si el DM se
+    entregó (o False si no), así que puede seguir sin esperar. Cada ruta
+    tiene su cubo de fichas: abrir canales privados nuevos es una ruta
+    compartida y cada canal privado ya abierto tiene la suya. Los usuarios
+    con los DMs cerrados (error 50007) se recuerdan durante un tiempo para
+    no repetir la llamada REST.
+    """
+
+    def __init__(self, workers: int = DM_OUTBOX_WORKERS, max_queue: int = DM_OUTBOX_MAX_QUEUE,
+                 max_retries: int = DM_OUTBOX_MAX_RETRIES, closed_ttl: float = DM_OUTBOX_CLOSED_TTL):
+        self.workers = workers
+        self.max_retries = max_retries
+        self.closed_ttl = closed_ttl
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.tasks = []
+        # {user_id: momento en que caduca} de los usuarios con los DMs cerrados
+        self.closed = {}
+        self.routes = {}
+
+        REGISTRY.register_gauge(
+            "dorrdbot_dm_outbox_queue_depth", "DMs esperando en la cola de envío", self.queue.qsize
+        )
+        REGISTRY.register_gauge(
+            "dorrdbot_dm_outbox_closed_users", "Usuarios recordados con los DMs cerrados", lambda: len(self.closed)
+        )
+
+    def start(self) -> None:
+        """Arranca los workers (main.py lo hace antes de conectar, fuera de cualquier handler)"""
+        if self.tasks:
+            return
+        # Cada worker empieza con un contexto vacío: si heredara el del handler
+        # que envió el primer DM, todas sus llamadas REST se le atribuirían
+        self.tasks = [
+            asyncio.create_task(self._worker(), context=contextvars.Context())
+            for _ in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+
+    def is_closed(self, user_id: int) -> bool:
+        expires_at = self.closed.get(user_id)
+        if expires_at is None:
+            return False
+        if expires_at <= time.monotonic():
+            del self.closed[user_id]
+            return False
+        return True
+
+    def _remember_closed(self, user_id: int) -> None:
+        now = time.monotonic()
+        # Purgar los caducados de vez en cuando para acotar la memoria
+        if len(self.closed) >= 10000:
+            self.closed = {uid: expires_at for uid, expires_at in self.closed.items() if expires_at > now}
+        self.closed[user_id] = now + self.closed_ttl
+
+    def send(self, user: discord.abc.User, label: str = "DM", **kwargs) -> asyncio.Future:
+        """
+        Encola un DM (mismos argumentos que user.send) y vuelve enseguida.
+
+        Devuelve un Future con True si el DM llega a entregarse.
+        """
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+
+        if self.is_closed(user.id):
+            REGISTRY.inc("dorrdbot_dm_outbox_skipped_closed_total", "DMs omitidos por tener el usuario los DMs cerrados")
+            future.set_result(False)
+            return future
+
+        try:
+            self.queue.put_nowait(OutgoingDM(user, kwargs, label, future))
+        except asyncio.QueueFull:
+            REGISTRY.inc("dorrdbot_dm_outbox_dropped_total", "DMs descartados por tener la cola llena")
+            print(f"⚠️ Cola de DMs llena: se descarta el DM de {label} a {user.name}")
+            future.set_result(False)
+        return future
+
+    async def _worker(self) -> None:
+        while True:
+            item = await self.queue.get()
+            try:
+                delivered = await self._deliver(item)
+            except Exception as e:
+                print(f"❌ Error inesperado al enviar DM de {item.label} a {item.user.name}: {e}")
+                delivered = False
+            finally:
+                self.queue.task_done()
+            if not item.future.done():
+                item.future.set_result(delivered)
+
+    async def _wait_route(self, user: discord.abc.User) -> None:
+        """Espera una ficha de la ruta del DM (abrir canal privado o canal ya abierto)"""
+        dm_channel = user.dm_channel
+        if dm_channel is None:
+            key, rate = "open", DM_OUTBOX_OPEN_RATE
+        else:
+            key, rate = dm_channel.id, DM_CHANNEL_RATE
+
+        now = time.monotonic()
+        bucket = self.routes.get(key)
+        if bucket is None:
+            bucket = self.routes[key] = TokenBucket(1, rate, now)
+        while not bucket.take(now):
+            await asyncio.sleep((1 - bucket.tokens) / bucket.rate)
+            now = time.monotonic()
+
+        # Los canales privados ya abiertos no necesitan conservar su cubo mucho tiempo
+        if len(self.routes) > 1000:
+            self.routes = {route: b for route, b in self.routes.items() if not b.is_full(now)}
+
+    async def _deliver(self, item: OutgoingDM) -> bool:
+        user = item.user
+        for attempt in range(self.max_retries + 1):
+            if self.is_closed(user.id):
+                return False
+            await self._wait_route(user)
+            try:
+                await user.send(**item.kwargs)
+                REGISTRY.inc("dorrdbot_dm_outbox_sent_total", "DMs entregados")
+                print(f"✅ DM de {item.label} enviado a {user.name}")
+                return True
+            except discord.Forbidden as e:
+                if e.code == CANNOT_MESSAGE_USER:
+                    self._remember_closed(user.id)
+                print(f"⚠️ No se pudo enviar DM de {item.label} a {user.name} (DMs deshabilitados)")
+                REGISTRY.inc("dorrdbot_dm_outbox_failed_total", "DMs que no se pudieron entregar")
+                return False
+            except discord.HTTPException as e:
+                if (e.status == 429 or e.status >= 500) and attempt < self.max_retries:
+                    await asyncio.sleep(RETRY_BASE_DELAY * 2 ** attempt + random.random())
+                    continue
+                print(f"❌ Error al enviar DM de {item.label} a {user.name}: {e}")
+                REGISTRY.inc("dorrdbot_dm_outbox_failed_total", "DMs que no se pudieron entregar")
+                return False
+        return False
+
+
+_outbox: Optional[DMOutbox] = None
+
+
+def get_dm_outbox() -> DMOutbox:
+    """Cola de DMs compartida por todo el bot"""
+    global _outbox
+    if _outbox is None:
+        _outbox = DMOutbox()
+    return _outbox
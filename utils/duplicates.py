@@ -0,0 +1,235 @@
+# Detección de mensajes duplicados entre canales (raids que pegan el mismo texto)
+import itertools
+import re
+import time
+import unicodedata
+from collections import Counter, deque
+
+# Palabras ancla de cada texto: las ANCHOR_WORDS más largas (de al menos
+# ANCHOR_MIN_LENGTH letras). Dos textos son candidatos a casi idénticos si
+# comparten todas sus anclas menos una; solo entonces se calcula el SimHash
+ANCHOR_WORDS = 4
+ANCHOR_MIN_LENGTH = 4
+
+# Candidatos que se comparan como mucho por mensaje (anclas formadas por palabras muy comunes)
+MAX_CANDIDATES = 16
+
+# Longitud de los fragmentos de texto (en caracteres) que alimentan el SimHash
+SHINGLE_SIZE = 5
+
+# Máximo de fragmentos por mensaje (los contadores por bit son de un byte)
+MAX_SHINGLES = 255
+
+# Solo se suman al SimHash los fragmentos cuyo hash tiene este bit a 0 (la mitad).
+# La elección depende del contenido, así que dos copias eligen los mismos
+# fragmentos y el SimHash cuesta la mitad
+SAMPLE_BIT = 1 << 40
+
+HASH_MASK = (1 << 64) - 1
+LANE_MASK = 0x0101010101010101
+
+# Caracteres invisibles que se usan para esquivar filtros de texto idéntico
+INVISIBLE_PATTERN = re.compile(r"[\u200b-\u200f\u2060\ufeff]")
+COMBINING_PATTERN = re.compile(r"[\u0300-\u036f]")
+PUNCTUATION_PATTERN = re.compile(r"[^\w\s:/.]")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize(content: str) -> str:
+    """Minúsculas, sin acentos, sin caracteres invisibles ni puntuación decorativa"""
+    text = content.lower()
+    # La mayoría de mensajes son ASCII y no tienen acentos que quitar
+    if not text.isascii():
+        text = COMBINING_PATTERN.sub("", unicodedata.normalize("NFKD", text))
+    text = INVISIBLE_PATTERN.sub("", text)
+    text = PUNCTUATION_PATTERN.sub(" ", text)
+    return WHITESPACE_PATTERN.sub(" ", text).strip()
+
+
+def _hash64(data: str) -> int:
+    # hash() de Python basta: la tabla solo vive en memoria de este proceso
+    return hash(data) & HASH_MASK
+
+
+def simhash(text: str) -> int:
+    """SimHash de 64 bits sobre (la mitad de) los 5-gramas de caracteres"""
+    shingles = {text[i:i + SHINGLE_SIZE] for i in range(max(1, min(len(text), MAX_SHINGLES) - SHINGLE_SIZE + 1))}
+    hashes = [value for value in map(hash, shingles) if not value & SAMPLE_BIT]
+    if not hashes:
+        hashes = [hash(shingle) for shingle in shingles]
+
+    # Contadores por bit empaquetados en 8 carriles: cada byte de un carril cuenta un bit
+    l0 = l1 = l2 = l3 = l4 = l5 = l6 = l7 = 0
+    for v in hashes:
+        v &= HASH_MASK
+        l0 += v & LANE_MASK
+        l1 += v >> 1 & LANE_MASK
+        l2 += v >> 2 & LANE_MASK
+        l3 += v >> 3 & LANE_MASK
+        l4 += v >> 4 & LANE_MASK
+        l5 += v >> 5 & LANE_MASK
+        l6 += v >> 6 & LANE_MASK
+        l7 += v >> 7 & LANE_MASK
+
+    half = len(hashes) // 2
+    result = 0
+    for offset, lane in enumerate((l0, l1, l2, l3, l4, l5, l6, l7)):
+        for byte, count in enumerate(lane.to_bytes(8, "little")):
+            if count > half:
+                result |= 1 << (byte * 8 + offset)
+    return result
+
+
+def anchor_keys(text: str) -> list:
+    """
+    Claves del texto en el índice de casi idénticos: cada combinación de sus
+    anclas menos una. Las anclas son las palabras más largas, que son las
+    menos comunes y no cambian al añadir un sufijo corto o una letra suelta.
+    """
+    words = {word for word in text.split() if len(word) >= ANCHOR_MIN_LENGTH}
+    if len(words) < 2:
+        return []
+    hashes = sorted((-len(word), hash(word)) for word in words)
+    anchors = sorted(value for _, value in hashes[:ANCHOR_WORDS])
+    return list(itertools.combinations(anchors, max(2, len(anchors) - 1)))
+
+
+class Cluster:
+    """Copias recientes de un mismo contenido (exacto o casi idéntico)"""
+
+    __slots__ = ("key", "text", "anchors", "simhash", "sightings", "authors", "channels", "flagged")
+
+    def __init__(self, key: int, text: str, anchors: list):
+        self.key = key
+        # Texto normalizado de la primera copia; su SimHash se calcula solo si hace falta
+        self.text = text
+        self.anchors = anchors
+        self.simhash = None
+        # (marca de tiempo, channel_id, message_id, author_id) en orden de llegada
+        self.sightings = deque()
+        self.authors = Counter()
+        self.channels = Counter()
+        self.flagged = False
+
+    def add(self, sighting: tuple) -> None:
+        self.sightings.append(sighting)
+        self.channels[sighting[1]] += 1
+        self.authors[sighting[3]] += 1
+
+    def pop_oldest(self) -> None:
+        _, channel_id, _, author_id = self.sightings.popleft()
+        for counter, key in ((self.channels, channel_id), (self.authors, author_id)):
+            counter[key] -= 1
+            if not counter[key]:
+                del counter[key]
+
+
+class DuplicateDetector:
+    """
+    Tabla acotada en tiempo y memoria de las huellas de los mensajes recientes.
+
+    Cada mensaje se une al grupo de su hash exacto o, si no existe, al de un
+    texto casi idéntico: SimHash a distancia <= `max_distance`. El SimHash es
+    lo caro, así que solo se calcula para los grupos que comparten con el
+    mensaje un par de palabras ancla y tienen una longitud parecida; la
+    conversación normal casi nunca pasa ese filtro. Un grupo queda marcado
+    cuando el mismo contenido aparece desde `max_accounts` cuentas o en
+    `max_channels` canales dentro de la ventana.
+
+    Con `fuzzy=False` solo se agrupan las copias exactas tras normalizar.
+    """
+
+    def __init__(self, window: float, max_accounts: int, max_channels: int, max_entries: int,
+                 min_length: int = 20, max_distance: int = 7, fuzzy: bool = True):
+        self.window = window
+        self.max_accounts = max_accounts
+        self.max_channels = max_channels
+        self.max_entries = max_entries
+        self.min_length = min_length
+        self.max_distance = max_distance
+        self.fuzzy = fuzzy
+        self.clusters = {}
+        # {par de anclas: claves de los grupos que lo tienen}
+        self.anchors = {}
+        # (marca de tiempo, clave del grupo) de cada copia, para caducarlas en orden
+        self.timeline = deque()
+
+    def __len__(self) -> int:
+        return len(self.timeline)
+
+    def check(self, channel_id: int, message_id: int, author_id: int, content: str, now: float = None):
+        """
+        Registra un mensaje. Si su grupo está (o acaba de quedar) marcado,
+        devuelve las copias pendientes de borrar como [(channel_id, message_id)].
+        """
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+
+        text = normalize(content)
+        if len(text) < self.min_length:
+            return None
+
+        key = _hash64(text)
+        cluster = self.clusters.get(key)
+        if cluster is None and self.fuzzy:
+            anchors = anchor_keys(text)
+            cluster = self._find_similar(text, anchors)
+            if cluster is None:
+                cluster = self.clusters[key] = Cluster(key, text, anchors)
+                for anchor in anchors:
+                    self.anchors.setdefault(anchor, set()).add(key)
+        elif cluster is None:
+            cluster = self.clusters[key] = Cluster(key, text, [])
+
+        cluster.add((now, channel_id, message_id, author_id))
+        self.timeline.append((now, cluster.key))
+
+        if cluster.flagged:
+            return [(channel_id, message_id)]
+        if len(cluster.authors) >= self.max_accounts or len(cluster.channels) >= self.max_channels:
+            cluster.flagged = True
+            return [(sighting[1], sighting[2]) for sighting in cluster.sightings]
+        return None
+
+    def _find_similar(self, text: str, anchors: list):
+        clusters = self.clusters
+        # A distancia <= 7 de 64 bits las longitudes apenas cambian (sufijos, letras sueltas)
+        length = len(text)
+        slack = length // 4 + SHINGLE_SIZE
+        signature = None
+        seen = set()
+        for anchor in anchors:
+            keys = self.anchors.get(anchor)
+            if not keys:
+                continue
+            for key in keys:
+                if key in seen:
+                    continue
+                seen.add(key)
+                if len(seen) > MAX_CANDIDATES:
+                    return None
+                cluster = clusters[key]
+                if abs(len(cluster.text) - length) > slack:
+                    continue
+                if signature is None:
+                    signature = simhash(text)
+                if cluster.simhash is None:
+                    cluster.simhash = simhash(cluster.text)
+                if (cluster.simhash ^ signature).bit_count() <= self.max_distance:
+                    return cluster
+        return None
+
+    def _expire(self, now: float) -> None:
+        timeline = self.timeline
+        cutoff = now - self.window
+        while timeline and (timeline[0][0] < cutoff or len(timeline) >= self.max_entries):
+            _, key = timeline.popleft()
+            cluster = self.clusters[key]
+            cluster.pop_oldest()
+            if not cluster.sightings:
+                del self.clusters[key]
+                for anchor in cluster.anchors:
+                    keys = self.anchors[anchor]
+                    keys.discard(key)
+                    if not keys:
+                        del self.anchors[anchor]
@@ -0,0 +1,62 @@
+# Servidor HTTP asíncrono para healthchecks del bot
+import math
+from aiohttp import web
+from config.config import HTTP_HOST, HTTP_PORT, READY_MAX_LATENCY
+
+
+class HealthServer:
+    """Servidor HTTP que corre en el mismo event loop que el bot"""
+
+    def __init__(self, bot, host: str = HTTP_HOST, port: int = HTTP_PORT):
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self.app = web.Application()
+        self.runner = None
+
+        self.app.router.add_get("/", self.home)
+        self.app.router.add_get("/healthz", self.healthz)
+        self.app.router.add_get("/readyz", self.readyz)
+
+    def add_route(self, path: str, handler) -> None:
+        """Registra una ruta GET adicional (debe llamarse antes de start)"""
+        self.app.router.add_get(path, handler)
+
+    async def home(self, request: web.Request) -> web.Response:
+        return web.Response(text="✅ Bot activo")
+
+    async def healthz(self, request: web.Request) -> web.Response:
+        """El proceso está vivo y el event loop responde"""
+        return web.Response(text="ok")
+
+    async def readyz(self, request: web.Request) -> web.Response:
+        """El gateway está conectado, la caché de servidores lista y la latencia es aceptable"""
+        latency = self.bot.latency
+        checks = {
+            "gateway": not self.bot.is_closed() and self.bot.ws is not None,
+            "guild_cache": self.bot.is_ready(),
+            "latency": math.isfinite(latency) and latency < READY_MAX_LATENCY,
+        }
+        ready = all(checks.values())
+
+        payload = {
+            "ready": ready,
+            "checks": checks,
+            "latency_ms": round(latency * 1000, 1) if math.isfinite(latency) else None,
+            "guilds": len(self.bot.guilds),
+        }
+        return web.json_response(payload, status=200 if ready else 503)
+
+    async def start(self) -> None:
+        """Inicia el servidor sin bloquear el event loop"""
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+        print(f"✅ Servidor HTTP iniciado en puerto {self.port}")
+
+    async def stop(self) -> None:
+        """Detiene el servidor y libera el puerto"""
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
@@ -0,0 +1,74 @@
+# Vigilancia del ritmo de entradas al servidor (detección de raids por volumen)
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """Cubo de fichas: admite ráfagas de `capacity` y se recarga a `rate` fichas por segundo"""
+
+    __slots__ = ("capacity", "rate", "tokens", "updated")
+
+    def __init__(self, capacity: float, rate: float, now: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self, now: float) -> bool:
+        self.refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def is_full(self, now: float) -> bool:
+        self.refill(now)
+        return self.tokens >= self.capacity
+
+
+class JoinRateMonitor:
+    """
+    Ritmo de entradas por servidor con un cubo de fichas.
+
+    Cuando una entrada no encuentra ficha el servidor pasa a modo bloqueo.
+    El bloqueo se puede levantar cuando lleva `calm_period` segundos sin
+    desbordarse y el cubo ha vuelto a llenarse (el ritmo se normalizó).
+    """
+
+    def __init__(self, burst: int, per_minute: float, calm_period: float):
+        self.burst = burst
+        self.rate = per_minute / 60
+        self.calm_period = calm_period
+        self.buckets = {}
+        # {guild_id: momento del último desbordamiento} de los servidores bloqueados
+        self.lockdowns = {}
+
+    def record_join(self, guild_id: int, now: Optional[float] = None) -> bool:
+        """Registra una entrada; devuelve True si esta entrada activa el bloqueo"""
+        now = time.monotonic() if now is None else now
+        bucket = self.buckets.get(guild_id)
+        if bucket is None:
+            bucket = self.buckets[guild_id] = TokenBucket(self.burst, self.rate, now)
+
+        if bucket.take(now):
+            return False
+        started = guild_id not in self.lockdowns
+        self.lockdowns[guild_id] = now
+        return started
+
+    def in_lockdown(self, guild_id: int) -> bool:
+        return guild_id in self.lockdowns
+
+    def should_resume(self, guild_id: int, now: Optional[float] = None) -> bool:
+        now = time.monotonic() if now is None else now
+        last_overflow = self.lockdowns.get(guild_id)
+        if last_overflow is None:
+            return False
+        return now - last_overflow >= self.calm_period and self.buckets[guild_id].is_full(now)
+
+    def end_lockdown(self, guild_id: int) -> None:
+        self.lockdowns.pop(guild_id, None)
@@ -0,0 +1,208 @@
+# Métricas de latencia, errores y llamadas REST por handler (formato Prometheus)
+import bisect
+import contextvars
+import functools
+import time
+import discord
+from aiohttp import web
+
+# Límites (en segundos) de los buckets del histograma de latencia
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Límites de los buckets del histograma de llamadas REST por invocación
+REST_CALLS_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+
+class Histogram:
+    """Histograma acumulativo compatible con Prometheus"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> list:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class HandlerContext:
+    """Estado de la invocación en curso de un handler"""
+
+    __slots__ = ("kind", "name", "rest_calls")
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+        self.rest_calls = 0
+
+
+# Handler que se está ejecutando en la tarea actual (None fuera de un handler)
+_current_handler = contextvars.ContextVar("current_handler", default=None)
+
+
+class MetricsRegistry:
+    """Registro en memoria de todas las métricas del bot"""
+
+    def __init__(self):
+        self.latency = {}
+        self.rest_per_call = {}
+        self.calls = {}
+        self.errors = {}
+        self.rest_calls = {}
+        self.rest_errors = {}
+        self.counters = {}
+        self.gauges = {}
+
+    def observe_handler(self, ctx: HandlerContext, elapsed: float, failed: bool) -> None:
+        key = (ctx.kind, ctx.name)
+        if key not in self.latency:
+            self.latency[key] = Histogram(LATENCY_BUCKETS)
+            self.rest_per_call[key] = Histogram(REST_CALLS_BUCKETS)
+        self.latency[key].observe(elapsed)
+        self.rest_per_call[key].observe(ctx.rest_calls)
+        self.calls[key] = self.calls.get(key, 0) + 1
+        if failed:
+            self.errors[key] = self.errors.get(key, 0) + 1
+
+    def count_rest_call(self, ctx, method: str) -> None:
+        key = (ctx.kind, ctx.name, method) if ctx else ("none", "none", method)
+        self.rest_calls[key] = self.rest_calls.get(key, 0) + 1
+
+    def count_rest_error(self, ctx, status) -> None:
+        key = (ctx.kind, ctx.name, str(status)) if ctx else ("none", "none", str(status))
+        self.rest_errors[key] = self.rest_errors.get(key, 0) + 1
+
+    def inc(self, name: str, help_text: str, amount: int = 1) -> None:
+        """Incrementa un contador genérico sin etiquetas"""
+        value, _ = self.counters.get(name, (0, help_text))
+        self.counters[name] = (value + amount, help_text)
+
+    def register_gauge(self, name: str, help_text: str, getter) -> None:
+        """Registra un gauge cuyo valor se lee al generar la salida"""
+        self.gauges[name] = (getter, help_text)
+
+    def render(self) -> str:
+        """Genera la salida en formato de texto de Prometheus"""
+        lines = [
+            "# HELP dorrdbot_handler_latency_seconds Latencia de cada handler",
+            "# TYPE dorrdbot_handler_latency_seconds histogram",
+        ]
+        for (kind, name), histogram in sorted(self.latency.items()):
+            lines += histogram.render("dorrdbot_handler_latency_seconds", f'kind="{kind}",handler="{name}"')
+
+        lines += [
+            "# HELP dorrdbot_handler_rest_calls Llamadas REST a Discord por invocación",
+            "# TYPE dorrdbot_handler_rest_calls histogram",
+        ]
+        for (kind, name), histogram in sorted(self.rest_per_call.items()):
+            lines += histogram.render("dorrdbot_handler_rest_calls", f'kind="{kind}",handler="{name}"')
+
+        lines += [
+            "# HELP dorrdbot_handler_calls_total Invocaciones de cada handler",
+            "# TYPE dorrdbot_handler_calls_total counter",
+        ]
+        for (kind, name), value in sorted(self.calls.items()):
+            lines.append(f'dorrdbot_handler_calls_total{{kind="{kind}",handler="{name}"}} {value}')
+
+        lines += [
+            "# HELP dorrdbot_handler_errors_total Excepciones no capturadas en cada handler",
+            "# TYPE dorrdbot_handler_errors_total counter",
+        ]
+        for (kind, name), value in sorted(self.errors.items()):
+            lines.append(f'dorrdbot_handler_errors_total{{kind="{kind}",handler="{name}"}} {value}')
+
+        lines += [
+            "# HELP dorrdbot_discord_rest_calls_total Llamadas REST a Discord por handler",
+            "# TYPE dorrdbot_discord_rest_calls_total counter",
+        ]
+        for (kind, name, method), value in sorted(self.rest_calls.items()):
+            lines.append(
+                f'dorrdbot_discord_rest_calls_total{{kind="{kind}",handler="{name}",method="{method}"}} {value}'
+            )
+
+        lines += [
+            "# HELP dorrdbot_discord_rest_errors_total Llamadas REST fallidas por handler",
+            "# TYPE dorrdbot_discord_rest_errors_total counter",
+        ]
+        for (kind, name, status), value in sorted(self.rest_errors.items()):
+            lines.append(
+                f'dorrdbot_discord_rest_errors_total{{kind="{kind}",handler="{name}",status="{status}"}} {value}'
+            )
+
+        for name, (value, help_text) in sorted(self.counters.items()):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter", f"{name} {value}"]
+
+        for name, (getter, help_text) in sorted(self.gauges.items()):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {getter()}"]
+
+        return "\n".join(lines) + "\n"
+
+
+# Registro global compartido por todos los módulos
+REGISTRY = MetricsRegistry()
+
+
+def instrumented(kind: str, name: str):
+    """
+    Decorador que mide latencia, errores y llamadas REST de un handler.
+
+    kind: "command", "listener" o "ui"
+    Debe colocarse debajo de los decoradores de discord.py.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            ctx = HandlerContext(kind, name)
+            token = _current_handler.set(ctx)
+            start = time.perf_counter()
+            failed = False
+            try:
+                return await func(*args, **kwargs)
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                _current_handler.reset(token)
+                REGISTRY.observe_handler(ctx, time.perf_counter() - start, failed)
+
+        return wrapper
+
+    return decorator
+
+
+def install_rest_hook(bot) -> None:
+    """Envuelve el cliente HTTP del bot para contar las llamadas REST de cada handler"""
+    original_request = bot.http.request
+
+    async def request(route, *args, **kwargs):
+        ctx = _current_handler.get()
+        if ctx is not None:
+            ctx.rest_calls += 1
+        REGISTRY.count_rest_call(ctx, route.method)
+        try:
+            return await original_request(route, *args, **kwargs)
+        except discord.HTTPException as e:
+            REGISTRY.count_rest_error(ctx, e.status)
+            raise
+
+    bot.http.request = request
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    """Endpoint /metrics del servidor HTTP"""
+    return web.Response(text=REGISTRY.render(), content_type="text/plain", charset="utf-8")
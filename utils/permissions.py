@@ -0,0 +1,70 @@
+# Capa de autorización compartida: capacidades con nombre y caché por miembro
+import discord
+from discord import app_commands
+from config.config import CAPABILITY_ROLE_IDS, CAPABILITY_ADMINISTRATOR
+
+# Capacidades disponibles
+MODERATE = "moderate"
+CLOSE_TICKET = "close_ticket"
+MANAGE_TICKET = "manage_ticket"
+APPROVE_SUGGESTION = "approve_suggestion"
+PRIVATE_SERIES = "private_series"
+
+# Caché de capacidades resueltas: {guild_id: {member_id: frozenset}}
+# Se invalida desde events/permissions.py cuando cambian los roles
+_cache = {}
+
+
+class MissingCapability(app_commands.CheckFailure):
+    """El miembro no tiene la capacidad que exige el comando"""
+
+    def __init__(self, capability: str, message: str):
+        super().__init__(message)
+        self.capability = capability
+        self.message = message
+
+
+def _resolve(member: discord.Member) -> frozenset:
+    role_ids = {role.id for role in member.roles}
+    capabilities = {
+        capability
+        for capability, allowed in CAPABILITY_ROLE_IDS.items()
+        if role_ids.intersection(allowed)
+    }
+    if member.guild_permissions.administrator:
+        capabilities.update(CAPABILITY_ADMINISTRATOR)
+    return frozenset(capabilities)
+
+
+def get_capabilities(member) -> frozenset:
+    """Capacidades del miembro, memoizadas hasta que cambien sus roles"""
+    if not isinstance(member, discord.Member):
+        return frozenset()
+    guild_cache = _cache.setdefault(member.guild.id, {})
+    capabilities = guild_cache.get(member.id)
+    if capabilities is None:
+        capabilities = guild_cache[member.id] = _resolve(member)
+    return capabilities
+
+
+def has_capability(member, capability: str) -> bool:
+    return capability in get_capabilities(member)
+
+
+def invalidate_member(guild_id: int, member_id: int) -> None:
+    _cache.get(guild_id, {}).pop(member_id, None)
+
+
+def invalidate_guild(guild_id: int) -> None:
+    _cache.pop(guild_id, None)
+
+
+def require(capability: str, message: str = "❌ No tienes permiso para usar este comando."):
+    """Check de app_commands que exige una capacidad (colocar bajo @app_commands.command)"""
+
+    async def predicate(interaction: discord.Interaction) -> bool:
+        if has_capability(interaction.user, capability):
+            return True
+        raise MissingCapability(capability, message)
+
+    return app_commands.check(predicate)
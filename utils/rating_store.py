@@ -0,0 +1,64 @@
+# Valoraciones de tickets pendientes de respuesta por DM
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pending_ratings (
+    user_id INTEGER PRIMARY KEY,
+    ticket_id INTEGER NOT NULL,
+    staff_id INTEGER NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+@dataclass
+class PendingRating:
+    """Valoración que espera la respuesta de un usuario"""
+
+    user_id: int
+    ticket_id: int
+    staff_id: int
+    expires_at: float
+
+    @property
+    def expired(self) -> bool:
+        return time.time() >= self.expires_at
+
+
+class RatingStore:
+    """
+    Valoraciones pendientes indexadas por user_id.
+
+    Se guardan en SQLite para sobrevivir a reinicios y en un dict para
+    resolver cada DM en O(1). Un usuario solo tiene una valoración pendiente
+    a la vez (la del último ticket cerrado).
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.pending = {}
+
+    async def setup(self) -> None:
+        await self.db.executescript(SCHEMA)
+        rows = await self.db.fetchall("SELECT * FROM pending_ratings")
+        self.pending = {row["user_id"]: PendingRating(**dict(row)) for row in rows}
+
+    def get(self, user_id: int) -> Optional[PendingRating]:
+        return self.pending.get(user_id)
+
+    async def add(self, user_id: int, ticket_id: int, staff_id: int, timeout: float) -> PendingRating:
+        rating = PendingRating(user_id, ticket_id, staff_id, time.time() + timeout)
+        self.pending[user_id] = rating
+        await self.db.execute(
+            "INSERT OR REPLACE INTO pending_ratings (user_id, ticket_id, staff_id, expires_at) VALUES (?, ?, ?, ?)",
+            (rating.user_id, rating.ticket_id, rating.staff_id, rating.expires_at),
+        )
+        return rating
+
+    async def remove(self, user_id: int) -> Optional[PendingRating]:
+        rating = self.pending.pop(user_id, None)
+        if rating:
+            await self.db.execute("DELETE FROM pending_ratings WHERE user_id = ?", (user_id,))
+        return rating
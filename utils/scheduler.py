@@ -0,0 +1,85 @@
+# Planificador de fechas límite con un único temporizador (min-heap)
+import asyncio
+import heapq
+import itertools
+import time
+
+
+class DeadlineScheduler:
+    """
+    Ejecuta `callback(key)` cuando vence la fecha límite de cada clave.
+
+    Todas las fechas se guardan en un min-heap y una sola tarea duerme hasta
+    la más próxima, en lugar de mantener una tarea por elemento. Reprogramar o
+    cancelar una clave es O(log n): las entradas obsoletas del heap se
+    descartan al llegar a la cima.
+    """
+
+    def __init__(self, callback, name: str = "scheduler"):
+        self.callback = callback
+        self.name = name
+        self.heap = []
+        self.deadlines = {}
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def __len__(self) -> int:
+        return len(self.deadlines)
+
+    def schedule(self, key, when: float) -> None:
+        """Programa (o reprograma) `key` para la marca de tiempo `when` (epoch)"""
+        self.deadlines[key] = when
+        heapq.heappush(self.heap, (when, next(self._counter), key))
+        if self.heap[0][2] == key:
+            self._wakeup.set()
+        self._compact()
+
+    def cancel(self, key) -> None:
+        self.deadlines.pop(key, None)
+
+    def get(self, key):
+        return self.deadlines.get(key)
+
+    def _compact(self) -> None:
+        """Reconstruye el heap si acumula demasiadas entradas obsoletas"""
+        if len(self.heap) > 64 and len(self.heap) > 2 * len(self.deadlines):
+            self.heap = [entry for entry in self.heap if self.deadlines.get(entry[2]) == entry[0]]
+            heapq.heapify(self.heap)
+
+    def _discard_stale(self) -> None:
+        while self.heap and self.deadlines.get(self.heap[0][2]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            self._discard_stale()
+            self._wakeup.clear()
+
+            if not self.heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = self.heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, key = heapq.heappop(self.heap)
+            del self.deadlines[key]
+            try:
+                await self.callback(key)
+            except Exception as e:
+                print(f"❌ Error en {self.name} procesando {key}: {e}")
@@ -0,0 +1,279 @@
+# Búsqueda de texto completo (índice invertido con BM25) sobre sugerencias y tickets
+import asyncio
+import gzip
+import heapq
+import json
+import math
+import os
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+from utils.duplicates import normalize
+from utils.similarity import STOPWORDS, stem
+from config.config import SEARCH_INDEX_FILE, SEARCH_COMPACT_AFTER
+
+# Tipos de documento indexados
+KIND_SUGGESTION = "suggestion"
+KIND_TICKET = "ticket"
+
+# Parámetros habituales de BM25: saturación de la frecuencia y normalización por longitud
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Versión del índice: cambia con el formato del archivo o con la forma de sacar
+# los términos (2: raíces sin plural). Una foto de otra versión se descarta y el
+# índice se reconstruye desde las sugerencias y los transcripts de los tickets
+INDEX_VERSION = 2
+
+# Letras del título guardado de cada documento
+TITLE_LENGTH = 100
+
+
+def terms(text: str) -> list:
+    """Raíces de las palabras del texto sin acentos (con repeticiones, para contar frecuencias)"""
+    return [
+        stem(word)
+        for word in normalize(text).split()
+        if len(word) >= 3 and word not in STOPWORDS
+    ]
+
+
+@dataclass
+class SearchResult:
+    kind: str
+    doc_id: int
+    channel_id: int
+    title: str
+    score: float
+
+
+def _read_index(path: str, journal_path: str) -> tuple:
+    """Lee la última foto del índice y los registros añadidos después (en un hilo)"""
+    snapshot = None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        if snapshot.get("version") != INDEX_VERSION:
+            print(f"⚠️ Índice de búsqueda de otra versión ({snapshot.get('version')}), se reconstruye: {path}")
+            snapshot = None
+    except FileNotFoundError:
+        pass
+    except (OSError, EOFError, json.JSONDecodeError) as e:
+        print(f"❌ Error leyendo el índice de búsqueda {path}: {e}")
+
+    records = []
+    try:
+        with gzip.open(journal_path, "rt", encoding="utf-8") as f:
+            for line in f:
+                records.append(json.loads(line))
+    except FileNotFoundError:
+        pass
+    except (OSError, EOFError, json.JSONDecodeError) as e:
+        # Un cierre a medias deja la última línea cortada: se conserva lo leído
+        print(f"⚠️ Diario del índice de búsqueda incompleto ({len(records)} registros leídos): {e}")
+    return snapshot, records
+
+
+def _append_records(journal_path: str, records: list) -> None:
+    directory = os.path.dirname(journal_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with gzip.open(journal_path, "at", encoding="utf-8") as f:
+        f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+
+
+class SearchIndex:
+    """
+    Índice invertido (término -> {documento: frecuencia}) ordenado con BM25.
+
+    Un documento es una sugerencia o un ticket entero: los mensajes nuevos
+    de un ticket se suman a su documento. En disco hay una foto comprimida
+    (las listas de documentos de cada término van en diferencias, que gzip
+    comprime muy bien) y un diario gzip con los textos añadidos desde
+    entonces. Añadir texto no necesita el índice en memoria: se apunta en
+    el diario, y el índice se lee la primera vez que alguien busca.
+    """
+
+    def __init__(self, path: str = SEARCH_INDEX_FILE, compact_after: int = SEARCH_COMPACT_AFTER):
+        self.path = path
+        self.journal_path = f"{path}.journal"
+        self.compact_after = compact_after
+        self.loaded = False
+        self.compacting = False
+        self.lock = asyncio.Lock()
+        # Documentos: [tipo, id, canal, título, longitud] con posición = número interno
+        self.docs = []
+        self.doc_numbers = {}
+        self.postings = {}
+        self.total_length = 0
+        # Registros aún no guardados en disco y los que esperan a que acabe una compactación
+        self.buffer = []
+        self.deferred = []
+        self.journal_records = 0
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def contains(self, kind: str, doc_id: int) -> bool:
+        return (kind, doc_id) in self.doc_numbers
+
+    def add(self, kind: str, doc_id: int, channel_id: int, text: str, title: str = "") -> None:
+        """Añade texto a un documento (lo crea si no existe); se guarda en disco con flush()"""
+        record = {"k": kind, "i": doc_id, "c": channel_id, "t": title[:TITLE_LENGTH], "x": text}
+        self.buffer.append(record)
+        if self.compacting:
+            self.deferred.append(record)
+        elif self.loaded:
+            self._apply(record)
+
+    def _apply(self, record: dict) -> None:
+        key = (record["k"], record["i"])
+        number = self.doc_numbers.get(key)
+        if number is None:
+            number = self.doc_numbers[key] = len(self.docs)
+            self.docs.append([record["k"], record["i"], record["c"], record["t"], 0])
+        elif not self.docs[number][3]:
+            self.docs[number][3] = record["t"]
+
+        counts = Counter(terms(record["x"]))
+        for term, frequency in counts.items():
+            postings = self.postings.setdefault(term, {})
+            postings[number] = postings.get(number, 0) + frequency
+        length = sum(counts.values())
+        self.docs[number][4] += length
+        self.total_length += length
+
+    def _load_snapshot(self, snapshot: dict) -> None:
+        self.docs = snapshot["docs"]
+        self.doc_numbers = {(doc[0], doc[1]): number for number, doc in enumerate(self.docs)}
+        self.total_length = sum(doc[4] for doc in self.docs)
+        self.postings = {}
+        for term, encoded in snapshot["postings"].items():
+            postings = {}
+            number = 0
+            for i in range(0, len(encoded), 2):
+                number += encoded[i]
+                postings[number] = encoded[i + 1]
+            self.postings[term] = postings
+
+    def _encode_snapshot(self) -> dict:
+        postings = {}
+        for term, documents in self.postings.items():
+            encoded = []
+            previous = 0
+            for number in sorted(documents):
+                encoded.append(number - previous)
+                encoded.append(documents[number])
+                previous = number
+            postings[term] = encoded
+        return {"version": INDEX_VERSION, "docs": self.docs, "postings": postings}
+
+    def _write_snapshot(self) -> None:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            json.dump(self._encode_snapshot(), f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, self.path)
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+    def _read(self) -> list:
+        # Se ejecuta en un hilo: mientras no está cargado nadie más toca el índice
+        snapshot, records = _read_index(self.path, self.journal_path)
+        if snapshot:
+            self._load_snapshot(snapshot)
+        return records
+
+    async def ensure_loaded(self) -> None:
+        """Lee el índice de disco la primera vez que hace falta (en un hilo)"""
+        if self.loaded:
+            return
+        async with self.lock:
+            if self.loaded:
+                return
+            records = await asyncio.to_thread(self._read)
+            self.journal_records = len(records)
+            # Lo del diario y lo que aún no llegó a disco, en orden de llegada
+            for record in records + self.buffer:
+                self._apply(record)
+            self.loaded = True
+            print(f"✅ Índice de búsqueda cargado ({len(self.docs)} documentos, {len(self.postings)} términos)")
+
+    async def flush(self) -> None:
+        """
+        Guarda los registros pendientes en el diario; con el índice en memoria
+        y el diario ya largo, escribe una foto nueva y vacía el diario.
+        """
+        async with self.lock:
+            if not self.buffer:
+                return
+            if self.loaded and self.journal_records + len(self.buffer) >= self.compact_after:
+                # Lo que llegue mientras se escribe espera en `deferred` para no tocar
+                # el índice que está leyendo el hilo
+                self.compacting = True
+                records, self.buffer = self.buffer, []
+                try:
+                    await asyncio.to_thread(self._write_snapshot)
+                    self.journal_records = 0
+                except Exception:
+                    # Sin foto nueva, lo añadido sigue sin estar en disco
+                    self.buffer = records + self.buffer
+                    raise
+                finally:
+                    self.compacting = False
+                    for record in self.deferred:
+                        self._apply(record)
+                    self.deferred = []
+                return
+
+            records, self.buffer = self.buffer, []
+            try:
+                await asyncio.to_thread(_append_records, self.journal_path, records)
+            except Exception:
+                self.buffer = records + self.buffer
+                raise
+            self.journal_records += len(records)
+
+    def search(self, query: str, kinds: Optional[set] = None, limit: int = 50) -> list:
+        """Documentos ordenados por BM25 (hay que llamar antes a ensure_loaded)"""
+        query_terms = set(terms(query))
+        if not query_terms or not self.docs:
+            return []
+
+        docs = self.docs
+        total_docs = len(docs)
+        average_length = self.total_length / total_docs or 1
+        k1, b = BM25_K1, BM25_B
+        scores = {}
+        for term in query_terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            frequency_in_docs = len(postings)
+            idf = math.log(1 + (total_docs - frequency_in_docs + 0.5) / (frequency_in_docs + 0.5))
+            for number, frequency in postings.items():
+                norm = k1 * (1 - b + b * docs[number][4] / average_length)
+                scores[number] = scores.get(number, 0.0) + idf * frequency * (k1 + 1) / (frequency + norm)
+
+        candidates = scores.items()
+        if kinds:
+            candidates = [(number, score) for number, score in candidates if docs[number][0] in kinds]
+        best = heapq.nlargest(limit, candidates, key=lambda item: item[1])
+        return [
+            SearchResult(docs[number][0], docs[number][1], docs[number][2], docs[number][3], score)
+            for number, score in best
+        ]
+
+
+_index: Optional[SearchIndex] = None
+
+
+def get_search_index() -> SearchIndex:
+    """Índice de búsqueda compartido por todo el bot"""
+    global _index
+    if _index is None:
+        _index = SearchIndex()
+    return _index
@@ -0,0 +1,156 @@
+# Índice de similitud de textos (MinHash + LSH) para detectar sugerencias repetidas
+from array import array
+from collections import Counter
+
+from utils.duplicates import normalize
+
+# Palabras vacías que no aportan nada a la idea de una sugerencia
+STOPWORDS = frozenset(
+    "que los las del por para con una uno unos unas como mas pero sus les este esta esto "
+    "estos estas ese esa eso hay muy sin sobre entre cuando donde porque todo todos toda "
+    "todas tambien algo alguien poder podria podrian podriais podemos seria estaria "
+    "hacer haya sea ser estar tener gente the and for you".split()
+)
+
+# Letras con que se recorta cada palabra tras quitarle el plural (sugerencia/sugerencias,
+# servidor/servidores): conserva la raíz de las palabras largas
+STEM_LENGTH = 6
+
+VOWELS = frozenset("aeiou")
+
+# Valor de los compartimentos vacíos de la firma
+EMPTY = -1
+
+HASH_MASK = (1 << 63) - 1
+
+# Candidatos (los que más bandas comparten) cuya similitud se calcula en cada consulta
+MAX_CANDIDATES = 64
+
+# Bandas con más textos que esto se ignoran en las consultas: son palabras tan
+# comunes que no distinguen una idea de otra (como las palabras vacías)
+MAX_BUCKET_SIZE = 1000
+
+
+def stem(word: str) -> str:
+    """
+    Raíz aproximada de una palabra normalizada: el singular y el plural dan
+    la misma (canal/canales, mes/meses, rol/roles, voz/voces, clase/clases,
+    bot/bots, país/países), recortada a STEM_LENGTH letras.
+    """
+    if len(word) >= 5 and word.endswith("es") and word[-3] not in VOWELS:
+        # canales -> canal, meses -> mes, voces -> voz
+        word = word[:-2]
+        if word.endswith("c"):
+            word = word[:-1] + "z"
+    if len(word) >= 4 and word.endswith("e") and word[-2] not in VOWELS:
+        # noche -> noch, como noches
+        word = word[:-1]
+    if len(word) >= 4 and word.endswith("s") and word[-2] != "s":
+        # juegos -> juego, bots -> bot, pais -> pai (como paises -> pais -> pai)
+        word = word[:-1]
+    return word[:STEM_LENGTH]
+
+
+def tokens(text: str) -> set:
+    """Raíces de las palabras con contenido del texto normalizado"""
+    return {
+        stem(word)
+        for word in normalize(text).split()
+        if len(word) >= 3 and word not in STOPWORDS
+    }
+
+
+class SimilarityIndex:
+    """
+    MinHash de una sola permutación con LSH por bandas.
+
+    Cada palabra se hashea una vez y cae en uno de `bins` compartimentos,
+    que guardan el mínimo: la firma sale en O(palabras). La proporción de
+    compartimentos iguales entre dos firmas estima la similitud de Jaccard.
+    Las firmas se parten en `bands` bandas; solo se comparan los textos que
+    coinciden en alguna banda entera, así que una consulta no recorre el
+    corpus. Las firmas usan hash() de Python, así que el índice se
+    reconstruye en cada arranque a partir de los textos guardados.
+    """
+
+    def __init__(self, bins: int = 64, bands: int = 32, threshold: float = 0.4):
+        if bins % bands:
+            raise ValueError("bins debe ser múltiplo de bands")
+        self.bins = bins
+        self.bands = bands
+        self.rows = bins // bands
+        self.threshold = threshold
+        self.signatures = {}
+        self.buckets = {}
+
+    def __len__(self) -> int:
+        return len(self.signatures)
+
+    def signature(self, text: str) -> array:
+        bins = self.bins
+        signature = array("q", [EMPTY]) * bins
+        for token in tokens(text):
+            value = hash(token) & HASH_MASK
+            slot = value % bins
+            value //= bins
+            current = signature[slot]
+            if current == EMPTY or value < current:
+                signature[slot] = value
+        return signature
+
+    def _band_keys(self, signature: array):
+        rows = self.rows
+        for band in range(self.bands):
+            chunk = tuple(signature[band * rows:(band + 1) * rows])
+            # Una banda sin ninguna palabra no dice nada del texto
+            if chunk.count(EMPTY) < rows:
+                yield band, chunk
+
+    def add(self, doc_id: int, text: str) -> None:
+        if doc_id in self.signatures:
+            self.remove(doc_id)
+        signature = self.signature(text)
+        self.signatures[doc_id] = signature
+        for key in self._band_keys(signature):
+            self.buckets.setdefault(key, set()).add(doc_id)
+
+    def remove(self, doc_id: int) -> None:
+        signature = self.signatures.pop(doc_id, None)
+        if signature is None:
+            return
+        for key in self._band_keys(signature):
+            bucket = self.buckets.get(key)
+            if bucket:
+                bucket.discard(doc_id)
+                if not bucket:
+                    del self.buckets[key]
+
+    @staticmethod
+    def similarity(a: array, b: array) -> float:
+        """Estimación de Jaccard: compartimentos iguales entre los ocupados en alguna de las dos firmas"""
+        used = same = 0
+        for x, y in zip(a, b):
+            if x == EMPTY and y == EMPTY:
+                continue
+            used += 1
+            if x == y:
+                same += 1
+        return same / used if used else 0.0
+
+    def query(self, text: str, limit: int = 3) -> list:
+        """Devuelve [(doc_id, similitud)] de los textos parecidos, del más al menos similar"""
+        signature = self.signature(text)
+        # Solo se verifican los textos que coinciden en más bandas
+        hits = Counter()
+        for key in self._band_keys(signature):
+            bucket = self.buckets.get(key, ())
+            if len(bucket) <= MAX_BUCKET_SIZE:
+                hits.update(bucket)
+
+        results = []
+        for doc_id, _ in hits.most_common(MAX_CANDIDATES):
+            score = self.similarity(signature, self.signatures[doc_id])
+            if score >= self.threshold:
+                results.append((doc_id, score))
+        results.sort(key=lambda result: result[1], reverse=True)
+        return results[:limit]
@@ -0,0 +1,26 @@
+# Persistencia sencilla de estado en archivos JSON
+import json
+import os
+
+
+def load_json(path: str, default=None):
+    """Lee un archivo JSON y devuelve `default` si no existe o está corrupto"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except json.JSONDecodeError:
+        print(f"❌ Error decodificando {path}")
+        return default
+
+
+def save_json(path: str, data) -> None:
+    """Escribe un archivo JSON de forma atómica (archivo temporal + rename)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
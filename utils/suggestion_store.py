@@ -0,0 +1,163 @@
+# Índice persistente de sugerencias (mensaje del canal -> autor)
+import re
+import time
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from typing import Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS suggestions (
+    message_id INTEGER PRIMARY KEY,
+    channel_id INTEGER NOT NULL,
+    author_id INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    created_at REAL NOT NULL,
+    votes INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_suggestions_author ON suggestions (author_id);
+"""
+
+# Estados posibles de una sugerencia
+STATUS_PENDING = "pending"
+STATUS_APPROVED = "approved"
+STATUS_REJECTED = "rejected"
+STATUS_REVIEW = "review"
+
+# ID del autor en el pie del embed ("ID: 123...")
+FOOTER_ID_PATTERN = re.compile(r"ID: (\d{15,20})")
+
+# ID del autor dentro de la URL de su avatar (avatares globales y de servidor)
+AVATAR_ID_PATTERN = re.compile(r"/(?:avatars|users)/(\d{15,20})/")
+
+
+@dataclass
+class Suggestion:
+    """Fila de la tabla de sugerencias (message_id es el mensaje del canal)"""
+
+    message_id: int
+    channel_id: int
+    author_id: int
+    content: str
+    status: str
+    created_at: float
+    votes: int = 0
+
+    @property
+    def rank_key(self) -> tuple:
+        # Más votos primero; a igualdad de votos, la más antigua
+        return (-self.votes, self.message_id)
+
+
+def author_id_from_embed(embed) -> Optional[int]:
+    """
+    Recupera el ID del autor de un embed de sugerencia: primero del pie
+    (sugerencias nuevas) y si no de la URL del avatar (sugerencias antiguas).
+    Los avatares por defecto no llevan el ID, así que esas no se pueden resolver.
+    """
+    if embed.footer and embed.footer.text:
+        match = FOOTER_ID_PATTERN.search(embed.footer.text)
+        if match:
+            return int(match.group(1))
+    if embed.author and embed.author.icon_url:
+        match = AVATAR_ID_PATTERN.search(embed.author.icon_url)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+class SuggestionStore:
+    """
+    Sugerencias en SQLite con copia en memoria indexada por message_id,
+    para resolver el autor de una sugerencia en O(1).
+
+    Los votos se mantienen además en una lista ordenada (ranking) que se
+    actualiza con bisect en cada voto, y se escriben a disco por lotes.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.cache = {}
+        self.ranking = []
+        # Sugerencias con votos aún no persistidos (write-behind)
+        self.dirty_votes = set()
+
+    async def setup(self) -> None:
+        await self.db.executescript(SCHEMA)
+        # Bases de datos creadas antes de contar votos
+        columns = {row["name"] for row in await self.db.fetchall("PRAGMA table_info(suggestions)")}
+        if "votes" not in columns:
+            await self.db.execute("ALTER TABLE suggestions ADD COLUMN votes INTEGER NOT NULL DEFAULT 0")
+        rows = await self.db.fetchall("SELECT * FROM suggestions")
+        self.cache = {row["message_id"]: Suggestion(**dict(row)) for row in rows}
+        self.ranking = sorted(suggestion.rank_key for suggestion in self.cache.values())
+
+    def get(self, message_id: int) -> Optional[Suggestion]:
+        return self.cache.get(message_id)
+
+    async def add(self, message_id: int, channel_id: int, author_id: int, content: str,
+                  status: str = STATUS_PENDING, created_at: Optional[float] = None) -> Suggestion:
+        suggestion = Suggestion(message_id, channel_id, author_id, content, status, created_at or time.time())
+        self.cache[message_id] = suggestion
+        insort(self.ranking, suggestion.rank_key)
+        await self.db.execute(
+            """
+            INSERT OR REPLACE INTO suggestions (message_id, channel_id, author_id, content, status, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (message_id, channel_id, author_id, content, status, suggestion.created_at),
+        )
+        return suggestion
+
+    async def add_many(self, suggestions: list) -> None:
+        """Inserta en una sola transacción (importación de sugerencias antiguas)"""
+        for suggestion in suggestions:
+            self.cache[suggestion.message_id] = suggestion
+            insort(self.ranking, suggestion.rank_key)
+        await self.db.executemany(
+            """
+            INSERT OR IGNORE INTO suggestions (message_id, channel_id, author_id, content, status, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (s.message_id, s.channel_id, s.author_id, s.content, s.status, s.created_at)
+                for s in suggestions
+            ],
+        )
+
+    async def set_status(self, suggestion: Suggestion, status: str) -> None:
+        suggestion.status = status
+        await self.db.execute(
+            "UPDATE suggestions SET status = ? WHERE message_id = ?",
+            (status, suggestion.message_id),
+        )
+
+    def set_votes(self, suggestion: Suggestion, votes: int) -> None:
+        """Actualiza los votos en memoria y su posición en el ranking; se persiste con flush_votes"""
+        votes = max(0, votes)
+        if votes == suggestion.votes:
+            return
+        index = bisect_left(self.ranking, suggestion.rank_key)
+        del self.ranking[index]
+        suggestion.votes = votes
+        insort(self.ranking, suggestion.rank_key)
+        self.dirty_votes.add(suggestion.message_id)
+
+    def add_vote(self, suggestion: Suggestion, delta: int) -> None:
+        self.set_votes(suggestion, suggestion.votes + delta)
+
+    def top(self, limit: int) -> list:
+        """Sugerencias con más votos, leídas del ranking ya ordenado"""
+        return [self.cache[message_id] for _, message_id in self.ranking[:limit]]
+
+    async def flush_votes(self) -> None:
+        """Escribe en una sola transacción los votos de las sugerencias modificadas"""
+        if not self.dirty_votes:
+            return
+        rows = [
+            (self.cache[message_id].votes, message_id)
+            for message_id in self.dirty_votes
+            if message_id in self.cache
+        ]
+        self.dirty_votes = set()
+        await self.db.executemany("UPDATE suggestions SET votes = ? WHERE message_id = ?", rows)
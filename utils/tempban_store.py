@@ -0,0 +1,125 @@
+# Baneos temporales pendientes de levantar
+import re
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tempbans (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    moderator_id INTEGER NOT NULL,
+    reason TEXT,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS idx_tempbans_expires ON tempbans (expires_at);
+"""
+
+# Segundos por unidad de duración aceptada en /tempban
+DURATION_UNITS = {
+    "s": 1,
+    "m": 60,
+    "h": 3600,
+    "d": 86400,
+    "w": 604800,
+}
+
+# Nombres en español de cada unidad para mostrar la duración
+DURATION_NAMES = (
+    (86400, "día(s)"),
+    (3600, "hora(s)"),
+    (60, "minuto(s)"),
+    (1, "segundo(s)"),
+)
+
+DURATION_PATTERN = re.compile(r"(\d+)\s*([smhdw])")
+
+
+def parse_duration(text: str) -> Optional[int]:
+    """
+    Convierte una duración en segundos.
+
+    Acepta un número de días ("7") o combinaciones de unidades
+    ("2h", "3d", "1d12h", "30m", "1w"). Devuelve None si no es válida.
+    """
+    text = text.strip().lower()
+    if text.isdigit():
+        return int(text) * DURATION_UNITS["d"]
+
+    total = 0
+    position = 0
+    for match in DURATION_PATTERN.finditer(text):
+        if text[position:match.start()].strip():
+            return None
+        total += int(match.group(1)) * DURATION_UNITS[match.group(2)]
+        position = match.end()
+
+    if position == 0 or text[position:].strip():
+        return None
+    return total
+
+
+def format_duration(seconds: int) -> str:
+    """Formatea una duración en segundos, por ejemplo "1 día(s) 12 hora(s)" """
+    parts = []
+    for size, name in DURATION_NAMES:
+        if seconds >= size:
+            amount, seconds = divmod(seconds, size)
+            parts.append(f"{amount} {name}")
+    return " ".join(parts) or "0 segundo(s)"
+
+
+@dataclass
+class Tempban:
+    """Baneo temporal que se levantará en expires_at"""
+
+    guild_id: int
+    user_id: int
+    moderator_id: int
+    reason: Optional[str]
+    created_at: float
+    expires_at: float
+
+    @property
+    def key(self) -> tuple:
+        return (self.guild_id, self.user_id)
+
+
+class TempbanStore:
+    """Baneos temporales en SQLite, con copia en memoria indexada por (guild_id, user_id)"""
+
+    def __init__(self, db):
+        self.db = db
+        self.bans = {}
+
+    async def setup(self) -> None:
+        await self.db.executescript(SCHEMA)
+        rows = await self.db.fetchall("SELECT * FROM tempbans")
+        self.bans = {(row["guild_id"], row["user_id"]): Tempban(**dict(row)) for row in rows}
+
+    def get(self, key: tuple) -> Optional[Tempban]:
+        return self.bans.get(key)
+
+    async def add(self, guild_id: int, user_id: int, moderator_id: int, reason: str, duration: int) -> Tempban:
+        now = time.time()
+        tempban = Tempban(guild_id, user_id, moderator_id, reason, now, now + duration)
+        self.bans[tempban.key] = tempban
+        await self.db.execute(
+            """
+            INSERT OR REPLACE INTO tempbans (guild_id, user_id, moderator_id, reason, created_at, expires_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (guild_id, user_id, moderator_id, reason, tempban.created_at, tempban.expires_at),
+        )
+        return tempban
+
+    async def remove(self, key: tuple) -> Optional[Tempban]:
+        tempban = self.bans.pop(key, None)
+        if tempban:
+            await self.db.execute(
+                "DELETE FROM tempbans WHERE guild_id = ? AND user_id = ?",
+                key,
+            )
+        return tempban
@@ -0,0 +1,188 @@
+# Estado persistente de los tickets de soporte
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    ticket_id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    creator_id INTEGER NOT NULL,
+    claimed_by INTEGER,
+    status TEXT NOT NULL DEFAULT 'open',
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    last_activity_at REAL NOT NULL,
+    closed_at REAL,
+    closed_by INTEGER,
+    close_reason TEXT,
+    rating INTEGER,
+    idle_warned_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_tickets_creator ON tickets (creator_id, status);
+CREATE INDEX IF NOT EXISTS idx_tickets_status ON tickets (status);
+"""
+
+# Estados posibles de un ticket
+STATUS_OPEN = "open"
+STATUS_CLOSED = "closed"
+STATUS_DELETED = "deleted"
+
+
+@dataclass
+class Ticket:
+    """Fila de la tabla de tickets (ticket_id es el ID del canal)"""
+
+    ticket_id: int
+    guild_id: int
+    creator_id: int
+    claimed_by: Optional[int]
+    status: str
+    created_at: float
+    updated_at: float
+    last_activity_at: float
+    closed_at: Optional[float] = None
+    closed_by: Optional[int] = None
+    close_reason: Optional[str] = None
+    rating: Optional[int] = None
+    # Momento del aviso de inactividad (None si no se ha avisado desde la última actividad)
+    idle_warned_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.status == STATUS_OPEN
+
+
+def build_topic(creator_id: int, is_open: bool = True, claimed_by: Optional[int] = None) -> str:
+    """
+    Topic cosmético del canal que refleja el estado del ticket. No lleva el
+    ID del ticket (es el ID del canal), así que al crear el canal ya sale
+    completo y no hace falta editarlo después.
+    """
+    estado = ":white_check_mark: Abierto" if is_open else ":red_square: Cerrado"
+    reclamado = f":white_check_mark: Sí (<@{claimed_by}>)" if claimed_by else ":x: No"
+    return f"Estado: {estado} | Reclamado: {reclamado} | creator_id: {creator_id}"
+
+
+def format_topic(ticket: Ticket) -> str:
+    return build_topic(ticket.creator_id, ticket.is_open, ticket.claimed_by)
+
+
+class TicketStore:
+    """
+    Almacén de tickets sobre SQLite.
+
+    Los tickets no borrados se mantienen también en memoria, así que las
+    lecturas no tocan el disco y las escrituras se hacen fuera del event loop.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.cache = {}
+        # Tickets con actividad aún no persistida (write-behind)
+        self.dirty_activity = set()
+
+    async def setup(self) -> None:
+        """Crea el esquema y carga en memoria los tickets que siguen existiendo"""
+        await self.db.executescript(SCHEMA)
+        # Bases de datos creadas antes de persistir el aviso de inactividad
+        columns = {row["name"] for row in await self.db.fetchall("PRAGMA table_info(tickets)")}
+        if "idle_warned_at" not in columns:
+            await self.db.execute("ALTER TABLE tickets ADD COLUMN idle_warned_at REAL")
+        rows = await self.db.fetchall("SELECT * FROM tickets WHERE status != ?", (STATUS_DELETED,))
+        self.cache = {row["ticket_id"]: Ticket(**dict(row)) for row in rows}
+
+    def get(self, ticket_id: int) -> Optional[Ticket]:
+        return self.cache.get(ticket_id)
+
+    def open_tickets(self) -> list:
+        return [ticket for ticket in self.cache.values() if ticket.is_open]
+
+    async def _save(self, ticket: Ticket) -> None:
+        ticket.updated_at = time.time()
+        await self.db.execute(
+            """
+            INSERT OR REPLACE INTO tickets (
+                ticket_id, guild_id, creator_id, claimed_by, status, created_at, updated_at,
+                last_activity_at, closed_at, closed_by, close_reason, rating, idle_warned_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                ticket.ticket_id, ticket.guild_id, ticket.creator_id, ticket.claimed_by,
+                ticket.status, ticket.created_at, ticket.updated_at, ticket.last_activity_at,
+                ticket.closed_at, ticket.closed_by, ticket.close_reason, ticket.rating,
+                ticket.idle_warned_at,
+            ),
+        )
+
+    async def create(self, ticket_id: int, guild_id: int, creator_id: int,
+                     claimed_by: Optional[int] = None, status: str = STATUS_OPEN) -> Ticket:
+        now = time.time()
+        ticket = Ticket(
+            ticket_id=ticket_id,
+            guild_id=guild_id,
+            creator_id=creator_id,
+            claimed_by=claimed_by,
+            status=status,
+            created_at=now,
+            updated_at=now,
+            last_activity_at=now,
+        )
+        self.cache[ticket_id] = ticket
+        await self._save(ticket)
+        return ticket
+
+    async def claim(self, ticket: Ticket, claimed_by: int) -> None:
+        ticket.claimed_by = claimed_by
+        await self._save(ticket)
+
+    async def close(self, ticket: Ticket, closed_by: int, reason: str) -> None:
+        ticket.status = STATUS_CLOSED
+        ticket.closed_at = time.time()
+        ticket.closed_by = closed_by
+        ticket.close_reason = reason
+        await self._save(ticket)
+
+    async def mark_deleted(self, ticket_id: int) -> None:
+        ticket = self.cache.pop(ticket_id, None)
+        if ticket:
+            ticket.status = STATUS_DELETED
+            await self._save(ticket)
+
+    def touch(self, ticket: Ticket, when: Optional[float] = None) -> None:
+        """Actualiza la última actividad en memoria; se persiste con flush_activity"""
+        ticket.last_activity_at = when or time.time()
+        # La actividad anula el aviso de inactividad anterior
+        ticket.idle_warned_at = None
+        self.dirty_activity.add(ticket.ticket_id)
+
+    async def mark_idle_warned(self, ticket: Ticket, when: Optional[float] = None) -> None:
+        """Guarda enseguida el aviso de inactividad para no repetirlo tras un reinicio"""
+        ticket.idle_warned_at = when or time.time()
+        await self.db.execute(
+            "UPDATE tickets SET idle_warned_at = ? WHERE ticket_id = ?",
+            (ticket.idle_warned_at, ticket.ticket_id),
+        )
+
+    async def flush_activity(self) -> None:
+        """Escribe en una sola transacción la última actividad de los tickets modificados"""
+        if not self.dirty_activity:
+            return
+        rows = [
+            (self.cache[ticket_id].last_activity_at, self.cache[ticket_id].idle_warned_at, ticket_id)
+            for ticket_id in self.dirty_activity
+            if ticket_id in self.cache
+        ]
+        self.dirty_activity = set()
+        await self.db.executemany(
+            "UPDATE tickets SET last_activity_at = ?, idle_warned_at = ? WHERE ticket_id = ?", rows
+        )
+
+    async def set_rating(self, ticket_id: int, rating: int) -> None:
+        await self.db.execute(
+            "UPDATE tickets SET rating = ?, updated_at = ? WHERE ticket_id = ?",
+            (rating, time.time(), ticket_id),
+        )
+        ticket = self.cache.get(ticket_id)
+        if ticket:
+            ticket.rating = rating
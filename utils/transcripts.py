@@ -0,0 +1,174 @@
+# Archivado de transcripciones de tickets (JSONL comprimido + HTML estático)
+import asyncio
+import gzip
+import html
+import json
+import os
+from config.config import TRANSCRIPTS_DIR, TRANSCRIPTS_MAX_CONCURRENCY
+
+# Mensajes que se acumulan antes de escribir a disco (coincide con una página de la API)
+PAGE_SIZE = 100
+
+
+def serialize_message(message) -> dict:
+    """Convierte un discord.Message en un registro JSON del transcript"""
+    return {
+        "id": message.id,
+        "author_id": message.author.id,
+        "author": str(message.author),
+        "bot": message.author.bot,
+        "created_at": message.created_at.isoformat(),
+        "content": message.content,
+        "attachments": [
+            {
+                "filename": attachment.filename,
+                "url": attachment.url,
+                "size": attachment.size,
+                "content_type": attachment.content_type,
+            }
+            for attachment in message.attachments
+        ],
+        "embeds": [embed.title or embed.description or "" for embed in message.embeds],
+    }
+
+
+async def channel_history_source(channel):
+    """Fuente real: recorre el historial del canal página a página, del más antiguo al más nuevo"""
+    async for message in channel.history(limit=None, oldest_first=True):
+        yield serialize_message(message)
+
+
+class FakeHistorySource:
+    """Fuente local de historial para probar el archivador sin conexión a Discord"""
+
+    def __init__(self, records, page_size: int = PAGE_SIZE):
+        self.records = records
+        self.page_size = page_size
+
+    async def __aiter__(self):
+        for i, record in enumerate(self.records):
+            # Ceder el control entre páginas, como haría una petición real
+            if i and i % self.page_size == 0:
+                await asyncio.sleep(0)
+            yield record
+
+
+def _append_lines(path: str, lines: list) -> None:
+    with gzip.open(path, "at", encoding="utf-8") as f:
+        f.writelines(lines)
+
+
+def read_contents(jsonl_path: str) -> list:
+    """Textos de los mensajes de personas de un transcript (para indexarlos); lista vacía si no existe"""
+    try:
+        with gzip.open(jsonl_path, "rt", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+    except FileNotFoundError:
+        return []
+    return [record["content"] for record in records if record["content"] and not record["bot"]]
+
+
+def render_html(jsonl_path: str, html_path: str, title: str) -> int:
+    """
+    Genera la vista HTML leyendo el JSONL línea a línea (memoria acotada).
+
+    Devuelve el número de mensajes renderizados.
+    """
+    count = 0
+    tmp_path = f"{html_path}.tmp"
+    with gzip.open(jsonl_path, "rt", encoding="utf-8") as src, open(tmp_path, "w", encoding="utf-8") as out:
+        out.write(
+            "<!DOCTYPE html><html lang=\"es\"><head><meta charset=\"utf-8\">"
+            f"<title>{html.escape(title)}</title>"
+            "<style>body{font-family:sans-serif;background:#313338;color:#dbdee1;margin:2em}"
+            ".msg{margin:.6em 0}.author{font-weight:bold;color:#8970ff}.time{color:#949ba4;font-size:.8em}"
+            ".content{white-space:pre-wrap}.attachment a,.embed{color:#00a8fc;font-size:.9em}</style>"
+            f"</head><body><h1>{html.escape(title)}</h1>\n"
+        )
+        for line in src:
+            record = json.loads(line)
+            count += 1
+            out.write(
+                "<div class=\"msg\">"
+                f"<span class=\"author\">{html.escape(record['author'])}</span> "
+                f"<span class=\"time\">{html.escape(record['created_at'])}</span>"
+                f"<div class=\"content\">{html.escape(record['content'])}</div>"
+            )
+            for attachment in record["attachments"]:
+                out.write(
+                    f"<div class=\"attachment\">📎 <a href=\"{html.escape(attachment['url'])}\">"
+                    f"{html.escape(attachment['filename'])}</a> ({attachment['size']} bytes)</div>"
+                )
+            for embed in record["embeds"]:
+                out.write(f"<div class=\"embed\">[embed] {html.escape(embed)}</div>")
+            out.write("</div>\n")
+        out.write(f"<p class=\"time\">{count} mensaje(s)</p></body></html>\n")
+    os.replace(tmp_path, html_path)
+    return count
+
+
+class TranscriptArchiver:
+    """
+    Archiva canales en segundo plano con un límite de trabajos simultáneos.
+
+    El historial se escribe por páginas en un JSONL comprimido con gzip, así
+    que la memoria usada no depende de la longitud del ticket. La escritura
+    a disco se hace en un hilo para no bloquear el event loop.
+    """
+
+    def __init__(self, directory: str = TRANSCRIPTS_DIR, max_concurrency: int = TRANSCRIPTS_MAX_CONCURRENCY):
+        self.directory = directory
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.jobs = {}
+
+    def paths(self, ticket_id: int) -> tuple:
+        base = os.path.join(self.directory, str(ticket_id))
+        return f"{base}.jsonl.gz", f"{base}.html"
+
+    def archive(self, ticket_id: int, title: str, source) -> asyncio.Task:
+        """
+        Lanza (o reutiliza) el trabajo de archivado de un ticket.
+
+        source: iterable asíncrono de registros (channel_history_source o FakeHistorySource)
+        """
+        job = self.jobs.get(ticket_id)
+        if job and not job.done():
+            return job
+        job = asyncio.create_task(self._archive(ticket_id, title, source))
+        self.jobs[ticket_id] = job
+
+        def forget(finished: asyncio.Task) -> None:
+            if self.jobs.get(ticket_id) is finished:
+                del self.jobs[ticket_id]
+
+        job.add_done_callback(forget)
+        return job
+
+    def archive_channel(self, channel) -> asyncio.Task:
+        return self.archive(channel.id, f"Ticket {channel.name}", channel_history_source(channel))
+
+    async def _archive(self, ticket_id: int, title: str, source) -> int:
+        async with self.semaphore:
+            os.makedirs(self.directory, exist_ok=True)
+            jsonl_path, html_path = self.paths(ticket_id)
+            tmp_path = f"{jsonl_path}.tmp"
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+            try:
+                buffer = []
+                async for record in source:
+                    buffer.append(json.dumps(record, ensure_ascii=False) + "\n")
+                    if len(buffer) >= PAGE_SIZE:
+                        await asyncio.to_thread(_append_lines, tmp_path, buffer)
+                        buffer = []
+                # Crear el archivo aunque el canal esté vacío
+                await asyncio.to_thread(_append_lines, tmp_path, buffer)
+                os.replace(tmp_path, jsonl_path)
+
+                count = await asyncio.to_thread(render_html, jsonl_path, html_path, title)
+                print(f"✅ Transcript del ticket {ticket_id} archivado ({count} mensajes)")
+                return count
+            except Exception as e:
+                print(f"❌ Error al archivar el ticket {ticket_id}: {e}")
+                raise
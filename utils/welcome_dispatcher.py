@@ -0,0 +1,100 @@
+# Envío de bienvenidas agrupando las entradas en los picos (eventos, directos...)
+import asyncio
+import time
+from collections import deque
+
+# Máximo de embeds por mensaje que admite Discord
+MAX_EMBEDS_PER_MESSAGE = 10
+
+# Máximo de caracteres sumando todos los embeds de un mensaje (título, descripción, campos, pie...)
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+
+def pack_embeds(embeds: list) -> list:
+    """
+    Reparte los embeds en mensajes sin pasar de 10 embeds ni de 6000
+    caracteres por mensaje (len(embed) es el total de texto del embed).
+    """
+    messages = []
+    current = []
+    size = 0
+    for embed in embeds:
+        length = len(embed)
+        if current and (len(current) >= MAX_EMBEDS_PER_MESSAGE or size + length > MAX_EMBED_CHARS_PER_MESSAGE):
+            messages.append(current)
+            current = []
+            size = 0
+        current.append(embed)
+        size += length
+    if current:
+        messages.append(current)
+    return messages
+
+
+class WelcomeDispatcher:
+    """
+    Publica las bienvenidas de una en una mientras el ritmo es bajo.
+
+    Si entran más de `threshold` miembros en `window` segundos, las
+    siguientes bienvenidas se acumulan durante la ventana y salen juntas:
+    hasta `max_embeds` embeds individuales en un mensaje o, si son más,
+    embeds con listas de menciones, repartidos en tantos mensajes como haga
+    falta para respetar los límites de Discord (10 embeds y 6000 caracteres).
+    """
+
+    def __init__(self, get_channel, build_embed, build_summary, window: float, threshold: int,
+                 max_embeds: int = MAX_EMBEDS_PER_MESSAGE, mentions_per_embed: int = 50):
+        self.get_channel = get_channel
+        self.build_embed = build_embed
+        self.build_summary = build_summary
+        self.window = window
+        self.threshold = threshold
+        self.max_embeds = min(max_embeds, MAX_EMBEDS_PER_MESSAGE)
+        self.mentions_per_embed = mentions_per_embed
+        self.recent = deque()
+        self.pending = []
+        self.flush_task = None
+
+    async def announce(self, member) -> None:
+        now = time.monotonic()
+        cutoff = now - self.window
+        while self.recent and self.recent[0] < cutoff:
+            self.recent.popleft()
+        self.recent.append(now)
+
+        if self.flush_task is None and len(self.recent) <= self.threshold:
+            await self._send([self.build_embed(member)], f"Mensaje de bienvenida enviado a {member.name}")
+            return
+
+        self.pending.append(member)
+        if self.flush_task is None:
+            self.flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.window)
+        members, self.pending = self.pending, []
+        # Las entradas que lleguen mientras se envía este lote abren uno nuevo
+        self.flush_task = None
+
+        if len(members) <= self.max_embeds:
+            embeds = [self.build_embed(member) for member in members]
+        else:
+            chunks = [
+                members[start:start + self.mentions_per_embed]
+                for start in range(0, len(members), self.mentions_per_embed)
+            ]
+            embeds = [self.build_summary(chunk, len(members)) for chunk in chunks]
+
+        for message_embeds in pack_embeds(embeds):
+            await self._send(message_embeds, f"Bienvenida agrupada enviada a {len(members)} miembro(s)")
+
+    async def _send(self, embeds: list, log: str) -> None:
+        channel = self.get_channel()
+        if channel is None:
+            print("❌ No se pudo encontrar el canal de bienvenida")
+            return
+        try:
+            await channel.send(embeds=embeds)
+            print(f"✅ {log}")
+        except Exception as e:
+            print(f"❌ Error al enviar mensaje de bienvenida: {e}")